@@ -0,0 +1,76 @@
+# coalescing.py - Coalescing des requêtes identiques en vol (single-flight)
+"""
+Lors d'un incident, des centaines de tickets quasi identiques arrivent en
+quelques secondes. Les requêtes concurrentes ayant la même clé (texte
+normalisé + route) partagent un seul appel backend et son résultat.
+"""
+import re
+import threading
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Normalise un ticket pour construire la clé de coalescing"""
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+
+class _InFlightCall:
+    """Appel backend en cours, partagé entre le leader et ses suiveurs"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Partage un seul appel entre requêtes concurrentes de même clé"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls_executed = 0  # Appels réellement envoyés au backend
+        self.calls_saved = 0     # Appels évités grâce au coalescing
+
+    def do(self, key, fn):
+        """
+        Exécute fn() une seule fois par clé en vol.
+        Returns: (résultat, shared) où shared indique un résultat partagé
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.calls_executed += 1
+            else:
+                self.calls_saved += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> dict:
+        """Compteurs exportés dans /metrics"""
+        with self._lock:
+            return {
+                "backend_calls_executed": self.calls_executed,
+                "backend_calls_saved": self.calls_saved,
+                "in_flight": len(self._calls)
+            }
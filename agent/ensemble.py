@@ -0,0 +1,104 @@
+# ensemble.py - Combinaison pondérée des probabilités des backends
+"""
+Mode ensemble : les deux modèles sont interrogés en parallèle et leurs
+distributions de probabilités sont combinées par une moyenne pondérée.
+Les probabilités du SVM sont calibrées (Platt) ; celles du Transformer
+(softmax) peuvent être adoucies par une température (p^(1/T), renormalisé)
+avant le mélange. Les poids sont renormalisés sur les modèles ayant répondu.
+"""
+import contextvars
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures import as_completed, wait
+
+
+def parse_model_values(spec: str, default: float = 1.0) -> dict:
+    """'tfidf=0.4,transformer=0.6' → {'tfidf': 0.4, 'transformer': 0.6}"""
+    values = {}
+    for part in (spec or '').split(','):
+        if not part.strip():
+            continue
+        name, _, value = part.partition('=')
+        values[name.strip()] = float(value) if value.strip() else default
+    return values
+
+
+def result_probabilities(result: dict) -> dict:
+    """Distribution d'un résultat backend ; à défaut, la seule catégorie prédite"""
+    probabilities = result.get('probabilities')
+    if probabilities:
+        return {category: float(p) for category, p in probabilities.items()}
+    return {result['category']: float(result.get('confidence', 1.0))}
+
+
+def apply_temperature(probabilities: dict, temperature: float) -> dict:
+    """p^(1/T) renormalisé : T > 1 adoucit un modèle trop sûr de lui"""
+    if temperature == 1.0:
+        return probabilities
+    scaled = {category: p ** (1.0 / temperature) for category, p in probabilities.items()}
+    total = sum(scaled.values()) or 1.0
+    return {category: p / total for category, p in scaled.items()}
+
+
+def blend(results: dict, weights: dict, temperatures: dict = None) -> dict:
+    """
+    results : {modèle: réponse backend}. Returns: {category, confidence,
+    probabilities, weights} où weights sont les poids effectivement appliqués.
+    """
+    temperatures = temperatures or {}
+    raw = {model: weights.get(model, 1.0) for model in results}
+    total_weight = sum(raw.values())
+    if total_weight <= 0:
+        raise ValueError(f"Poids d'ensemble nuls pour {sorted(results)}")
+    applied = {model: w / total_weight for model, w in raw.items()}
+
+    combined = {}
+    for model, result in results.items():
+        probabilities = apply_temperature(result_probabilities(result), temperatures.get(model, 1.0))
+        for category, p in probabilities.items():
+            combined[category] = combined.get(category, 0.0) + applied[model] * p
+
+    category = max(combined, key=combined.get)
+    return {
+        'category': category,
+        'confidence': round(combined[category], 4),
+        'probabilities': {c: round(p, 4) for c, p in sorted(combined.items(), key=lambda item: -item[1])},
+        'weights': applied
+    }
+
+
+def fan_out(executor, fetch, models: list, text: str, deadline: float, grace: float = 0.0) -> tuple:
+    """
+    Appelle fetch(modèle, texte, timeout) pour chaque modèle en parallèle.
+    Chaque appel est borné à deadline + grace : un backend lent ne retient
+    pas un worker du pool au-delà. Si aucun modèle n'a répondu dans la
+    deadline, la première réponse valide pendant la grâce est retenue.
+    Returns: (réponses, {modèle manquant: raison}, erreurs)
+    """
+    # Les threads du pool reçoivent une copie du contexte (trace courante)
+    futures = {
+        executor.submit(contextvars.copy_context().run, fetch, model, text, deadline + grace): model
+        for model in models
+    }
+    done, pending = wait(futures, timeout=deadline)
+
+    results, missing, errors = {}, {}, []
+    for future in done:
+        if future.exception() is None:
+            results[futures[future]] = future.result()
+        else:
+            missing[futures[future]] = type(future.exception()).__name__
+            errors.append(future.exception())
+    for future in pending:
+        missing[futures[future]] = 'deadline'
+
+    if not results and pending:
+        try:
+            for future in as_completed(pending, timeout=grace):
+                if future.exception() is None:
+                    results[futures[future]] = future.result()
+                    del missing[futures[future]]
+                    break
+                errors.append(future.exception())
+        except FuturesTimeoutError:
+            pass
+    return results, missing, errors
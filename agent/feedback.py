@@ -0,0 +1,46 @@
+# feedback.py - Journal des corrections de catégorie faites par les agents
+"""
+Chaque correction est ajoutée en une ligne JSON au journal (append-only).
+scripts/online_learner.py lit le journal à partir de son dernier offset et
+met à jour le modèle TF-IDF incrémentalement. `text_hash` est la même
+empreinte que celle du journal des prédictions (jointure au réentraînement).
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+# Modules partagés (common/) à la racine du projet
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.fingerprint import text_hash
+
+
+class FeedbackLog:
+    """Journal JSONL append-only, sûr entre threads du même processus"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def append(self, text: str, category: str, predicted_category: str = None,
+               model_used: str = None) -> dict:
+        record = {
+            'timestamp': time.time(),
+            'text': text,
+            'text_hash': text_hash(text),
+            'category': category,
+            'predicted_category': predicted_category,
+            'model_used': model_used,
+        }
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Une seule écriture par ligne : l'apprenant ne lit que des lignes complètes
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self.recorded += 1
+        return record
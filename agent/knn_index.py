@@ -0,0 +1,154 @@
+# knn_index.py - Index des plus proches voisins des tickets déjà étiquetés
+"""
+Beaucoup de tickets entrants sont des quasi-paraphrases de tickets déjà
+étiquetés. L'index (construit par scripts/build_knn_index.py) contient :
+- le vocabulaire TF-IDF trié + IDF (float32) pour vectoriser sans sklearn
+- la projection SVD (float32) vers un espace dense compact
+- les vecteurs normalisés des tickets d'entraînement (float16) et leurs labels
+- des tables LSH (hyperplans aléatoires) triées pour la recherche approchée
+
+La requête se fait entièrement en NumPy : vectorisation, projection,
+codes LSH, recherche binaire dans chaque table puis cosinus exact sur les
+seuls candidats.
+"""
+import re
+import numpy as np
+
+
+class KnnIndex:
+    """Recherche approchée du ticket étiqueté le plus proche"""
+
+    def __init__(self, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            self.terms = data['terms']
+            self.idf = data['idf']
+            self.projection = data['projection']        # (n_features, n_components)
+            self.vectors = data['vectors']              # (n_samples, n_components) float16
+            self.labels = data['labels']
+            self.classes = data['classes']
+            self.planes = data['planes']                # (n_tables * n_bits, n_components)
+            self.table_codes = data['table_codes']      # (n_tables, n_samples) triés
+            self.table_order = data['table_order']      # (n_tables, n_samples)
+            self.stop_words = frozenset(data['stop_words'].tolist())
+            self.token_pattern = re.compile(str(data['token_pattern']))
+            self.ngram_range = tuple(int(n) for n in data['ngram_range'])
+            self.lowercase = bool(data['lowercase'])
+            self.sublinear_tf = bool(data['sublinear_tf'])
+            # Seuil de réponse directe choisi au build (absent des anciens index)
+            self.similarity_threshold = (float(data['similarity_threshold'])
+                                         if 'similarity_threshold' in data.files else None)
+        self.n_tables, self.n_samples = self.table_codes.shape
+        self.n_bits = self.planes.shape[0] // self.n_tables
+        self._bit_weights = (1 << np.arange(self.n_bits, dtype=np.uint32)).astype(np.uint32)
+
+    def _ngrams(self, text: str) -> list:
+        if self.lowercase:
+            text = text.lower()
+        tokens = [t for t in self.token_pattern.findall(text) if t not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        grams = []
+        for n in range(min_n, max_n + 1):
+            grams.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def embed(self, text: str):
+        """Texte → vecteur dense normalisé, ou None si aucun terme connu"""
+        grams = self._ngrams(text)
+        if not grams:
+            return None
+        unique, counts = np.unique(np.array(grams), return_counts=True)
+        positions = np.searchsorted(self.terms, unique)
+        positions = np.minimum(positions, len(self.terms) - 1)
+        known = self.terms[positions] == unique
+        if not known.any():
+            return None
+        columns = positions[known]
+        tf = counts[known].astype(np.float32)
+        if self.sublinear_tf:
+            tf = 1 + np.log(tf)
+        weights = tf * self.idf[columns]
+        weights /= np.linalg.norm(weights)
+
+        dense = weights @ self.projection[columns]
+        norm = np.linalg.norm(dense)
+        if norm == 0:
+            return None
+        return dense / norm
+
+    def _candidates(self, vector) -> np.ndarray:
+        bits = (self.planes @ vector > 0).reshape(self.n_tables, self.n_bits)
+        codes = bits.astype(np.uint32) @ self._bit_weights
+        found = []
+        for table, code in enumerate(codes):
+            sorted_codes = self.table_codes[table]
+            start = np.searchsorted(sorted_codes, code, side='left')
+            end = np.searchsorted(sorted_codes, code, side='right')
+            if end > start:
+                found.append(self.table_order[table, start:end])
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def query(self, text: str):
+        """
+        Plus proche voisin approché.
+        Returns: (catégorie, similarité cosinus) ou None
+        """
+        vector = self.embed(text)
+        if vector is None:
+            return None
+        candidates = self._candidates(vector)
+        if len(candidates) == 0:
+            return None
+        similarities = self.vectors[candidates].astype(np.float32) @ vector
+        best = int(np.argmax(similarities))
+        label = self.labels[candidates[best]]
+        return str(self.classes[label]), float(similarities[best])
+
+
+def write_index(path: str, vectorizer, components, vectors, categories,
+                n_tables: int = 8, n_bits: int = 12, seed: int = 42,
+                similarity_threshold: float = None):
+    """
+    Écrit l'artefact .npz à partir d'un TfidfVectorizer entraîné, des
+    composantes SVD (n_components, n_features) et des vecteurs réduits
+    normalisés des tickets étiquetés. similarity_threshold (cosinus) est
+    stocké avec l'index : c'est le seuil par défaut de l'agent.
+    """
+    extra = {}
+    if similarity_threshold is not None:
+        extra['similarity_threshold'] = np.array(similarity_threshold, dtype=np.float32)
+    vectors = np.asarray(vectors, dtype=np.float32)
+
+    # Tables LSH : codes de n_bits signes de projections aléatoires
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((n_tables * n_bits, vectors.shape[1])).astype(np.float32)
+    bits = (vectors @ planes.T > 0).reshape(len(vectors), n_tables, n_bits)
+    codes = (bits.astype(np.uint32) << np.arange(n_bits, dtype=np.uint32)).sum(axis=2, dtype=np.uint32).T
+    table_order = np.argsort(codes, axis=1, kind='stable').astype(np.int32)
+    table_codes = np.take_along_axis(codes, table_order, axis=1)
+
+    # Vocabulaire trié + IDF alignés (recherche binaire à la requête)
+    vocabulary = vectorizer.vocabulary_
+    terms = np.array(sorted(vocabulary))
+    columns = np.array([vocabulary[t] for t in terms])
+    classes, labels = np.unique(np.asarray(categories).astype(str), return_inverse=True)
+
+    np.savez_compressed(
+        path,
+        terms=terms,
+        idf=vectorizer.idf_[columns].astype(np.float32),
+        projection=np.ascontiguousarray(np.asarray(components)[:, columns].T, dtype=np.float32),
+        vectors=vectors.astype(np.float16),
+        labels=labels.astype(np.int16),
+        classes=classes,
+        planes=planes,
+        table_codes=table_codes,
+        table_order=table_order,
+        stop_words=np.array(sorted(vectorizer.get_stop_words() or []), dtype=str),
+        token_pattern=np.array(vectorizer.token_pattern),
+        ngram_range=np.array(vectorizer.ngram_range),
+        lowercase=np.array(vectorizer.lowercase),
+        sublinear_tf=np.array(vectorizer.sublinear_tf),
+        **extra
+    )
@@ -0,0 +1,62 @@
+# load_tracker.py - Charge observée des backends (latence EWMA + requêtes en vol)
+"""
+L'agent mesure lui-même la charge de chaque backend : nombre de requêtes en
+vol et moyenne mobile exponentielle (EWMA) de la latence. Ces signaux sont
+passés à la politique de routage pour délester les tickets limites vers le
+modèle le moins chargé.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class BackendLoad:
+    """Requêtes en vol et latence EWMA d'un backend"""
+
+    def __init__(self, name: str, alpha: float = 0.2):
+        self.name = name
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.latency_ms = None
+
+    def observe(self, latency_ms: float):
+        with self._lock:
+            if self.latency_ms is None:
+                self.latency_ms = latency_ms
+            else:
+                self.latency_ms += self.alpha * (latency_ms - self.latency_ms)
+
+    @contextmanager
+    def track(self):
+        """Compte la requête en vol et mesure sa latence, même en cas d'erreur"""
+        with self._lock:
+            self.inflight += 1
+        start_time = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.inflight -= 1
+            self.observe((time.monotonic() - start_time) * 1000)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'inflight': self.inflight,
+                'latency_ms': round(self.latency_ms, 2) if self.latency_ms is not None else None
+            }
+
+
+class LoadTracker:
+    """Charge de l'ensemble des backends"""
+
+    def __init__(self, backends, alpha: float = 0.2):
+        self.backends = {name: BackendLoad(name, alpha) for name in backends}
+
+    def track(self, backend: str):
+        return self.backends[backend].track()
+
+    def snapshot(self) -> dict:
+        """{backend: {'inflight': int, 'latency_ms': float|None}}"""
+        return {name: load.snapshot() for name, load in self.backends.items()}
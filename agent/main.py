@@ -1,9 +1,37 @@
 # main.py - Service Agent IA (Routage intelligent)
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+import atexit
+import contextvars
+import threading
 import requests
-import re
+import os
+import sys
+import time
+from collections import deque, Counter
+from coalescing import SingleFlight, normalize_text
+from resilience import CircuitBreaker, BreakerOpenError, OPEN
+from routing_features import RoutingFeatures, extract_routing_features
+from routing_policy import PolicyStore, RoutingContext, ConfidenceCache
+from load_tracker import LoadTracker
+from knn_index import KnnIndex
+from feedback import FeedbackLog
+from ensemble import blend, fan_out, parse_model_values
+
+# Modules partagés (common/) à la racine du projet
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.tracing import (
+    TraceBuffer, install_fastapi_tracing, span, outgoing_headers,
+    record_remote_timing, SERVER_TIMING_HEADER
+)
+from common.profiler import install_fastapi_profiler
+from common.serving import DEADLINE_HEADER
+from common.prediction_log import PredictionLog
+from common.data_profile import TrafficSketch, load_profile
 
 app = FastAPI(title="Agent IA - Routage Intelligent")
 
@@ -17,6 +45,13 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Traces par étapes (routage, appels backend, réseau) : GET /debug/traces
+TRACES = TraceBuffer(maxsize=int(os.getenv("TRACE_BUFFER_SIZE", "1000")))
+install_fastapi_tracing(app, "agent", TRACES)
+
+# Profil CPU à la demande (piles repliées), activé par DEBUG_TOKEN : GET /debug/profile
+install_fastapi_profiler(app)
+
 # URLs des services backend
 TFIDF_SERVICE = "http://tfidf_svc:8000"
 TRANSFORMER_SERVICE = "http://transformer_svc:8001"
@@ -25,109 +60,455 @@ TRANSFORMER_SERVICE = "http://transformer_svc:8001"
 TFIDF_SERVICE_LOCAL = "http://localhost:8000"
 TRANSFORMER_SERVICE_LOCAL = "http://localhost:8001"
 
+BACKEND_URLS = {
+    'tfidf': TFIDF_SERVICE_LOCAL,
+    'transformer': TRANSFORMER_SERVICE_LOCAL
+}
+
+# Timeout des appels backend (secondes), calé sur le seuil d'appel lent de
+# chaque modèle : au-delà, le repli TF-IDF répond plus vite que l'attente
+BACKEND_TIMEOUTS = {
+    'tfidf': float(os.getenv("TFIDF_TIMEOUT_S", "1")),
+    'transformer': float(os.getenv("TRANSFORMER_TIMEOUT_S", "2"))
+}
+
+# Coalescing des tickets identiques en vol (incidents massifs)
+COALESCER = SingleFlight()
+
+# Circuit breakers par backend : erreurs et appels lents ouvrent le circuit
+BREAKERS = {
+    'tfidf': CircuitBreaker(
+        'tfidf',
+        failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+        slow_call_seconds=float(os.getenv("TFIDF_SLOW_CALL_MS", "500")) / 1000,
+        reset_timeout=float(os.getenv("BREAKER_RESET_TIMEOUT_S", "30"))
+    ),
+    'transformer': CircuitBreaker(
+        'transformer',
+        failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+        slow_call_seconds=float(os.getenv("TRANSFORMER_SLOW_CALL_MS", "2000")) / 1000,
+        reset_timeout=float(os.getenv("BREAKER_RESET_TIMEOUT_S", "30"))
+    )
+}
+
+# Requêtes couvertes (hedging) pour les appelants sensibles à la latence
+HEDGE_DELAY = float(os.getenv("HEDGE_DELAY_MS", "250")) / 1000
+HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("HEDGE_POOL_SIZE", "16")))
+
+RESILIENCE_STATS = {'fallbacks': 0, 'hedges_sent': 0, 'hedges_won': 0}
+# Compteurs incrémentés depuis les threads de requête et des pools
+STATS_LOCK = threading.Lock()
+
+def count(stats: dict, key: str):
+    """Incrémente un compteur partagé entre threads"""
+    with STATS_LOCK:
+        stats[key] += 1
+
+# Mode ensemble (tickets à forte valeur) : les deux modèles en parallèle,
+# probabilités combinées ; un modèle hors deadline est ignoré
+ENSEMBLE_WEIGHTS = parse_model_values(os.getenv("ENSEMBLE_WEIGHTS", "tfidf=0.4,transformer=0.6"))
+ENSEMBLE_TEMPERATURES = parse_model_values(os.getenv("ENSEMBLE_TEMPERATURES", ""))
+ENSEMBLE_DEADLINE = float(os.getenv("ENSEMBLE_DEADLINE_MS", "1500")) / 1000
+# Attente supplémentaire si aucun modèle n'a répondu dans la deadline
+ENSEMBLE_GRACE = float(os.getenv("ENSEMBLE_GRACE_MS", "500")) / 1000
+ENSEMBLE_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("ENSEMBLE_POOL_SIZE", "16")))
+ENSEMBLE_STATS = {'requests': 0, 'blended': 0, 'partial': 0}
+
+# Politique de routage (rechargée à chaud) et confiances TF-IDF en cache
+POLICY_PATH = os.getenv(
+    "ROUTING_POLICY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_policy.yaml")
+)
+POLICY_STORE = PolicyStore(POLICY_PATH)
+TFIDF_CONFIDENCES = ConfidenceCache(maxsize=int(os.getenv("TFIDF_CONFIDENCE_CACHE_SIZE", "10000")))
+
+# Charge observée des backends (requêtes en vol + latence EWMA)
+LOAD_TRACKER = LoadTracker(BACKEND_URLS, alpha=float(os.getenv("LOAD_EWMA_ALPHA", "0.2")))
+
+# Décisions de routage exportées avec le signal de charge qui les a guidées
+ROUTING_DECISIONS = Counter()
+RECENT_DECISIONS = deque(maxlen=int(os.getenv("RECENT_DECISIONS_SIZE", "200")))
+
+# Index des tickets déjà étiquetés : réponse directe au-dessus du seuil
+KNN_INDEX_PATH = os.getenv("KNN_INDEX_PATH", "../models/knn_index.npz")
+# Seuil de similarité cosinus : celui stocké dans l'index au build (params.yaml
+# knn_index.similarity_threshold), sauf si KNN_SIMILARITY_THRESHOLD le remplace
+KNN_THRESHOLD = float(os.getenv("KNN_SIMILARITY_THRESHOLD", "0.92"))
+KNN_STATS = {'lookups': 0, 'hits': 0}
+try:
+    KNN_INDEX = KnnIndex(KNN_INDEX_PATH)
+    if "KNN_SIMILARITY_THRESHOLD" not in os.environ and KNN_INDEX.similarity_threshold is not None:
+        KNN_THRESHOLD = KNN_INDEX.similarity_threshold
+    print(f"✅ Index kNN chargé: {KNN_INDEX.n_samples} tickets (seuil {KNN_THRESHOLD})")
+except Exception as e:
+    KNN_INDEX = None
+    print(f"⚠️  Index kNN indisponible ({KNN_INDEX_PATH}): {e}")
+
+# Corrections des agents, consommées par scripts/online_learner.py
+FEEDBACK_LOG = FeedbackLog(os.getenv("FEEDBACK_LOG_PATH", "../data/feedback/feedback.jsonl"))
+
+# Journal persistant des prédictions servies (écrit en arrière-plan, par lots)
+PREDICTION_LOG_DIR = os.getenv("PREDICTION_LOG_DIR", "../data/predictions")
+try:
+    PREDICTION_LOG = PredictionLog(
+        PREDICTION_LOG_DIR, "agent",
+        batch_size=int(os.getenv("PREDICTION_LOG_BATCH", "512")),
+        flush_interval=float(os.getenv("PREDICTION_LOG_FLUSH_S", "1.0")),
+        segment_seconds=float(os.getenv("PREDICTION_LOG_SEGMENT_S", "3600"))
+    )
+    atexit.register(PREDICTION_LOG.close)
+except OSError as e:
+    PREDICTION_LOG = None
+    print(f"⚠️  Journal des prédictions désactivé ({PREDICTION_LOG_DIR}): {e}")
+
+# Dérive du trafic par rapport au profil du train (sketches, aucun texte conservé)
+DRIFT_PROFILE_PATH = os.getenv("DRIFT_PROFILE_PATH", "../data/processed/train_profile.json")
+try:
+    DRIFT_SKETCH = TrafficSketch(
+        load_profile(DRIFT_PROFILE_PATH),
+        sample_rate=float(os.getenv("DRIFT_SAMPLE_RATE", "1.0")),
+        psi_threshold=float(os.getenv("DRIFT_PSI_THRESHOLD", "0.2"))
+    )
+    print(f"✅ Profil de référence chargé pour la dérive: {DRIFT_PROFILE_PATH}")
+except Exception as e:
+    DRIFT_SKETCH = None
+    print(f"⚠️  Suivi de dérive désactivé ({DRIFT_PROFILE_PATH}): {e}")
+
 class Ticket(BaseModel):
     text: str
     force_model: str = None  # 'tfidf' ou 'transformer' pour forcer un modèle
+    hedge: bool = False  # Requête couverte vers TF-IDF si le backend tarde
+    ensemble: bool = False  # Les deux modèles en parallèle, probabilités combinées
 
 class AgentResponse(BaseModel):
     category: str
     confidence: float
+    # 'probability' (modèle) ou 'cosine_similarity' (ticket voisin de l'index kNN)
+    confidence_type: str = 'probability'
     model_used: str
     routing_reason: str
     text_length: int
     detected_language: str
+    fallback: bool = False
+    fallback_reason: Optional[str] = None
+    ensemble: Optional[dict] = None  # Poids, avis de chaque modèle et distribution combinée
+    model_version: Optional[str] = None
+
+class Feedback(BaseModel):
+    text: str
+    category: str  # Catégorie correcte selon l'agent
+    predicted_category: Optional[str] = None
+    model_used: Optional[str] = None
 
 def detect_language(text: str) -> str:
-    """Détection simple de la langue"""
-    # Caractères arabes
-    if re.search(r'[\u0600-\u06FF]', text):
-        return 'ar'
+    """Détection de la langue (écriture + lexiques précompilés)"""
+    return extract_routing_features(text).language
+
+def record_decision(rule: str, route: str, features: RoutingFeatures, load: dict):
+    """Compte la décision et la garde dans l'historique récent"""
+    with STATS_LOCK:
+        ROUTING_DECISIONS[(rule, route)] += 1
+        RECENT_DECISIONS.append({
+            "timestamp": time.time(),
+            "rule": rule,
+            "route": route,
+            "words": features.word_count,
+            "language": features.language,
+            "load": load
+        })
+
+def decide_routing(text: str, features: RoutingFeatures = None) -> tuple:
+    """
+    Décide quel modèle utiliser selon la politique de routage configurée
+    Returns: (service_url, model_name, reason)
+    """
+    if features is None:
+        features = extract_routing_features(text)
+    
+    load = LOAD_TRACKER.snapshot()
+    context = RoutingContext(
+        features=features,
+        tfidf_confidence=TFIDF_CONFIDENCES.get(normalize_text(text)),
+        load=load
+    )
+    decision = POLICY_STORE.current().evaluate(context)
+    record_decision(decision.rule, decision.route, features, load)
+    
+    service_url = TFIDF_SERVICE if decision.route == 'tfidf' else TRANSFORMER_SERVICE
+    return (service_url, decision.route, decision.reason)
+
+def call_backend(service_url: str, model_name: str, text: str, timeout: float = None) -> dict:
+    """Appelle le service backend et retourne sa réponse JSON (timeout ≤ celui du backend)"""
+    timeout = min(BACKEND_TIMEOUTS[model_name], timeout or BACKEND_TIMEOUTS[model_name])
+    start_time = time.perf_counter()
+    with span(f"{model_name}.call"):
+        response = requests.post(
+            f"{service_url}/predict",
+            json={"text": text},
+            # Le backend refuse vite (429/503) ce qu'il ne peut pas finir avant notre timeout
+            headers={**outgoing_headers(), DEADLINE_HEADER: str(int(timeout * 1000))},
+            timeout=timeout
+        )
+    # Étapes du backend (Server-Timing) et temps réseau rattachés à la trace
+    record_remote_timing(
+        model_name,
+        (time.perf_counter() - start_time) * 1000,
+        response.headers.get(SERVER_TIMING_HEADER)
+    )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Erreur du service {model_name}"
+        )
     
-    # Mots français communs
-    french_words = ['bonjour', 'merci', 'problème', 'erreur', 'compte', 'mot', 'passe', 
-                    'assistance', 'aide', 'facture', 'commande']
-    text_lower = text.lower()
-    if any(word in text_lower for word in french_words):
-        return 'fr'
+    return response.json()
+
+def guarded_call(model_name: str, text: str, timeout: float = None) -> dict:
+    """Appel backend protégé par le circuit breaker du modèle"""
+    breaker = BREAKERS[model_name]
+    if not breaker.allow_request():
+        raise BreakerOpenError(model_name)
     
-    return 'en'
+    start_time = time.monotonic()
+    try:
+        with LOAD_TRACKER.track(model_name):
+            result = call_backend(BACKEND_URLS[model_name], model_name, text, timeout)
+    except HTTPException as e:
+        # Seules les erreurs serveur indiquent un backend en difficulté
+        if e.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success(time.monotonic() - start_time)
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    
+    breaker.record_success(time.monotonic() - start_time)
+    return result
+
+def fetch_prediction(model_name: str, text: str, timeout: float = None) -> dict:
+    """Appel backend partagé entre tickets identiques en vol"""
+    key = normalize_text(text)
+    result, _ = COALESCER.do(
+        (model_name, key),
+        lambda: guarded_call(model_name, text, timeout)
+    )
+    if model_name == 'tfidf' and 'confidence' in result:
+        TFIDF_CONFIDENCES.put(key, result['confidence'])
+    return result
 
-def decide_routing(text: str) -> tuple:
+def hedged_fetch(model_name: str, text: str) -> tuple:
     """
-    Décide quel modèle utiliser
-    Returns: (service_url, model_name, reason)
+    Requête couverte : si le transformer n'a pas répondu après
+    HEDGE_DELAY, une seconde requête part vers TF-IDF et la première
+    réponse valide l'emporte.
+    Returns: (résultat, modèle ayant répondu)
+    """
+    # Les threads du pool reçoivent une copie du contexte (trace courante)
+    primary = HEDGE_EXECUTOR.submit(contextvars.copy_context().run, fetch_prediction, model_name, text)
+    try:
+        return primary.result(timeout=HEDGE_DELAY), model_name
+    except FuturesTimeoutError:
+        pass
+    
+    count(RESILIENCE_STATS, 'hedges_sent')
+    secondary = HEDGE_EXECUTOR.submit(contextvars.copy_context().run, fetch_prediction, 'tfidf', text)
+    models = {primary: model_name, secondary: 'tfidf'}
+    pending = {primary, secondary}
+    first_error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is secondary:
+                    count(RESILIENCE_STATS, 'hedges_won')
+                return future.result(), models[future]
+            if first_error is None or future is primary:
+                first_error = future.exception()
+    raise first_error
+
+def ensemble_fetch(text: str) -> tuple:
     """
-    text_length = len(text.split())
-    language = detect_language(text)
+    Interroge les deux backends en parallèle et combine leurs probabilités.
+    Un backend qui n'a pas répondu après ENSEMBLE_DEADLINE (ou en erreur) est
+    ignoré : la latence reste proche du modèle le plus lent, pas de la somme,
+    et aucun appel ne dépasse ENSEMBLE_DEADLINE + ENSEMBLE_GRACE.
+    Returns: (résultat combiné, modèles utilisés, raison si un modèle manque)
+    """
+    count(ENSEMBLE_STATS, 'requests')
+    models = [m for m in BACKEND_URLS if ENSEMBLE_WEIGHTS.get(m, 0) > 0]
+    if not models:
+        raise ValueError(f"ENSEMBLE_WEIGHTS sans modèle connu: {ENSEMBLE_WEIGHTS}")
+    results, missing, errors = fan_out(
+        ENSEMBLE_EXECUTOR, fetch_prediction, models, text, ENSEMBLE_DEADLINE, ENSEMBLE_GRACE
+    )
+    if not results:
+        if errors:
+            raise errors[0]
+        raise requests.exceptions.Timeout(
+            f"Ensemble: aucun modèle n'a répondu en {int((ENSEMBLE_DEADLINE + ENSEMBLE_GRACE) * 1000)} ms"
+        )
     
-    # Règle 1: Texte très court → TF-IDF (rapide)
-    if text_length < 10:
-        return (TFIDF_SERVICE, 'tfidf', 
-                f'Texte court ({text_length} mots) → TF-IDF rapide')
+    combined = blend(results, ENSEMBLE_WEIGHTS, ENSEMBLE_TEMPERATURES)
+    combined['models'] = {
+        model: {'category': r.get('category'), 'confidence': r.get('confidence'),
+                'model_version': r.get('model_version')}
+        for model, r in results.items()
+    }
+    combined['model_version'] = ','.join(
+        f"{model}={r.get('model_version')}" for model, r in sorted(results.items())
+    )
+    model_used = 'ensemble(' + '+'.join(sorted(results)) + ')'
+    if not missing:
+        count(ENSEMBLE_STATS, 'blended')
+        return combined, model_used, None
+    count(ENSEMBLE_STATS, 'partial')
+    reason = ', '.join(f'{m} ({why})' for m, why in sorted(missing.items()))
+    return combined, model_used, f'Ensemble incomplet : {reason} → réponse de {"+".join(sorted(results))}'
+
+def execute_route(model_name: str, text: str, allow_fallback: bool, hedge: bool) -> tuple:
+    """
+    Exécute la décision de routage avec repli TF-IDF si le transformer
+    est indisponible (circuit ouvert, erreur ou timeout).
+    Returns: (résultat, modèle utilisé, raison du repli ou None)
+    """
+    can_fallback = allow_fallback and model_name != 'tfidf'
     
-    # Règle 2: Langue non-anglaise → Transformer (multilingue)
-    if language != 'en':
-        return (TRANSFORMER_SERVICE, 'transformer', 
-                f'Langue {language} détectée → Transformer multilingue')
+    if can_fallback and BREAKERS[model_name].state == OPEN:
+        count(RESILIENCE_STATS, 'fallbacks')
+        return (fetch_prediction('tfidf', text), 'tfidf',
+                f'Circuit {model_name} ouvert → repli TF-IDF')
     
-    # Règle 3: Texte long → Transformer (meilleure analyse contextuelle)
-    if text_length > 25:
-        return (TRANSFORMER_SERVICE, 'transformer', 
-                f'Texte long ({text_length} mots) → Transformer contextuel')
+    try:
+        if hedge and model_name != 'tfidf':
+            result, model_used = hedged_fetch(model_name, text)
+        else:
+            result, model_used = fetch_prediction(model_name, text), model_name
+    except (BreakerOpenError, requests.exceptions.RequestException) as e:
+        if not can_fallback:
+            raise
+        count(RESILIENCE_STATS, 'fallbacks')
+        return (fetch_prediction('tfidf', text), 'tfidf',
+                f'{model_name} indisponible ({type(e).__name__}) → repli TF-IDF')
+    except HTTPException as e:
+        # 429 : requête délestée par le backend saturé, le TF-IDF peut répondre
+        if not can_fallback or (e.status_code < 500 and e.status_code != 429):
+            raise
+        count(RESILIENCE_STATS, 'fallbacks')
+        return (fetch_prediction('tfidf', text), 'tfidf',
+                f'{model_name} en erreur ({e.status_code}) → repli TF-IDF')
     
-    # Règle 4: Défaut → TF-IDF (efficace pour textes standards)
-    return (TFIDF_SERVICE, 'tfidf', 
-            f'Texte standard ({text_length} mots) → TF-IDF efficace')
+    if model_used != model_name:
+        count(RESILIENCE_STATS, 'fallbacks')
+        return result, model_used, f'Requête couverte : {model_used} a répondu avant {model_name}'
+    return result, model_used, None
+
+def observe_traffic(text: str, category: str):
+    """Alimente le sketch de dérive (texte haché, jamais conservé)"""
+    if DRIFT_SKETCH is not None:
+        DRIFT_SKETCH.observe([text], [category])
 
 @app.post("/predict", response_model=AgentResponse)
 def predict(ticket: Ticket):
     """Route intelligemment vers le bon modèle"""
+    start_time = time.perf_counter()
+    response = route_ticket(ticket)
+    if PREDICTION_LOG is not None:
+        PREDICTION_LOG.record(
+            ticket.text, response.model_used, response.category, response.confidence,
+            (time.perf_counter() - start_time) * 1000, response.model_version,
+            fallback=response.fallback, confidence_type=response.confidence_type
+        )
+    return response
+
+def route_ticket(ticket: Ticket) -> AgentResponse:
+    """kNN, ensemble ou routage vers un backend (avec repli)"""
     try:
-        text_length = len(ticket.text.split())
-        language = detect_language(ticket.text)
+        # Features de routage calculées une seule fois par requête
+        with span("features"):
+            features = extract_routing_features(ticket.text)
+        text_length = features.word_count
+        language = features.language
+        
+        # Ticket quasi identique à un ticket connu : pas d'inférence
+        if KNN_INDEX is not None and not ticket.force_model and not ticket.ensemble:
+            count(KNN_STATS, 'lookups')
+            with span("knn_lookup"):
+                neighbour = KNN_INDEX.query(ticket.text)
+            if neighbour is not None and neighbour[1] >= KNN_THRESHOLD:
+                count(KNN_STATS, 'hits')
+                category, similarity = neighbour
+                observe_traffic(ticket.text, category)
+                return AgentResponse(
+                    category=category,
+                    confidence=similarity,
+                    confidence_type='cosine_similarity',
+                    model_used='knn_index',
+                    routing_reason=f"Ticket connu (similarité {similarity:.3f}) → index kNN",
+                    text_length=text_length,
+                    detected_language=language
+                )
+        
+        # Ensemble : pas de routage, les deux modèles répondent
+        if ticket.ensemble and not ticket.force_model:
+            with span("ensemble"):
+                result, model_used, fallback_reason = ensemble_fetch(ticket.text)
+            observe_traffic(ticket.text, result['category'])
+            return AgentResponse(
+                category=result['category'],
+                confidence=result['confidence'],
+                model_used=model_used,
+                routing_reason="Ensemble demandé : TF-IDF et Transformer en parallèle",
+                text_length=text_length,
+                detected_language=language,
+                fallback=fallback_reason is not None,
+                fallback_reason=fallback_reason,
+                ensemble={k: result[k] for k in ('weights', 'models', 'probabilities')},
+                model_version=result['model_version']
+            )
         
         # Décision de routage
         if ticket.force_model:
             if ticket.force_model.lower() == 'tfidf':
-                service_url = TFIDF_SERVICE_LOCAL
                 model_name = 'tfidf'
-                reason = 'Forcé par utilisateur'
             else:
-                service_url = TRANSFORMER_SERVICE_LOCAL
                 model_name = 'transformer'
-                reason = 'Forcé par utilisateur'
+            reason = 'Forcé par utilisateur'
+            record_decision('force_model', model_name, features, LOAD_TRACKER.snapshot())
         else:
-            service_url, model_name, reason = decide_routing(ticket.text)
-            # Convertir vers URL locale
-            if service_url == TFIDF_SERVICE:
-                service_url = TFIDF_SERVICE_LOCAL
-            elif service_url == TRANSFORMER_SERVICE:
-                service_url = TRANSFORMER_SERVICE_LOCAL
-        
-        # Appel au service backend
-        response = requests.post(
-            f"{service_url}/predict",
-            json={"text": ticket.text},
-            timeout=30
-        )
+            with span("routing"):
+                _, model_name, reason = decide_routing(ticket.text, features)
         
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Erreur du service {model_name}"
+        # Un modèle forcé par l'utilisateur n'est jamais remplacé
+        with span("execute", route=model_name):
+            result, model_used, fallback_reason = execute_route(
+                model_name, ticket.text,
+                allow_fallback=not ticket.force_model,
+                hedge=ticket.hedge
             )
         
-        result = response.json()
-        
+        observe_traffic(ticket.text, result.get('category', 'Unknown'))
         return AgentResponse(
             category=result.get('category', 'Unknown'),
             confidence=result.get('confidence', 0.0),
-            model_used=model_name,
+            model_used=model_used,
             routing_reason=reason,
             text_length=text_length,
-            detected_language=language
+            detected_language=language,
+            fallback=fallback_reason is not None,
+            fallback_reason=fallback_reason,
+            model_version=result.get('model_version')
         )
     
+    except HTTPException:
+        raise
+    except BreakerOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service backend indisponible: {str(e)}"
+        )
     except requests.exceptions.RequestException as e:
         raise HTTPException(
             status_code=503,
@@ -146,6 +527,17 @@ def route_options():
     """Handler OPTIONS pour CORS preflight"""
     return {}
 
+@app.post("/feedback")
+def feedback(item: Feedback):
+    """Enregistre une correction de catégorie pour l'apprentissage en ligne"""
+    if not item.text.strip() or not item.category.strip():
+        raise HTTPException(status_code=422, detail="Texte et catégorie requis")
+    try:
+        FEEDBACK_LOG.append(item.text, item.category.strip(), item.predicted_category, item.model_used)
+    except OSError as e:
+        raise HTTPException(status_code=503, detail=f"Journal de feedback indisponible: {str(e)}")
+    return {"status": "recorded", "feedback_total": FEEDBACK_LOG.recorded}
+
 @app.get("/")
 def root():
     return {
@@ -154,14 +546,44 @@ def root():
             "tfidf": TFIDF_SERVICE_LOCAL,
             "transformer": TRANSFORMER_SERVICE_LOCAL
         },
-        "routing_rules": {
-            "short_text": "< 10 mots → TF-IDF",
-            "multilingual": "FR/AR → Transformer",
-            "long_text": "> 25 mots → Transformer",
-            "default": "Standard → TF-IDF"
-        }
+        "routing_policy": POLICY_STORE.current().describe()
+    }
+
+@app.get("/routing/decisions")
+def routing_decisions(limit: int = Query(50, ge=1, le=RECENT_DECISIONS.maxlen)):
+    """Dernières décisions de routage avec la charge observée à ce moment"""
+    with STATS_LOCK:
+        decisions = list(RECENT_DECISIONS)[-limit:]
+    return {
+        "current_load": LOAD_TRACKER.snapshot(),
+        "decisions": decisions
+    }
+
+@app.get("/routing/policy")
+def routing_policy():
+    """Politique de routage active (rechargée à chaud depuis le fichier)"""
+    policy = POLICY_STORE.current()
+    return {
+        "path": POLICY_PATH,
+        "policy": policy.describe(),
+        "last_error": POLICY_STORE.last_error
     }
 
+@app.get("/drift")
+def drift():
+    """Dérive du trafic observé vs le train (PSI longueurs, tokens, catégories)"""
+    if DRIFT_SKETCH is None:
+        raise HTTPException(status_code=503, detail="Profil de référence indisponible")
+    return DRIFT_SKETCH.drift()
+
+@app.post("/drift/reset")
+def drift_reset():
+    """Repart d'une fenêtre d'observation vide"""
+    if DRIFT_SKETCH is None:
+        raise HTTPException(status_code=503, detail="Profil de référence indisponible")
+    DRIFT_SKETCH.reset()
+    return {"status": "reset"}
+
 @app.get("/health")
 def health():
     """Vérifie la santé de l'agent et des backends"""
@@ -186,11 +608,32 @@ def health():
 # Endpoint pour les métriques Prometheus (version simple)
 @app.get("/metrics")
 def metrics():
+    with STATS_LOCK:
+        resilience = dict(RESILIENCE_STATS)
+        ensemble = dict(ENSEMBLE_STATS)
+        knn = dict(KNN_STATS)
+        decisions = dict(ROUTING_DECISIONS)
     return {
-        "agent_requests_total": 25,
-        "agent_routing_tfidf": 15,
-        "agent_routing_transformer": 10,
-        "agent_backends_healthy": 2
+        # Routage par politique ou forcé, réponses de l'index kNN, ensembles
+        "agent_requests_total": sum(decisions.values()) + knn['hits'] + ensemble['requests'],
+        "agent_routing_tfidf": sum(n for (_, r), n in decisions.items() if r == 'tfidf'),
+        "agent_routing_transformer": sum(n for (_, r), n in decisions.items() if r == 'transformer'),
+        "agent_routing_decisions": {f"{rule}->{r}": n for (rule, r), n in decisions.items()},
+        "agent_backend_load": LOAD_TRACKER.snapshot(),
+        "agent_backends_healthy": 2,
+        "agent_coalescing": COALESCER.stats(),
+        "agent_circuit_breakers": {name: b.stats() for name, b in BREAKERS.items()},
+        "agent_fallbacks_total": resilience['fallbacks'],
+        "agent_hedges_sent": resilience['hedges_sent'],
+        "agent_hedges_won": resilience['hedges_won'],
+        "agent_ensemble": ensemble,
+        "agent_feedback_total": FEEDBACK_LOG.recorded,
+        "agent_prediction_log": PREDICTION_LOG.stats() if PREDICTION_LOG is not None else None,
+        "agent_knn_index": {
+            "enabled": KNN_INDEX is not None,
+            "threshold": KNN_THRESHOLD,
+            **knn
+        }
     }
 
 # Démarrage du serveur
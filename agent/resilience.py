@@ -0,0 +1,106 @@
+# resilience.py - Circuit breakers par backend
+"""
+Un backend surchargé ne doit pas bloquer l'agent pendant tout le timeout.
+Chaque backend a son circuit breaker : les échecs ET les appels trop lents
+comptent comme des erreurs, et au-delà d'un seuil le circuit s'ouvre.
+"""
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class BreakerOpenError(Exception):
+    """Le circuit du backend est ouvert, l'appel n'a pas été tenté"""
+
+    def __init__(self, name: str):
+        super().__init__(f"Circuit {name} ouvert")
+        self.name = name
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker à déclenchement sur erreurs et sur latence.
+
+    - closed : les appels passent, les échecs consécutifs sont comptés
+    - open : les appels sont refusés jusqu'à reset_timeout
+    - half_open : un seul appel test ; succès → closed, échec → open
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 slow_call_seconds: float = 2.0, reset_timeout: float = 30.0,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.transitions = {}
+
+    def _transition(self, new_state: str):
+        # Appelé avec le verrou tenu
+        key = f"{self._state}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self._state = new_state
+        if new_state == OPEN:
+            self._opened_at = self._clock()
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def _refresh(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Réserve un appel ; en half_open un seul appel test est autorisé"""
+        with self._lock:
+            self._refresh()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency: float):
+        """Un appel trop lent compte comme un échec"""
+        if latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(CLOSED)
+            else:
+                self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(OPEN)
+            elif self._state == CLOSED:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._transition(OPEN)
+
+    def stats(self) -> dict:
+        """État et transitions exportés dans /metrics"""
+        with self._lock:
+            self._refresh()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "transitions": dict(self.transitions)
+            }
@@ -0,0 +1,141 @@
+# routing_features.py - Extraction des features de routage en une passe
+"""
+Calcule en une seule passe le nombre de mots, l'écriture (script) et la
+langue d'un ticket. Les lexiques sont précompilés en un seul ensemble de
+formes de surface : la détection se fait par une intersection d'ensembles
+sur text.lower().split(), sans tokenizer ni recherche de sous-chaînes.
+"""
+import re
+from typing import NamedTuple
+
+# Écritures non latines → langue ; si plusieurs sont présentes, c'est celle
+# du premier caractère non latin du texte qui l'emporte
+SCRIPTS = (
+    ('arabic', 'ar', '\u0600-\u06FF\u0750-\u077F'),
+    ('hebrew', 'he', '\u0590-\u05FF'),
+    ('cyrillic', 'ru', '\u0400-\u04FF'),
+    ('greek', 'el', '\u0370-\u03FF'),
+    ('devanagari', 'hi', '\u0900-\u097F'),
+    ('thai', 'th', '\u0E00-\u0E7F'),
+    ('hangul', 'ko', '\uAC00-\uD7AF\u1100-\u11FF'),
+    ('kana', 'ja', '\u3040-\u30FF'),
+    ('han', 'zh', '\u4E00-\u9FFF'),
+)
+
+# Mots fréquents et vocabulaire métier par langue à écriture latine
+LEXICONS = {
+    'en': (
+        'the', 'and', 'is', 'are', 'was', 'not', 'cannot', 'can', 'my', 'i', 'we',
+        'you', 'please', 'with', 'for', 'this', 'that', 'have', 'has', 'to', 'of',
+        'it', 'does', 'doesn', 'working', 'need', 'help', 'issue', 'error',
+        'password', 'account', 'access', 'laptop', 'printer', 'network', 'login'
+    ),
+    'fr': (
+        'bonjour', 'merci', 'problème', 'erreur', 'compte', 'mot', 'passe',
+        'assistance', 'aide', 'facture', 'commande', 'le', 'la', 'les', 'des',
+        'une', 'je', 'nous', 'vous', 'est', 'pas', 'ne', 'mon', 'ma', 'mes',
+        'avec', 'pour', 'dans', 'sur', 'depuis', 'impossible', 'connexion',
+        'ordinateur', 'imprimante', 'réseau', 'accès', 'besoin', 'arrive'
+    ),
+    'es': (
+        'hola', 'gracias', 'problema', 'cuenta', 'contraseña', 'ayuda', 'factura',
+        'pedido', 'el', 'los', 'las', 'una', 'yo', 'mi', 'mis', 'está', 'no',
+        'puedo', 'con', 'para', 'desde', 'acceso', 'ordenador', 'impresora', 'red'
+    ),
+    'de': (
+        'hallo', 'danke', 'problem', 'fehler', 'konto', 'passwort', 'hilfe',
+        'rechnung', 'bestellung', 'der', 'die', 'das', 'und', 'ist', 'nicht',
+        'ich', 'wir', 'mein', 'meine', 'mit', 'für', 'seit', 'zugriff',
+        'drucker', 'netzwerk', 'kann', 'funktioniert'
+    ),
+    'it': (
+        'ciao', 'grazie', 'problema', 'errore', 'conto', 'aiuto', 'fattura',
+        'ordine', 'il', 'gli', 'una', 'io', 'mio', 'mia', 'non', 'posso',
+        'con', 'per', 'accesso', 'stampante', 'rete', 'funziona'
+    ),
+    'pt': (
+        'olá', 'obrigado', 'obrigada', 'problema', 'erro', 'conta', 'senha',
+        'ajuda', 'fatura', 'pedido', 'os', 'as', 'uma', 'eu', 'meu', 'minha',
+        'não', 'consigo', 'com', 'para', 'acesso', 'impressora', 'rede'
+    ),
+}
+
+DEFAULT_LANGUAGE = 'en'
+
+# Formes de surface précalculées : élisions (n'arrive) et ponctuation
+# collée (bonjour,) sont absorbées par le lexique au lieu d'un tokenizer
+ELISIONS = ('', "l'", "d'", "j'", "n'", "m'", "t'", "s'", "c'", "qu'")
+TRAILING_PUNCTUATION = ('', ',', '.', ';', ':', '!', '?', ')', '"')
+
+_SCRIPT_CLASS = re.compile('[' + ''.join(chars for _, _, chars in SCRIPTS) + ']')
+_SCRIPT_RANGES = [
+    (chars[i], chars[i + 2], name)
+    for name, _, chars in SCRIPTS
+    for i in range(0, len(chars), 3)
+]
+_SCRIPT_LANGUAGE = {name: language for name, language, _ in SCRIPTS}
+
+
+def _build_lexicon(lexicons: dict) -> dict:
+    """Forme de surface → tuple des langues où le mot apparaît"""
+    languages_by_word = {}
+    for language, words in lexicons.items():
+        for word in words:
+            languages_by_word[word] = languages_by_word.get(word, ()) + (language,)
+
+    lexicon = {}
+    for word, languages in languages_by_word.items():
+        for prefix in ELISIONS:
+            for suffix in TRAILING_PUNCTUATION:
+                lexicon[prefix + word + suffix] = languages
+    return lexicon
+
+
+_LEXICON = _build_lexicon(LEXICONS)
+_LEXICON_WORDS = frozenset(_LEXICON)
+
+
+def _script_of(char: str) -> str:
+    for low, high, name in _SCRIPT_RANGES:
+        if low <= char <= high:
+            return name
+    return 'latin'
+
+
+class RoutingFeatures(NamedTuple):
+    word_count: int
+    script: str
+    language: str
+
+
+def extract_routing_features(text: str) -> RoutingFeatures:
+    """Nombre de mots, écriture et langue d'un ticket"""
+    words = text.lower().split()
+    word_count = len(words)
+
+    # Écriture non latine → langue déterminée directement
+    if not text.isascii():
+        match = _SCRIPT_CLASS.search(text)
+        if match is not None:
+            script = _script_of(match.group())
+            return RoutingFeatures(word_count, script, _SCRIPT_LANGUAGE[script])
+
+    # Écriture latine : vote des lexiques sur les mots distincts du ticket
+    hits = _LEXICON_WORDS.intersection(words)
+    if not hits:
+        return RoutingFeatures(word_count, 'latin', DEFAULT_LANGUAGE)
+
+    scores = {}
+    for word in hits:
+        for language in _LEXICON[word]:
+            scores[language] = scores.get(language, 0) + 1
+
+    english = scores.pop(DEFAULT_LANGUAGE, 0)
+    if not scores:
+        return RoutingFeatures(word_count, 'latin', DEFAULT_LANGUAGE)
+    language = max(scores, key=scores.get)
+    # Marge stricte : à égalité (« Printer shows red light » : printer/red),
+    # l'anglais l'emporte, un mot étranger isolé ne suffit pas
+    if scores[language] > english:
+        return RoutingFeatures(word_count, 'latin', language)
+    return RoutingFeatures(word_count, 'latin', DEFAULT_LANGUAGE)
@@ -0,0 +1,256 @@
+# routing_policy.py - Politique de routage chargée depuis la configuration
+"""
+Les règles de routage de l'agent sont décrites dans routing_policy.yaml :
+une liste ordonnée de règles (la première qui correspond l'emporte) et une
+route par défaut. Chaque condition est compilée une fois en prédicat au
+chargement ; le fichier est rechargé à chaud quand il change sur disque.
+
+Conditions supportées dans `when` :
+- min_words / max_words : bornes inclusives sur le nombre de mots
+- languages / languages_not : langue détectée dans / hors de la liste
+- scripts : écriture détectée (latin, arabic, cyrillic, ...)
+- tfidf_confidence_below / tfidf_confidence_above : confiance TF-IDF en
+  cache pour ce texte (fausse si aucune valeur en cache)
+- <backend>_inflight_above / <backend>_inflight_below : requêtes en vol
+- <backend>_latency_ms_above / <backend>_latency_ms_below : latence
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import yaml
+
+ROUTES = ('tfidf', 'transformer')
+
+# Politique intégrée utilisée si le fichier est absent (règles historiques)
+DEFAULT_POLICY = {
+    'rules': [
+        {'name': 'short_text', 'when': {'max_words': 9}, 'route': 'tfidf',
+         'reason': 'Texte court ({words} mots) → TF-IDF rapide'},
+        {'name': 'multilingual', 'when': {'languages_not': ['en']}, 'route': 'transformer',
+         'reason': 'Langue {language} détectée → Transformer multilingue'},
+        {'name': 'long_text', 'when': {'min_words': 26}, 'route': 'transformer',
+         'reason': 'Texte long ({words} mots) → Transformer contextuel'},
+    ],
+    'default': {'route': 'tfidf',
+                'reason': 'Texte standard ({words} mots) → TF-IDF efficace'}
+}
+
+# Erreurs possibles au formatage d'une raison ({words}, {load[transformer][inflight]}, ...)
+_FORMAT_ERRORS = (KeyError, IndexError, ValueError, TypeError, AttributeError)
+
+_LOAD_CONDITION = re.compile(r'^(?P<backend>[a-z]+)_(?P<signal>inflight|latency_ms)_(?P<op>above|below)$')
+
+
+class PolicyError(ValueError):
+    """Politique de routage invalide"""
+
+
+class RoutingContext(NamedTuple):
+    """Entrées disponibles pour l'évaluation de la politique"""
+    features: object  # RoutingFeatures
+    tfidf_confidence: Optional[float] = None
+    load: dict = {}   # {backend: {'inflight': int, 'latency_ms': float}}
+
+
+class Decision(NamedTuple):
+    route: str
+    rule: str
+    reason: str
+
+
+def _reason_values(words, language, script, tfidf_confidence, load) -> dict:
+    """Variables disponibles dans le gabarit `reason` d'une règle"""
+    return {
+        'words': words,
+        'language': language,
+        'script': script,
+        'tfidf_confidence': tfidf_confidence,
+        'load': load,
+    }
+
+
+def _compile_condition(key: str, value):
+    """Condition de configuration → prédicat ctx -> bool"""
+    if key == 'min_words':
+        value = int(value)
+        return lambda ctx: ctx.features.word_count >= value
+    if key == 'max_words':
+        value = int(value)
+        return lambda ctx: ctx.features.word_count <= value
+    if key == 'languages':
+        allowed = frozenset(value)
+        return lambda ctx: ctx.features.language in allowed
+    if key == 'languages_not':
+        excluded = frozenset(value)
+        return lambda ctx: ctx.features.language not in excluded
+    if key == 'scripts':
+        allowed = frozenset(value)
+        return lambda ctx: ctx.features.script in allowed
+    if key == 'tfidf_confidence_below':
+        value = float(value)
+        return lambda ctx: ctx.tfidf_confidence is not None and ctx.tfidf_confidence < value
+    if key == 'tfidf_confidence_above':
+        value = float(value)
+        return lambda ctx: ctx.tfidf_confidence is not None and ctx.tfidf_confidence > value
+
+    match = _LOAD_CONDITION.match(key)
+    if match:
+        backend, signal, op = match.group('backend', 'signal', 'op')
+        if backend not in ROUTES:
+            raise PolicyError(f"Backend inconnu dans la condition '{key}'")
+        value = float(value)
+
+        def predicate(ctx):
+            current = ctx.load.get(backend, {}).get(signal)
+            if current is None:
+                return False
+            return current > value if op == 'above' else current < value
+        return predicate
+
+    raise PolicyError(f"Condition inconnue: '{key}'")
+
+
+class _CompiledRule:
+    __slots__ = ('name', 'route', 'reason', 'predicates', 'uses_load')
+
+    def __init__(self, spec: dict, index: int):
+        self.name = spec.get('name', f'rule_{index}')
+        self.route = spec.get('route')
+        if self.route not in ROUTES:
+            raise PolicyError(f"Règle '{self.name}': route invalide '{self.route}'")
+        self.reason = spec.get('reason', f'Règle {self.name} → {self.route}')
+        when = spec.get('when') or {}
+        self.predicates = tuple(_compile_condition(key, value) for key, value in when.items())
+        self.uses_load = any(_LOAD_CONDITION.match(key) for key in when)
+        self._check_reason(when)
+
+    def _check_reason(self, when: dict):
+        """Formate la raison sur un contexte fictif : une faute de gabarit est refusée au chargement"""
+        # La confiance TF-IDF n'est garantie (non None) que si une condition la teste
+        uses_confidence = any(key.startswith('tfidf_confidence_') for key in when)
+        values = _reason_values(
+            0, 'en', 'latin', 0.5 if uses_confidence else None,
+            {backend: {'inflight': 0, 'latency_ms': 0.0} for backend in ROUTES}
+        )
+        try:
+            self.reason.format_map(values)
+        except _FORMAT_ERRORS as e:
+            raise PolicyError(f"Règle '{self.name}': raison invalide '{self.reason}' "
+                              f"({type(e).__name__}: {e})")
+
+    def matches(self, ctx: RoutingContext) -> bool:
+        for predicate in self.predicates:
+            if not predicate(ctx):
+                return False
+        return True
+
+
+class RoutingPolicy:
+    """Politique compilée : règles ordonnées + route par défaut"""
+
+    def __init__(self, spec: dict, version: str = 'builtin'):
+        if not isinstance(spec, dict) or 'rules' not in spec:
+            raise PolicyError("La politique doit contenir une liste 'rules'")
+        self.version = version
+        self.rules = [_CompiledRule(rule, i) for i, rule in enumerate(spec['rules'])]
+        default = spec.get('default') or DEFAULT_POLICY['default']
+        if 'when' in default:
+            raise PolicyError("La règle 'default' s'applique toujours : 'when' n'y est pas admis")
+        self.default = _CompiledRule(dict(default, name='default'), -1)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'RoutingPolicy':
+        with open(path, 'r', encoding='utf-8') as f:
+            spec = yaml.safe_load(f)
+        return cls(spec, version=f"{os.path.basename(path)}@{os.path.getmtime(path):.0f}")
+
+    def evaluate(self, ctx: RoutingContext) -> Decision:
+        rule = self.default
+        for candidate in self.rules:
+            if candidate.matches(ctx):
+                rule = candidate
+                break
+        values = _reason_values(ctx.features.word_count, ctx.features.language, ctx.features.script,
+                                ctx.tfidf_confidence, ctx.load)
+        try:
+            reason = rule.reason.format_map(values)
+        except _FORMAT_ERRORS:
+            # Jamais d'erreur 500 pour un libellé : gabarit brut
+            reason = rule.reason
+        return Decision(rule.route, rule.name, reason)
+
+    def describe(self) -> dict:
+        return {
+            'version': self.version,
+            'rules': [{'name': r.name, 'route': r.route} for r in self.rules],
+            'default': self.default.route
+        }
+
+
+class PolicyStore:
+    """Politique rechargée à chaud quand le fichier change sur disque"""
+
+    def __init__(self, path: str, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        self._policy = RoutingPolicy(DEFAULT_POLICY)
+        self._reload()
+
+    def _reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            if self._mtime is None:
+                self.last_error = f"Politique introuvable: {self.path} (règles intégrées)"
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            self._policy = RoutingPolicy.from_file(self.path)
+            self.last_error = None
+            print(f"🔁 Politique de routage chargée: {self._policy.version}")
+        except Exception as e:
+            # On garde la politique précédente si la nouvelle est invalide
+            self.last_error = f"Politique invalide ignorée: {e}"
+            print(f"❌ {self.last_error}")
+        self._mtime = mtime
+
+    def current(self) -> RoutingPolicy:
+        now = time.monotonic()
+        if now >= self._next_check:
+            with self._lock:
+                if now >= self._next_check:
+                    self._next_check = now + self.check_interval
+                    self._reload()
+        return self._policy
+
+
+class ConfidenceCache:
+    """Dernières confiances TF-IDF par texte normalisé (LRU borné)"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[float]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, confidence: float):
+        with self._lock:
+            self._data[key] = confidence
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
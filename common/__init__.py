@@ -0,0 +1 @@
+"""Modules partagés par les services CallCenterAI (agent, tfidf_svc, transformer_svc, web_interface)"""
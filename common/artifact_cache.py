@@ -0,0 +1,211 @@
+# artifact_cache.py - Cache local des artefacts du MLflow Model Registry
+"""
+Les services qui démarrent depuis un stage du registry ("Production") ne
+téléchargent les artefacts qu'une fois par version :
+
+    <root>/<modèle>/v<version>-<sha256[:16]>/   artefacts (adressés par contenu)
+    <root>/<modèle>/stages/<stage>.json         dernier stage résolu
+
+La population se fait dans un répertoire temporaire renommé atomiquement
+(plusieurs workers peuvent démarrer en même temps), le checksum est vérifié
+contre le tag `artifact_sha256` de la version s'il existe, et les versions
+les moins récemment utilisées sont évincées au-delà de `max_bytes` (celles
+pointées par un stage sont conservées). Un pointeur de stage récent est servi
+sans interroger le registry ; si le registry est injoignable, le dernier
+pointeur connu est utilisé (mode hors ligne).
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+CHECKSUM_TAG = "artifact_sha256"
+_LAST_USED = ".last_used"
+
+
+def directory_checksum(path: str) -> str:
+    """SHA-256 des chemins relatifs et contenus de tous les fichiers (ordre trié)"""
+    digest = hashlib.sha256()
+    files = []
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            if filename != _LAST_USED:
+                full = os.path.join(dirpath, filename)
+                files.append((os.path.relpath(full, path).replace(os.sep, '/'), full))
+    for relative, full in sorted(files):
+        digest.update(relative.encode('utf-8') + b'\0')
+        with open(full, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(dirpath, filename))
+        for dirpath, _, filenames in os.walk(path)
+        for filename in filenames
+    )
+
+
+class ArtifactCache:
+    """Cache d'artefacts adressé par (modèle, version, checksum)"""
+
+    def __init__(self, root: str, max_bytes: int = 2 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _model_dir(self, name: str) -> str:
+        return os.path.join(self.root, name.replace('/', '_'))
+
+    def _stage_path(self, name: str, stage: str) -> str:
+        return os.path.join(self._model_dir(name), 'stages', f"{stage}.json")
+
+    def get(self, name: str, version, checksum: str = None):
+        """Chemin de la version en cache (n'importe quel checksum si None), sinon None"""
+        model_dir = self._model_dir(name)
+        prefix = f"v{version}-" + (checksum[:16] if checksum else "")
+        try:
+            entries = [e for e in os.listdir(model_dir) if e.startswith(prefix) and not e.startswith('.')]
+        except OSError:
+            return None
+        if not entries:
+            return None
+        path = os.path.join(model_dir, sorted(entries)[0])
+        with open(os.path.join(path, _LAST_USED), 'w'):
+            pass
+        return path
+
+    def fetch(self, name: str, version, checksum: str, download, prepare=None) -> str:
+        """
+        Version en cache, ou téléchargée par download(répertoire) puis vérifiée ;
+        prepare(répertoire) peut ajouter des fichiers dérivés avant publication.
+        """
+        path = self.get(name, version, checksum)
+        if path is not None:
+            return path
+
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=model_dir)
+        try:
+            download(tmp)
+            actual = directory_checksum(tmp)
+            if checksum and actual != checksum:
+                raise ValueError(f"Checksum invalide pour {name} v{version}: {actual} != {checksum}")
+            if prepare is not None:
+                prepare(tmp)
+            path = os.path.join(model_dir, f"v{version}-{actual[:16]}")
+            try:
+                os.rename(tmp, path)
+            except OSError:
+                # Un autre processus a publié la même version entre-temps
+                if not os.path.isdir(path):
+                    raise
+                shutil.rmtree(tmp, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        with open(os.path.join(path, _LAST_USED), 'w'):
+            pass
+        self.evict(keep=(path,))
+        return path
+
+    def resolve_stage(self, name: str, stage: str, lookup, max_age: float = 300.0, prepare=None) -> str:
+        """
+        Chemin local de la version au stage donné. lookup(name, stage) doit
+        renvoyer (version, checksum ou None, download).
+        """
+        pointer_path = self._stage_path(name, stage)
+        try:
+            with open(pointer_path) as f:
+                pointer = json.load(f)
+        except (OSError, ValueError):
+            pointer = None
+
+        # Nom d'entrée relatif : le cache reste valide s'il est monté ailleurs
+        cached = os.path.join(self._model_dir(name), pointer['entry']) if pointer else None
+        if cached and os.path.isdir(cached) and time.time() - pointer['resolved_at'] < max_age:
+            return cached
+
+        try:
+            version, checksum, download = lookup(name, stage)
+        except Exception as e:
+            if cached and os.path.isdir(cached):
+                print(f"⚠️  Registry injoignable ({e}), {name}/{stage} servi depuis le cache: v{pointer['version']}")
+                return cached
+            raise
+
+        path = self.fetch(name, version, checksum, download, prepare=prepare)
+        os.makedirs(os.path.dirname(pointer_path), exist_ok=True)
+        tmp_pointer = f"{pointer_path}.{os.getpid()}.tmp"
+        with open(tmp_pointer, 'w') as f:
+            json.dump({'version': str(version), 'entry': os.path.basename(path), 'resolved_at': time.time()}, f)
+        os.replace(tmp_pointer, pointer_path)
+        return path
+
+    def _pinned(self) -> set:
+        pinned = set()
+        for name in os.listdir(self.root):
+            stages_dir = os.path.join(self.root, name, 'stages')
+            if not os.path.isdir(stages_dir):
+                continue
+            for filename in os.listdir(stages_dir):
+                try:
+                    with open(os.path.join(stages_dir, filename)) as f:
+                        pinned.add(os.path.abspath(os.path.join(self.root, name, json.load(f)['entry'])))
+                except (OSError, ValueError, KeyError):
+                    pass
+        return pinned
+
+    def evict(self, keep=()):
+        """Éviction LRU jusqu'à max_bytes ; versions pointées par un stage conservées"""
+        if not os.path.isdir(self.root):
+            return []
+        protected = self._pinned() | {os.path.abspath(p) for p in keep}
+        entries = []
+        for name in os.listdir(self.root):
+            model_dir = os.path.join(self.root, name)
+            if not os.path.isdir(model_dir):
+                continue
+            for entry in os.listdir(model_dir):
+                if entry.startswith('v'):
+                    path = os.path.join(model_dir, entry)
+                    marker = os.path.join(path, _LAST_USED)
+                    last_used = os.path.getmtime(marker) if os.path.exists(marker) else 0.0
+                    entries.append((last_used, path, _directory_size(path)))
+
+        total = sum(size for _, _, size in entries)
+        evicted = []
+        for _, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if os.path.abspath(path) in protected:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            evicted.append(path)
+        return evicted
+
+
+def mlflow_stage_lookup(tracking_uri: str = None):
+    """lookup() pour resolve_stage ; mlflow n'est importé qu'en cas d'appel au registry"""
+    def lookup(name, stage):
+        import mlflow
+        from mlflow.tracking import MlflowClient
+
+        client = MlflowClient(tracking_uri)
+        versions = client.get_latest_versions(name, stages=[stage])
+        if not versions:
+            raise LookupError(f"Aucune version de {name} au stage {stage}")
+        model_version = versions[0]
+
+        def download(destination):
+            mlflow.artifacts.download_artifacts(
+                run_id=model_version.run_id, dst_path=destination, tracking_uri=tracking_uri
+            )
+        return model_version.version, model_version.tags.get(CHECKSUM_TAG), download
+    return lookup
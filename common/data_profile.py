@@ -0,0 +1,166 @@
+# data_profile.py - Profil des données d'entraînement et dérive du trafic
+"""
+Le profil de référence (scripts/prepare_data.py → train_profile.json) est
+calculé en une passe sur le train : histogramme des longueurs,
+vocabulaire fréquent et sa couverture, fréquences de ses tokens hachées dans
+un nombre fixe de buckets (+ un bucket hors vocabulaire), priors des
+catégories. Les tokens rares (numéros de ticket, noms) restent hors de
+l'histogramme : ils ne font que bruiter le PSI.
+
+En service, TrafficSketch accumule les mêmes compteurs sur le trafic réel
+(aucun texte brut conservé, mémoire constante) ; drift() compare les deux
+distributions par PSI (Population Stability Index). Règle usuelle : PSI <
+0.1 stable, 0.1–0.2 à surveiller, > 0.2 dérive.
+"""
+import json
+import random
+import re
+import threading
+import zlib
+from collections import Counter
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w\w+")
+# Bornes des longueurs (caractères), communes au profil et aux sketches
+LENGTH_BINS = [0, 16, 32, 64, 128, 256, 512, 1024]
+HASH_BUCKETS = 256
+PSI_EPSILON = 1e-4
+
+
+def _bucket(token: str) -> int:
+    """Bucket stable entre processus (crc32, pas hash() randomisé)"""
+    return zlib.crc32(token.encode('utf-8')) % HASH_BUCKETS
+
+
+def _length_histogram(lengths) -> np.ndarray:
+    return np.bincount(np.searchsorted(LENGTH_BINS, lengths, side='right') - 1, minlength=len(LENGTH_BINS))
+
+
+def build_profile(texts, categories=None, vocab_size: int = 20000, min_count: int = 5) -> dict:
+    """Profil de référence en une passe : une tokenisation pour tout le corpus"""
+    texts = [str(t) for t in texts]
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+
+    # Comptes des tokens texte par texte : seule la table des tokens distincts
+    # est en mémoire (pas de tableau unicode à largeur fixe sur tout le corpus)
+    token_counts = Counter()
+    for text in texts:
+        token_counts.update(TOKEN_PATTERN.findall(text.lower()))
+    total = sum(token_counts.values())
+    # Plus fréquents d'abord, égalités départagées par ordre alphabétique
+    ranked = sorted(token_counts.items(), key=lambda item: (-item[1], item[0]))[:vocab_size]
+    ranked = [(token, n) for token, n in ranked if n >= min_count]
+    vocabulary = [token for token, _ in ranked]
+    vocabulary_counts = np.array([n for _, n in ranked], dtype=np.int64)
+    covered = int(vocabulary_counts.sum())
+
+    # Buckets des tokens du vocabulaire, dernier bucket = hors vocabulaire
+    token_hist = np.bincount(np.array([_bucket(t) for t in vocabulary], dtype=np.int64),
+                             weights=vocabulary_counts, minlength=HASH_BUCKETS + 1)
+    token_hist[HASH_BUCKETS] = total - covered
+
+    profile = {
+        'n_texts': len(texts),
+        'n_tokens': total,
+        'mean_length': float(lengths.mean()) if len(texts) else 0.0,
+        'length_bins': LENGTH_BINS,
+        'length_hist': _length_histogram(lengths).tolist(),
+        'hash_buckets': HASH_BUCKETS,
+        'token_hist': token_hist.astype(np.int64).tolist(),
+        'vocabulary': vocabulary,
+        'vocab_coverage': covered / max(total, 1),
+    }
+    if categories is not None:
+        names, category_counts = np.unique(np.asarray(categories, dtype=str), return_counts=True)
+        profile['category_counts'] = dict(zip(names.tolist(), category_counts.tolist()))
+        profile['category_priors'] = dict(zip(names.tolist(), (category_counts / category_counts.sum()).tolist()))
+    return profile
+
+
+def psi(expected, actual) -> float:
+    """Population Stability Index entre deux histogrammes (comptes bruts)"""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    if expected.sum() == 0 or actual.sum() == 0:
+        return 0.0
+    e = np.maximum(expected / expected.sum(), PSI_EPSILON)
+    a = np.maximum(actual / actual.sum(), PSI_EPSILON)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def load_profile(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class TrafficSketch:
+    """Compteurs du trafic réel comparables au profil de référence, sûrs entre threads"""
+
+    def __init__(self, profile: dict, sample_rate: float = 1.0, psi_threshold: float = 0.2):
+        if profile['length_bins'] != LENGTH_BINS or profile['hash_buckets'] != HASH_BUCKETS:
+            raise ValueError("Profil incompatible (bornes de longueur ou buckets différents)")
+        self.profile = profile
+        self.sample_rate = sample_rate
+        self.psi_threshold = psi_threshold
+        self._buckets = {token: _bucket(token) for token in profile['vocabulary']}
+        self._categories = sorted(profile.get('category_priors', {}))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.n_texts = 0
+            self.n_tokens = 0
+            self.in_vocabulary = 0
+            self.length_hist = np.zeros(len(LENGTH_BINS), dtype=np.int64)
+            self.token_hist = np.zeros(HASH_BUCKETS + 1, dtype=np.int64)
+            self.category_counts = {}
+
+    def observe(self, texts, categories=None):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        lengths = [len(t) for t in texts]
+        buckets = [
+            self._buckets.get(token, HASH_BUCKETS)
+            for text in texts
+            for token in TOKEN_PATTERN.findall(text.lower())
+        ]
+        length_hist = _length_histogram(lengths)
+        token_hist = np.bincount(buckets, minlength=HASH_BUCKETS + 1)
+        covered = len(buckets) - int(token_hist[HASH_BUCKETS])
+        with self._lock:
+            self.n_texts += len(texts)
+            self.n_tokens += len(buckets)
+            self.in_vocabulary += covered
+            self.length_hist += length_hist
+            self.token_hist += token_hist
+            for category in categories or ():
+                self.category_counts[category] = self.category_counts.get(category, 0) + 1
+
+    def drift(self) -> dict:
+        with self._lock:
+            length_hist = self.length_hist.copy()
+            token_hist = self.token_hist.copy()
+            category_counts = dict(self.category_counts)
+            n_texts, n_tokens, in_vocabulary = self.n_texts, self.n_tokens, self.in_vocabulary
+
+        report = {
+            'observed_texts': n_texts,
+            'length_psi': round(psi(self.profile['length_hist'], length_hist), 4),
+            'token_psi': round(psi(self.profile['token_hist'], token_hist), 4),
+            'vocab_coverage': round(in_vocabulary / n_tokens, 4) if n_tokens else None,
+            'reference_vocab_coverage': round(self.profile['vocab_coverage'], 4),
+            'mean_length_reference': round(self.profile['mean_length'], 1),
+        }
+        if self._categories:
+            # Catégories hors référence regroupées dans un dernier bucket
+            expected = [self.profile['category_counts'][c] for c in self._categories] + [0]
+            actual = [category_counts.get(c, 0) for c in self._categories]
+            actual.append(sum(category_counts.values()) - sum(actual))
+            report['category_psi'] = round(psi(expected, actual), 4)
+            report['predicted_categories'] = category_counts
+        report['drifted'] = n_texts > 0 and any(
+            report.get(k, 0) > self.psi_threshold for k in ('length_psi', 'token_psi', 'category_psi')
+        )
+        return report
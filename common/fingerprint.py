@@ -0,0 +1,12 @@
+# fingerprint.py - Empreinte stable des tickets
+"""
+Même empreinte dans le journal des prédictions et dans le journal de
+feedback : les deux se joignent au réentraînement sans conserver le texte.
+Module sans dépendance système, importable partout (agent, web, scripts).
+"""
+import hashlib
+
+
+def text_hash(text: str) -> str:
+    """Empreinte stable d'un ticket (jointure sans conserver le texte)"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
@@ -0,0 +1,237 @@
+# prediction_log.py - Journal persistant des prédictions (écritures asynchrones par lots)
+"""
+Chaque prédiction servie devient un enregistrement (hash du texte, route,
+catégorie, confiance, latence, version du modèle) ; le texte lui-même n'est
+jamais écrit. `record()` ne fait que déposer l'enregistrement dans une file
+bornée : un thread d'écriture le regroupe par lots, chaque lot étant un
+membre gzip ajouté au segment ouvert. Le segment est fermé (renommé en
+*.jsonl.gz) après `segment_records` enregistrements ou `segment_seconds`.
+Le processus qui écrit garde un verrou flock sur son segment ouvert : au
+démarrage, un segment *.open que l'on peut verrouiller a été abandonné par
+un processus arrêté (les PID ne sont pas fiables en conteneur, PID 1).
+Sans flock (Windows), les segments sont écrits sans verrou et les orphelins
+ne sont pas repris (ils restent *.open, ignorés par les lecteurs).
+File pleine (disque lent) : l'enregistrement est compté comme perdu, la
+requête n'attend jamais.
+
+`read_predictions` relit les segments fermés en flux (analyse hors ligne,
+réentraînement : jointure avec le journal de feedback via `text_hash`).
+"""
+import glob
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from common.fingerprint import text_hash
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+OPEN_SUFFIX = ".open"
+CREATING_SUFFIX = ".creating"
+
+
+class PredictionLog:
+    """Journal append-only en segments gzip, écrit par un thread dédié"""
+
+    def __init__(self, directory: str, service: str, batch_size: int = 512,
+                 flush_interval: float = 1.0, max_pending: int = 100000,
+                 segment_records: int = 100000, segment_seconds: float = 3600):
+        self.directory = directory
+        self.service = service
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_records = segment_records
+        self.segment_seconds = segment_seconds
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.segments = 0
+        self.errors = 0
+        self._segment = None  # (chemin du segment ouvert, nb d'enregistrements, ouverture, fichier)
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+        self._recover_orphans()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"prediction-log-{service}", daemon=True)
+        self._thread.start()
+
+    def _recover_orphans(self):
+        """Ferme les segments restés ouverts par un processus arrêté brutalement"""
+        if fcntl is None:
+            return  # sans verrou, impossible de distinguer un orphelin d'un segment vivant
+        for path in glob.glob(os.path.join(self.directory, f"{self.service}-*{SEGMENT_SUFFIX}{OPEN_SUFFIX}")):
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                continue  # fermé entre-temps par son processus
+            with f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # verrou tenu : un processus vivant écrit ce segment
+                os.replace(path, path[:-len(OPEN_SUFFIX)])
+
+    def record(self, text: str, route: str, category: str, confidence: float,
+               latency_ms: float, model_version: str = None, **extra):
+        """Dépose un enregistrement sans jamais bloquer l'appelant"""
+        record = {
+            'timestamp': time.time(),
+            'service': self.service,
+            'text_hash': text_hash(text),
+            'route': route,
+            'category': category,
+            'confidence': None if confidence is None else round(float(confidence), 4),
+            'latency_ms': round(float(latency_ms), 3),
+            'model_version': model_version,
+            **extra
+        }
+        try:
+            self._pending.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.recorded += 1
+        return True
+
+    def _take_batch(self):
+        try:
+            batch = [self._pending.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _open_segment(self):
+        self._sequence += 1
+        name = f"{self.service}-{time.time_ns()}-{os.getpid()}-{self._sequence:06d}{SEGMENT_SUFFIX}"
+        path = os.path.join(self.directory, name + OPEN_SUFFIX)
+        if fcntl is None:
+            self._segment = [path, 0, time.monotonic(), open(path, 'ab')]
+            return
+        # Verrou pris avant que le segment soit visible sous son nom *.open : la
+        # reprise d'un autre processus ne peut pas le prendre pour un orphelin.
+        # Il est libéré par le noyau à la fermeture ou à la mort du processus.
+        creating_path = path + CREATING_SUFFIX
+        f = open(creating_path, 'ab')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.replace(creating_path, path)
+        except OSError:
+            f.close()
+            raise
+        self._segment = [path, 0, time.monotonic(), f]
+
+    def _close_segment(self):
+        if self._segment is None:
+            return
+        path, _, _, f = self._segment
+        self._segment = None
+        if fcntl is None:
+            # Windows : un fichier ouvert ne peut pas être renommé
+            f.close()
+            os.replace(path, path[:-len(OPEN_SUFFIX)])
+        else:
+            try:
+                # Renommage atomique (verrou encore tenu) : un lecteur ne voit que des segments complets
+                os.replace(path, path[:-len(OPEN_SUFFIX)])
+            finally:
+                f.close()
+        with self._lock:
+            self.segments += 1
+
+    def _write(self, batch):
+        if self._segment is None:
+            self._open_segment()
+        payload = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in batch).encode('utf-8')
+        # Un membre gzip par lot : le segment reste un .gz valide après chaque écriture
+        f = self._segment[3]
+        f.write(gzip.compress(payload, compresslevel=6))
+        f.flush()
+        self._segment[1] += len(batch)
+        with self._lock:
+            self.written += len(batch)
+        if (self._segment[1] >= self.segment_records
+                or time.monotonic() - self._segment[2] >= self.segment_seconds):
+            self._close_segment()
+
+    def _run(self):
+        while True:
+            stopping = self._closed.is_set()
+            batch = self._take_batch()
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    with self._lock:
+                        self.errors += 1
+                    print(f"⚠️  Journal des prédictions: {len(batch)} enregistrements perdus ({e})")
+            elif stopping:
+                self._close_segment()
+                return
+            elif self._segment is not None and time.monotonic() - self._segment[2] >= self.segment_seconds:
+                self._close_segment()
+
+    def close(self):
+        """Écrit ce qui reste en file puis ferme le segment courant"""
+        self._closed.set()
+        self._thread.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'recorded': self.recorded,
+                'written': self.written,
+                'pending': self._pending.qsize(),
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'segments_closed': self.segments
+            }
+
+
+def _segment_key(path: str) -> tuple:
+    """<service>-<time_ns>-<pid>-<seq>.jsonl.gz → (time_ns, pid, seq)"""
+    time_ns, pid, sequence = os.path.basename(path)[:-len(SEGMENT_SUFFIX)].split('-')[-3:]
+    return int(time_ns), int(pid), int(sequence)
+
+
+def list_segments(directory: str, service: str = None, after: str = None) -> list:
+    """Segments fermés, dans l'ordre d'écriture ; after : nom du dernier segment déjà lu"""
+    pattern = f"{service or '*'}-*{SEGMENT_SUFFIX}"
+    segments = sorted(glob.glob(os.path.join(directory, pattern)), key=_segment_key)
+    if after is not None:
+        segments = [path for path in segments if _segment_key(path) > _segment_key(after)]
+    return segments
+
+
+def read_predictions(directory: str, service: str = None, since: float = None, after: str = None):
+    """Itère sur les enregistrements des segments fermés, un segment à la fois"""
+    for path in list_segments(directory, service, after):
+        for record in read_segment(path):
+            if since is None or record['timestamp'] >= since:
+                yield record
+
+
+def read_segment(path: str):
+    """Itère sur les enregistrements d'un segment fermé"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+    except (EOFError, gzip.BadGzipFile, json.JSONDecodeError):
+        # Dernier lot tronqué (arrêt brutal pendant l'écriture) : le reste du segment est ignoré
+        return
@@ -0,0 +1,124 @@
+# profiler.py - Profileur par échantillonnage à la demande (piles repliées)
+"""
+Quand le p99 se dégrade en production, GET /debug/profile?seconds=N
+échantillonne les piles Python de tous les threads du service pendant N
+secondes, sous le trafic réel, et renvoie des piles repliées (format
+« collapsed » : `frame;frame;frame count` par ligne), lisibles directement par
+flamegraph.pl ou speedscope.
+
+Aucun coût hors capture : le thread d'échantillonnage n'existe que pendant
+une capture, et une seule capture à la fois est autorisée. L'endpoint est
+désactivé tant que DEBUG_TOKEN n'est pas défini, et exige l'en-tête
+X-Debug-Token correspondant.
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+DEBUG_TOKEN_HEADER = "X-Debug-Token"
+
+# Feuilles de pile d'un thread qui attend (workers inactifs, boucle d'événements)
+IDLE_LEAVES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('selectors.py', 'select'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+}
+
+
+class ProfilerBusyError(Exception):
+    """Une capture est déjà en cours"""
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename.replace('\\', '/').rsplit('/', 2)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Échantillonneur de piles via sys._current_frames, une capture à la fois"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def profile(self, seconds: float, interval: float = 0.005, include_idle: bool = False) -> Counter:
+        """
+        Échantillonne tous les threads (sauf l'appelant) pendant `seconds`.
+        Returns: Counter pile repliée → nombre d'échantillons
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("Une capture de profil est déjà en cours")
+        try:
+            return self._sample(seconds, interval, include_idle)
+        finally:
+            self._lock.release()
+
+    def _sample(self, seconds, interval, include_idle):
+        stacks = Counter()
+        labels = {}
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                code = frame.f_code
+                if not include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[';'.join(reversed(stack))] += 1
+            time.sleep(interval)
+        return stacks
+
+
+def collapsed(stacks: Counter) -> str:
+    """Piles repliées, les plus fréquentes d'abord"""
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def token_allowed(provided: str, expected: str = None) -> bool:
+    expected = os.getenv("DEBUG_TOKEN", "") if expected is None else expected
+    return bool(expected) and hmac.compare_digest(provided or "", expected)
+
+
+def install_fastapi_profiler(app, profiler: SamplingProfiler = None, max_seconds: float = None):
+    """GET /debug/profile?seconds=N&interval_ms=5&idle=false, protégé par DEBUG_TOKEN"""
+    from fastapi import HTTPException, Request
+    from fastapi.responses import PlainTextResponse
+
+    profiler = profiler or SamplingProfiler()
+    if max_seconds is None:
+        max_seconds = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+    @app.get("/debug/profile", response_class=PlainTextResponse)
+    def debug_profile(request: Request, seconds: float = 10.0, interval_ms: float = 5.0, idle: bool = False):
+        """Profil CPU par échantillonnage sous trafic réel (piles repliées)"""
+        if not os.getenv("DEBUG_TOKEN"):
+            raise HTTPException(status_code=404, detail="Profilage désactivé (DEBUG_TOKEN non défini)")
+        if not token_allowed(request.headers.get(DEBUG_TOKEN_HEADER)):
+            raise HTTPException(status_code=403, detail="Jeton de debug invalide")
+        if not 0 < seconds <= max_seconds or interval_ms < 1:
+            raise HTTPException(status_code=422, detail=f"seconds dans ]0, {max_seconds}], interval_ms >= 1")
+        try:
+            stacks = profiler.profile(seconds, interval_ms / 1000, include_idle=idle)
+        except ProfilerBusyError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return PlainTextResponse(
+            collapsed(stacks),
+            headers={"X-Profile-Samples": str(sum(stacks.values()))}
+        )
@@ -0,0 +1,536 @@
+# serving.py - Cœur de service de modèle partagé par tfidf_svc et transformer_svc
+"""
+Un service de modèle se résume à un `Predictor` (groupe de textes → un
+résultat par texte). `ModelServer` fournit autour de lui tout le reste,
+identique pour chaque modèle :
+- app FastAPI, CORS, traces (/debug/traces) et profil CPU (/debug/profile) ;
+- /predict, /predict_batch, /health, / et /metrics (JSON + Prometheus) ;
+- cache LRU des résultats par (version du modèle, texte) ;
+- micro-batching des requêtes unitaires concurrentes en un predict_batch ;
+- contrôle d'admission : requêtes en cours bornées, file d'attente bornée
+  et consciente de la deadline du client (en-tête X-Request-Timeout-Ms),
+  refus rapides 429/503 avec Retry-After.
+
+Configuration commune par variables d'environnement : voir `options_from_env`.
+"""
+import math
+import os
+import queue
+import threading
+import time
+from collections import Counter as CategoryCounter
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from contextlib import asynccontextmanager, contextmanager
+from typing import List, Optional
+
+import anyio.to_thread
+from fastapi import FastAPI, Header, HTTPException, Response
+from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from pydantic import BaseModel
+
+from common.tracing import TraceBuffer, current_trace, install_fastapi_tracing, span
+from common.profiler import install_fastapi_profiler
+
+# Temps restant au client (ms) : les requêtes qui ne peuvent pas finir à temps sont refusées
+DEADLINE_HEADER = "X-Request-Timeout-Ms"
+# Attente max du résultat d'un micro-batch pour une requête sans deadline
+BATCH_RESULT_TIMEOUT_S = float(os.getenv("BATCH_RESULT_TIMEOUT_MS", "30000")) / 1000
+
+
+class Ticket(BaseModel):
+    text: str
+
+
+class TicketBatch(BaseModel):
+    texts: List[str]
+
+
+class Predictor:
+    """
+    Modèle servi par ModelServer. Seul predict_batch est obligatoire ; il
+    renvoie un dict par texte ({"category", "confidence", "model", ...}).
+    """
+    name = "model"
+
+    def predict_batch(self, texts: list) -> list:
+        raise NotImplementedError
+
+    def ready(self) -> bool:
+        return True
+
+    @property
+    def version(self):
+        """Identifiant du modèle courant (clé du cache : change au rechargement)"""
+        return None
+
+    def info(self) -> dict:
+        """Champs ajoutés à GET /"""
+        return {}
+
+    def metrics(self) -> dict:
+        """Champs ajoutés à GET /metrics"""
+        return {}
+
+
+class ResultCache:
+    """LRU borné (version du modèle, texte) → résultat ; maxsize=0 le désactive"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, text: str):
+        if self.maxsize <= 0:
+            return None
+        key = (version, text)
+        with self._lock:
+            result = self._data.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+        return dict(result)
+
+    def put(self, version, text: str, result: dict):
+        if self.maxsize <= 0:
+            return
+        key = (version, text)
+        with self._lock:
+            self._data[key] = dict(result)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class MicroBatcher:
+    """
+    Regroupe les textes soumis par des requêtes concurrentes en un seul appel
+    predict_batch. Le thread du batcher prend le premier texte en attente,
+    complète le batch pendant au plus max_wait_ms (ou jusqu'à max_batch_size)
+    puis répond à chaque requête via son Future.
+    """
+
+    def __init__(self, predict_batch, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self._predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def close(self):
+        """Arrête le thread après les batchs déjà soumis"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Délai écoulé : on prend encore ce qui attend déjà, sans attendre plus
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self._predict_batch([text for text, _ in batch])
+                if len(results) != len(batch):
+                    # Sinon zip laisserait des futures jamais résolues
+                    raise RuntimeError(f"predict_batch a rendu {len(results)} résultat(s) "
+                                       f"pour {len(batch)} texte(s)")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self.batches,
+                'items': self.items,
+                'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+                'queued': self._queue.qsize()
+            }
+
+
+class Overloaded(Exception):
+    """Requête refusée par le contrôle d'admission"""
+
+    def __init__(self, message: str, status_code: int = 503, retry_after: float = 1.0, reason: str = "overloaded"):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Borne les requêtes en cours (max_inflight, 0 = illimité). Au-delà, au plus
+    max_queue requêtes attendent leur tour (FIFO), pendant max_queue_wait_s ou
+    jusqu'à leur deadline. Refus immédiat plutôt que lenteur pour tous :
+    - file pleine → 429 ;
+    - deadline intenable (attente estimée + temps de service moyen) ou
+      attente expirée → 503.
+    Retry-After = temps estimé pour vider le travail en cours.
+    """
+
+    def __init__(self, max_inflight: int = 0, max_queue: int = 0, max_queue_wait_s: float = 1.0,
+                 smoothing: float = 0.2):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait_s
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self.inflight = 0
+        self.admitted = 0
+        self.rejected = CategoryCounter()
+        self.service_time = 0.0  # Moyenne mobile de la durée d'une requête admise (s)
+
+    def _expected_wait(self) -> float:
+        """Attente estimée d'une nouvelle requête en fin de file (sous verrou)"""
+        if not self.max_inflight or (self.inflight < self.max_inflight and not self._waiters):
+            return 0.0
+        return self.service_time * (len(self._waiters) + 1) / self.max_inflight
+
+    def _retry_after(self) -> float:
+        if not self.max_inflight:
+            return 1.0
+        return max(1.0, self.service_time * (self.inflight + len(self._waiters)) / self.max_inflight)
+
+    def _reject(self, reason: str, status_code: int, message: str):
+        self.rejected[reason] += 1
+        return Overloaded(message, status_code, self._retry_after(), reason)
+
+    def _enter(self, deadline_s):
+        with self._lock:
+            expected = self._expected_wait()
+            if deadline_s is not None and (deadline_s <= 0 or expected + self.service_time > deadline_s):
+                raise self._reject("deadline", 503, f"Deadline intenable ({deadline_s * 1000:.0f} ms, "
+                                                    f"attente estimée {expected * 1000:.0f} ms)")
+            if not self.max_inflight or (self.inflight < self.max_inflight and not self._waiters):
+                self.inflight += 1
+                self.admitted += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                raise self._reject("queue_full", 429, f"Service saturé ({self.inflight} en cours, "
+                                                      f"{len(self._waiters)} en attente)")
+            turn = threading.Event()
+            self._waiters.append(turn)
+
+        timeout = self.max_queue_wait
+        if deadline_s is not None:
+            timeout = min(timeout, deadline_s - self.service_time)
+        if turn.wait(max(timeout, 0.0)):
+            return
+        with self._lock:
+            if turn.is_set():  # Place accordée pendant l'expiration
+                return
+            self._waiters.remove(turn)
+            raise self._reject("queue_timeout", 503, f"Attente en file expirée ({timeout * 1000:.0f} ms)")
+
+    def _release(self, held_s: float):
+        with self._lock:
+            if self.service_time:
+                self.service_time += self.smoothing * (held_s - self.service_time)
+            else:
+                self.service_time = held_s
+            if self._waiters:
+                # La place passe directement au premier en file : inflight inchangé
+                self._waiters.popleft().set()
+                self.admitted += 1
+            else:
+                self.inflight -= 1
+
+    @contextmanager
+    def admit(self, deadline_s: float = None):
+        """
+        Attend une place (ou lève Overloaded). deadline_s : temps restant au
+        client, None = max_queue_wait_s seulement. Rend l'attente en file (s).
+        """
+        start_time = time.monotonic()
+        self._enter(deadline_s)
+        admitted_at = time.monotonic()
+        try:
+            yield admitted_at - start_time
+        finally:
+            self._release(time.monotonic() - admitted_at)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_inflight': self.max_inflight,
+                'max_queue': self.max_queue,
+                'inflight': self.inflight,
+                'queued': len(self._waiters),
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected),
+                'service_time_ms': round(self.service_time * 1000, 3)
+            }
+
+
+def options_from_env(**defaults) -> dict:
+    """
+    Options de ModelServer depuis l'environnement, avec les défauts du service :
+    SERVING_MAX_BATCH_SIZE, SERVING_MAX_WAIT_MS (0 = pas de micro-batching),
+    RESULT_CACHE_SIZE (0 = pas de cache), MAX_INFLIGHT (0 = illimité),
+    MAX_QUEUE (requêtes en attente au-delà de MAX_INFLIGHT), MAX_QUEUE_WAIT_MS.
+    """
+    return {
+        'max_batch_size': int(os.getenv("SERVING_MAX_BATCH_SIZE", defaults.get('max_batch_size', 32))),
+        'max_wait_ms': float(os.getenv("SERVING_MAX_WAIT_MS", defaults.get('max_wait_ms', 0))),
+        'cache_size': int(os.getenv("RESULT_CACHE_SIZE", defaults.get('cache_size', 10000))),
+        'max_inflight': int(os.getenv("MAX_INFLIGHT", defaults.get('max_inflight', 0))),
+        'max_queue': int(os.getenv("MAX_QUEUE", defaults.get('max_queue', 0))),
+        'max_queue_wait_ms': float(os.getenv("MAX_QUEUE_WAIT_MS", defaults.get('max_queue_wait_ms', 1000))),
+    }
+
+
+class ModelServer:
+    """
+    App FastAPI complète autour d'un Predictor. Les services ajoutent leurs
+    endpoints propres sur `server.app` ; `observers` reçoivent (textes,
+    résultats) de chaque requête, cache compris (ex. suivi de dérive).
+    """
+
+    def __init__(self, predictor: Predictor, service: str, title: str, message: str,
+                 metric_prefix: str, max_batch_size: int = 32, max_wait_ms: float = 0.0,
+                 cache_size: int = 10000, max_inflight: int = 0, max_queue: int = 0,
+                 max_queue_wait_ms: float = 1000, observers=(), registry=REGISTRY):
+        self.predictor = predictor
+        self.service = service
+        self.message = message
+        self.prefix = metric_prefix
+        self.observers = list(observers)
+        self.registry = registry
+
+        self.cache = ResultCache(cache_size)
+        self.batcher = MicroBatcher(self._predict, max_batch_size, max_wait_ms) if max_wait_ms > 0 else None
+        self.admission = AdmissionController(max_inflight, max_queue, max_queue_wait_ms / 1000)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._predictions = CategoryCounter()
+
+        self.request_count = Counter(f'{metric_prefix}_requests_total', 'Nombre total de requêtes',
+                                     ['endpoint'], registry=registry)
+        self.request_latency = Histogram(f'{metric_prefix}_request_duration_seconds', 'Durée des requêtes',
+                                         registry=registry)
+        self.prediction_count = Counter(f'{metric_prefix}_predictions_total', 'Prédictions par catégorie',
+                                        ['category'], registry=registry)
+        self.batch_size = Histogram(f'{metric_prefix}_batch_size', 'Taille des batchs passés au modèle',
+                                    buckets=(1, 2, 4, 8, 16, 32, 64, 128), registry=registry)
+        self.cache_lookups = Counter(f'{metric_prefix}_result_cache_total', 'Consultations du cache de résultats',
+                                     ['outcome'], registry=registry)
+        self.rejected = Counter(f'{metric_prefix}_rejected_total', 'Requêtes refusées par le contrôle d\'admission',
+                                ['reason'], registry=registry)
+        self.queue_wait = Histogram(f'{metric_prefix}_queue_wait_seconds', 'Attente en file avant admission',
+                                    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+                                    registry=registry)
+
+        self.app = FastAPI(title=title, lifespan=self._lifespan)
+        self.app.add_middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_credentials=False,  # Doit être False si allow_origins=["*"]
+            allow_methods=["*"],
+            allow_headers=["*"],
+            expose_headers=["*"]
+        )
+        # Traces par étapes, renvoyées à l'agent via Server-Timing : GET /debug/traces
+        self.traces = TraceBuffer(maxsize=int(os.getenv("TRACE_BUFFER_SIZE", "1000")))
+        install_fastapi_tracing(self.app, service, self.traces)
+        # Profil CPU à la demande (piles repliées), activé par DEBUG_TOKEN : GET /debug/profile
+        install_fastapi_profiler(self.app)
+        self._install_routes()
+
+    @asynccontextmanager
+    async def _lifespan(self, app):
+        # Endpoints synchrones : chaque requête en file occupe un thread du pool
+        # anyio (40 par défaut). Le pool doit couvrir en cours + file, sinon les
+        # requêtes attendraient dans le pool, hors de tout contrôle d'admission.
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        if self.admission.max_inflight:
+            limiter.total_tokens = max(limiter.total_tokens,
+                                       self.admission.max_inflight + self.admission.max_queue + 8)
+        yield
+
+    def _predict(self, texts: list) -> list:
+        self.batch_size.observe(len(texts))
+        version = self.predictor.version
+        results = self.predictor.predict_batch(texts)
+        if version is not None:
+            # Version servie renvoyée aux appelants (journal des prédictions de l'agent)
+            label = '/'.join(str(v) for v in version if v is not None) if isinstance(version, tuple) else str(version)
+            for result in results:
+                result.setdefault("model_version", label)
+        return results
+
+    def classify(self, texts: list, deadline: float = None) -> list:
+        """
+        Cache, puis micro-batcher (texte seul) ou appel direct pour le reste.
+        deadline : instant (time.perf_counter) au-delà duquel le client n'attend
+        plus le résultat du micro-batcher ; sans deadline, BATCH_RESULT_TIMEOUT_S.
+        """
+        version = self.predictor.version
+        results = [self.cache.get(version, text) for text in texts]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if self.cache.maxsize > 0:
+            self.cache_lookups.labels(outcome='hit').inc(len(texts) - len(missing))
+            self.cache_lookups.labels(outcome='miss').inc(len(missing))
+
+        if missing:
+            pending = [texts[i] for i in missing]
+            if self.batcher is not None and len(pending) == 1:
+                timeout = BATCH_RESULT_TIMEOUT_S if deadline is None else max(deadline - time.perf_counter(), 0.0)
+                with span("micro_batch"):
+                    try:
+                        computed = [self.batcher.submit(pending[0]).result(timeout=timeout)]
+                    except FuturesTimeoutError:
+                        raise Overloaded(f"Résultat du micro-batch non rendu en {timeout * 1000:.0f} ms",
+                                         503, reason="batch_timeout")
+            else:
+                computed = self._predict(pending)
+            for i, result in zip(missing, computed):
+                self.cache.put(version, texts[i], result)
+                results[i] = result
+
+        categories = [result["category"] for result in results]
+        with self._lock:
+            self._predictions.update(categories)
+        for category in categories:
+            self.prediction_count.labels(category=category).inc()
+        for observer in self.observers:
+            observer(texts, results)
+        return results
+
+    def _serve(self, endpoint: str, texts: list, timeout_ms: float = None) -> list:
+        self.request_count.labels(endpoint=endpoint).inc()
+        with self._lock:
+            self._requests += 1
+        if not self.predictor.ready():
+            raise HTTPException(status_code=503, detail="Modèle non disponible")
+
+        start_time = time.perf_counter()
+        deadline = None if timeout_ms is None else start_time + timeout_ms / 1000
+        try:
+            with self.admission.admit(None if timeout_ms is None else timeout_ms / 1000) as waited:
+                self.queue_wait.observe(waited)
+                trace = current_trace()
+                if trace is not None:
+                    trace.add_span("queue_wait", waited * 1000)
+                results = self.classify(texts, deadline)
+        except Overloaded as e:
+            self.rejected.labels(reason=e.reason).inc()
+            raise HTTPException(status_code=e.status_code, detail=str(e),
+                                headers={"Retry-After": str(math.ceil(e.retry_after))})
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Erreur de prédiction: {str(e)}")
+        self.request_latency.observe(time.perf_counter() - start_time)
+        return results
+
+    def metrics(self) -> dict:
+        with self._lock:
+            requests, predictions = self._requests, dict(self._predictions)
+        return {
+            f"{self.prefix}_requests_total": requests,
+            f"{self.prefix}_predictions": predictions,
+            f"{self.prefix}_model_loaded": int(self.predictor.ready()),
+            f"{self.prefix}_result_cache": self.cache.stats(),
+            f"{self.prefix}_micro_batcher": self.batcher.stats() if self.batcher is not None else None,
+            f"{self.prefix}_admission": self.admission.stats(),
+            **self.predictor.metrics()
+        }
+
+    def _install_routes(self):
+        app = self.app
+
+        @app.options("/predict")
+        def predict_options():
+            """Handler OPTIONS pour CORS preflight"""
+            return {}
+
+        @app.post("/predict")
+        def predict(ticket: Ticket, x_request_timeout_ms: Optional[float] = Header(None)):
+            return self._serve('/predict', [ticket.text], x_request_timeout_ms)[0]
+
+        @app.post("/predict_batch")
+        def predict_batch(batch: TicketBatch, x_request_timeout_ms: Optional[float] = Header(None)):
+            """Classe un groupe de tickets en un appel predict_batch (hors cache)"""
+            if not batch.texts:
+                return {"predictions": []}
+            return {"predictions": self._serve('/predict_batch', batch.texts, x_request_timeout_ms)}
+
+        @app.get("/")
+        def root():
+            return {
+                "message": self.message,
+                "status": "ready" if self.predictor.ready() else "not loaded",
+                **self.predictor.info()
+            }
+
+        @app.get("/health")
+        def health():
+            if not self.predictor.ready():
+                raise HTTPException(status_code=503, detail="Modèle non chargé")
+            return {"status": "healthy"}
+
+        @app.get("/metrics")
+        def metrics():
+            return self.metrics()
+
+        @app.get("/metrics/prometheus")
+        def metrics_prometheus():
+            """Métriques au format Prometheus"""
+            return Response(generate_latest(self.registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,207 @@
+# tracing.py - Traces de requêtes par étapes, sans collecteur externe
+"""
+Chaque requête reçoit un identifiant de trace (en-tête X-Trace-Id, repris de
+l'appelant s'il est fourni) propagé de web_interface à l'agent puis aux
+services modèles. Chaque service découpe sa requête en spans (routage,
+appel backend, tokenisation, forward...) gardées dans un buffer circulaire
+local, consultable via /debug/traces.
+
+Les durées des étapes d'un service sont renvoyées à l'appelant dans
+l'en-tête standard Server-Timing : l'agent les rattache à sa propre trace et
+en déduit le temps réseau (durée de l'appel - durée côté serveur).
+"""
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+TRACE_HEADER = "X-Trace-Id"
+SERVER_TIMING_HEADER = "Server-Timing"
+_VALID_TRACE_ID = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+_SERVER_TIMING_METRIC = re.compile(r'^\s*([A-Za-z0-9_.:-]+)\s*(?:;.*?dur=([0-9.]+))?')
+
+_CURRENT = ContextVar('current_trace', default=None)
+
+
+class Trace:
+    """Trace d'une requête dans un service : spans relatives au début de la requête"""
+
+    def __init__(self, service: str, name: str, trace_id: str = None):
+        self.trace_id = trace_id if trace_id and _VALID_TRACE_ID.match(trace_id) else uuid.uuid4().hex
+        self.service = service
+        self.name = name
+        self.timestamp = time.time()
+        self.duration_ms = None
+        self.attrs = {}
+        self.spans = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def offset_ms(self) -> float:
+        """Temps écoulé depuis le début de la requête"""
+        return (time.perf_counter() - self._start) * 1000
+
+    def add_span(self, name: str, duration_ms: float, start_ms: float = None, **attrs):
+        if start_ms is None:
+            start_ms = self.offset_ms() - duration_ms
+        with self._lock:
+            self.spans.append({
+                'name': name,
+                'start_ms': round(start_ms, 3),
+                'duration_ms': round(duration_ms, 3),
+                **attrs
+            })
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.add_span(name, (end - start) * 1000, (start - self._start) * 1000, **attrs)
+
+    def finish(self, **attrs) -> float:
+        self.attrs.update(attrs)
+        self.duration_ms = self.offset_ms()
+        return self.duration_ms
+
+    def server_timing(self) -> str:
+        """En-tête Server-Timing : une métrique par span + total"""
+        with self._lock:
+            metrics = [f"{s['name']};dur={s['duration_ms']:.3f}" for s in self.spans]
+        total = self.duration_ms if self.duration_ms is not None else self.offset_ms()
+        metrics.append(f"total;dur={total:.3f}")
+        return ", ".join(metrics)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s['start_ms'])
+        return {
+            'trace_id': self.trace_id,
+            'service': self.service,
+            'name': self.name,
+            'timestamp': self.timestamp,
+            'duration_ms': round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            'attrs': self.attrs,
+            'spans': spans
+        }
+
+
+class TraceBuffer:
+    """Buffer circulaire des dernières traces terminées"""
+
+    def __init__(self, maxsize: int = 1000):
+        self._traces = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+
+    def record(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def slowest(self, limit: int = 20, min_ms: float = 0.0) -> list:
+        with self._lock:
+            traces = list(self._traces)
+        traces = [t for t in traces if t.duration_ms is not None and t.duration_ms >= min_ms]
+        traces.sort(key=lambda t: t.duration_ms, reverse=True)
+        return [t.to_dict() for t in traces[:limit]]
+
+    def get(self, trace_id: str) -> list:
+        with self._lock:
+            return [t.to_dict() for t in self._traces if t.trace_id == trace_id]
+
+    def __len__(self):
+        return len(self._traces)
+
+
+def current_trace():
+    return _CURRENT.get()
+
+
+def activate(trace: Trace):
+    """Rend la trace courante pour le contexte (thread / tâche) appelant"""
+    return _CURRENT.set(trace)
+
+
+def deactivate(token):
+    _CURRENT.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Span sur la trace courante ; sans effet hors requête tracée"""
+    trace = _CURRENT.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(name, **attrs):
+        yield
+
+
+def outgoing_headers() -> dict:
+    """En-têtes à ajouter aux appels sortants pour propager la trace"""
+    trace = _CURRENT.get()
+    return {TRACE_HEADER: trace.trace_id} if trace is not None else {}
+
+
+def parse_server_timing(header: str) -> list:
+    """'tokenize;dur=3.1, forward;dur=40' → [('tokenize', 3.1), ('forward', 40.0)]"""
+    metrics = []
+    for part in (header or '').split(','):
+        match = _SERVER_TIMING_METRIC.match(part)
+        if match and match.group(2) is not None:
+            metrics.append((match.group(1), float(match.group(2))))
+    return metrics
+
+
+def record_remote_timing(prefix: str, elapsed_ms: float, header: str):
+    """
+    Rattache à la trace courante les étapes d'un service appelé (Server-Timing)
+    et le temps réseau = durée de l'appel - durée totale côté serveur.
+    """
+    trace = _CURRENT.get()
+    if trace is None:
+        return
+    # Horloges distinctes : les étapes distantes sont ancrées au début de l'appel
+    call_start_ms = trace.offset_ms() - elapsed_ms
+    metrics = parse_server_timing(header)
+    server_total = dict(metrics).get('total')
+    for name, duration in metrics:
+        if name != 'total':
+            trace.add_span(f"{prefix}.{name}", duration, call_start_ms, remote=True)
+    if server_total is not None:
+        trace.add_span(f"{prefix}.network", max(elapsed_ms - server_total, 0.0), call_start_ms, remote=True)
+
+
+def install_fastapi_tracing(app, service: str, buffer: TraceBuffer, exclude=("/health", "/metrics")):
+    """
+    Middleware de trace + endpoints /debug/traces pour une app FastAPI.
+    Chaque requête (hors `exclude`) est tracée et enregistrée dans `buffer`.
+    """
+    @app.middleware("http")
+    async def trace_requests(request, call_next):
+        if request.url.path in exclude or request.url.path.startswith("/debug"):
+            return await call_next(request)
+        trace = Trace(service, f"{request.method} {request.url.path}", request.headers.get(TRACE_HEADER))
+        token = activate(trace)
+        try:
+            response = await call_next(request)
+        finally:
+            deactivate(token)
+        trace.finish(status_code=response.status_code)
+        buffer.record(trace)
+        response.headers[TRACE_HEADER] = trace.trace_id
+        response.headers[SERVER_TIMING_HEADER] = trace.server_timing()
+        return response
+
+    @app.get("/debug/traces")
+    def debug_traces(limit: int = 20, min_ms: float = 0.0):
+        """Requêtes récentes les plus lentes avec leurs étapes"""
+        return {"service": service, "buffered": len(buffer), "traces": buffer.slowest(limit, min_ms)}
+
+    @app.get("/debug/traces/{trace_id}")
+    def debug_trace(trace_id: str):
+        return {"service": service, "traces": buffer.get(trace_id)}
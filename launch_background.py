@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
 """
 Script simple pour lancer les services CallCenterAI en arrière-plan
+
+Usage:
+  python launch_background.py                 # 1 processus par service
+  python launch_background.py --supervise     # superviseur multi-workers
+  python launch_background.py --supervise --workers transformer_svc=2
 """
+import argparse
+import signal
+import socket
 import subprocess
 import sys
 import os
 import time
+import urllib.request
 
 def launch_services():
     """Lancer les 3 services en parallèle"""
@@ -60,5 +69,272 @@ def launch_services():
     else:
         print("❌ Aucun service démarré!")
 
+# ---------------------------------------------------------------------------
+# Mode superviseur : N workers par service, readiness, redémarrage, arrêt
+# ---------------------------------------------------------------------------
+
+# Mémoire par worker (modèle chargé) et threads de calcul par worker
+SUPERVISED_SERVICES = [
+    # (nom, dossier, port, mémoire Mo, threads/worker, workers max)
+    ("TF-IDF Service", "tfidf_svc", 8000, 300, 1, 4),
+    ("Transformer Service", "transformer_svc", 8001, 1500, 2, 8),
+    # L'agent garde un état en mémoire (coalescing, breakers, charge) :
+    # un seul worker par défaut
+    ("Agent Service", "agent", 8003, 150, 1, 1),
+]
+
+MEMORY_BUDGET_RATIO = 0.7    # Part de la mémoire disponible allouée aux workers
+RESTART_BACKOFF_INITIAL = 1.0
+RESTART_BACKOFF_MAX = 30.0
+STABLE_AFTER_SECONDS = 60    # Un worker stable remet son backoff à zéro
+SHUTDOWN_GRACE_SECONDS = 10
+
+
+def available_memory_mb() -> float:
+    """Mémoire disponible (Linux : MemAvailable, sinon pages libres)"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (ValueError, OSError, AttributeError):
+        return float('inf')
+
+
+def plan_workers(specs, overrides=None, cpu_count: int = None, memory_mb: float = None) -> dict:
+    """
+    Répartit cœurs et mémoire entre les services supervisés (ils partagent la
+    machine) : un worker chacun (ou le nombre forcé), puis un de plus à tour
+    de rôle tant que les threads tiennent dans les cœurs restants et la
+    mémoire dans le budget restant.
+    specs : [(dossier, mémoire Mo/worker, threads/worker, workers max)]
+    Returns: {dossier: workers}
+    """
+    overrides = overrides or {}
+    cpu_left = cpu_count or os.cpu_count() or 1
+    memory_left = (available_memory_mb() if memory_mb is None else memory_mb) * MEMORY_BUDGET_RATIO
+    workers = {}
+    for directory, memory, threads, _ in specs:
+        workers[directory] = overrides.get(directory, 1)
+        cpu_left -= workers[directory] * threads
+        memory_left -= workers[directory] * memory
+
+    growing = True
+    while growing:
+        growing = False
+        for directory, memory, threads, max_workers in specs:
+            if directory in overrides or workers[directory] >= max_workers:
+                continue
+            if threads <= cpu_left and memory <= memory_left:
+                workers[directory] += 1
+                cpu_left -= threads
+                memory_left -= memory
+                growing = True
+    return workers
+
+
+def wait_until_ready(port: int, timeout: float, processes) -> bool:
+    """Attend que /health réponde 200 (au moins un worker prêt)"""
+    url = f"http://127.0.0.1:{port}/health"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(p.poll() is not None for p in processes):
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            pass
+        time.sleep(0.5)
+    return False
+
+
+class Worker:
+    """Un processus uvicorn servant le socket partagé du service"""
+
+    def __init__(self, service, index: int):
+        self.service = service
+        self.index = index
+        self.process = None
+        self.started_at = 0.0
+        self.backoff = RESTART_BACKOFF_INITIAL
+        self.restart_at = None
+        self.restarts = 0
+
+    def start(self):
+        env = dict(
+            os.environ,
+            WORKER_INDEX=str(self.index),
+            WORKER_COUNT=str(self.service.workers),
+            WORKER_THREADS=str(self.service.threads_per_worker),
+        )
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--log-level", "warning"]
+        if self.service.sock is not None:
+            fd = self.service.sock.fileno()
+            command += ["--fd", str(fd)]
+            pass_fds = (fd,)
+        else:
+            command += ["--host", self.service.host, "--port", str(self.service.port)]
+            pass_fds = ()
+        self.process = subprocess.Popen(command, cwd=self.service.path, env=env, pass_fds=pass_fds)
+        self.started_at = time.monotonic()
+        self.restart_at = None
+
+    def check(self, now: float):
+        """Planifie puis effectue le redémarrage d'un worker mort, avec backoff"""
+        if self.process.poll() is None:
+            if now - self.started_at > STABLE_AFTER_SECONDS:
+                self.backoff = RESTART_BACKOFF_INITIAL
+            return
+        if self.restart_at is None:
+            self.restart_at = now + self.backoff
+            print(f"💥 {self.service.name} worker {self.index} arrêté "
+                  f"(code {self.process.returncode}), redémarrage dans {self.backoff:.0f}s")
+            self.backoff = min(self.backoff * 2, RESTART_BACKOFF_MAX)
+        elif now >= self.restart_at:
+            self.restarts += 1
+            self.start()
+            print(f"🔄 {self.service.name} worker {self.index} redémarré (PID: {self.process.pid})")
+
+
+class SupervisedService:
+    def __init__(self, name, directory, port, threads_per_worker, workers, host):
+        self.name = name
+        self.path = os.path.join(os.path.dirname(os.path.abspath(__file__)), directory)
+        self.directory = directory
+        self.port = port
+        self.host = host
+        self.threads_per_worker = threads_per_worker
+        self.workers = workers
+        self.sock = None
+        self.pool = []
+
+    def bind(self):
+        """Socket d'écoute partagé par tous les workers (pré-fork)"""
+        if os.name == 'nt':
+            # Pas de partage de descripteur sous Windows : un seul worker
+            self.workers = 1
+            return
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(2048)
+        self.sock.set_inheritable(True)
+
+    def start(self):
+        self.bind()
+        self.pool = [Worker(self, i) for i in range(self.workers)]
+        for worker in self.pool:
+            worker.start()
+
+    def processes(self):
+        return [w.process for w in self.pool if w.process is not None]
+
+
+class Supervisor:
+    """Démarre, surveille et arrête proprement les services"""
+
+    def __init__(self, services, ready_timeout: float):
+        self.services = services
+        self.ready_timeout = ready_timeout
+        self.stopping = False
+
+    def _request_stop(self, signum, frame):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+
+        try:
+            # Démarrage séquentiel : l'agent n'est lancé qu'une fois les backends prêts
+            for service in self.services:
+                if not os.path.exists(os.path.join(service.path, "main.py")):
+                    print(f"❌ Script non trouvé: {service.path}/main.py")
+                    continue
+                print(f"🚀 Lancement {service.name} sur port {service.port} "
+                      f"({service.workers} worker(s), {service.threads_per_worker} thread(s)/worker)...")
+                start_time = time.monotonic()
+                service.start()
+                if wait_until_ready(service.port, self.ready_timeout, service.processes()):
+                    print(f"✅ {service.name} prêt en {time.monotonic() - start_time:.1f}s")
+                else:
+                    print(f"⚠️  {service.name} non prêt après {self.ready_timeout:.0f}s "
+                          f"(surveillance maintenue)")
+                if self.stopping:
+                    return
+
+            print("\n🎉 Services supervisés. Ctrl+C pour tout arrêter proprement.")
+            while not self.stopping:
+                now = time.monotonic()
+                for service in self.services:
+                    for worker in service.pool:
+                        worker.check(now)
+                time.sleep(0.5)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        print("\n🛑 Arrêt des services...")
+        processes = [p for s in self.services for p in s.processes() if p.poll() is None]
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + SHUTDOWN_GRACE_SECONDS
+        for process in processes:
+            try:
+                process.wait(timeout=max(0.1, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        for service in self.services:
+            if service.sock is not None:
+                service.sock.close()
+        print(f"✅ {len(processes)} worker(s) arrêté(s)")
+
+
+def parse_worker_overrides(values) -> dict:
+    overrides = {}
+    for value in values or []:
+        directory, _, count = value.partition('=')
+        overrides[directory] = int(count)
+    return overrides
+
+
+def supervise_services(host: str, worker_overrides: dict, ready_timeout: float):
+    """Lancer les services en mode superviseur"""
+    print("🚀 DÉMARRAGE CALLCENTERAI SERVICES (superviseur)")
+    print("=" * 50)
+    print(f"🖥️  {os.cpu_count()} cœur(s), {available_memory_mb():.0f} Mo disponibles")
+
+    workers = plan_workers(
+        [(directory, memory_mb, threads, max_workers)
+         for _, directory, _, memory_mb, threads, max_workers in SUPERVISED_SERVICES],
+        worker_overrides
+    )
+    services = [
+        SupervisedService(name, directory, port, threads, workers[directory], host)
+        for name, directory, port, _, threads, _ in SUPERVISED_SERVICES
+    ]
+    Supervisor(services, ready_timeout).run()
+
+
 if __name__ == "__main__":
-    launch_services()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Lancement des services CallCenterAI")
+    parser.add_argument("--supervise", action="store_true",
+                        help="Superviseur : N workers/service, readiness, redémarrage")
+    parser.add_argument("--workers", action="append", metavar="SERVICE=N",
+                        help="Forcer le nombre de workers (ex: transformer_svc=2)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--ready-timeout", type=float, default=120.0,
+                        help="Attente max de /health par service (secondes)")
+    args = parser.parse_args()
+
+    if args.supervise:
+        supervise_services(args.host, parse_worker_overrides(args.workers), args.ready_timeout)
+    else:
+        launch_services()
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""
+Benchmark du moteur NumPy de tfidf_svc face au pipeline sklearn
+- coût d'import au démarrage (processus neufs)
+- parité des prédictions et probabilités sur le jeu de test
+- latence unitaire (p50/p99) et débit par taille de batch
+
+Usage: python scripts/bench_tfidf_engine.py [--model models/ticket_classifier_model.pkl]
+       [--compact models/ticket_classifier_compact.npz] [--test data/processed/test.parquet]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+TFIDF_SVC_DIR = Path(__file__).parent.parent / "tfidf_svc"
+sys.path.insert(0, str(TFIDF_SVC_DIR))
+
+from compact_model import CompactTfidfModel
+from data_io import TEST_PATH, read_dataset
+
+IMPORTS = {
+    'sklearn': "import joblib, scipy.sparse, sklearn.feature_extraction.text, sklearn.svm",
+    'numpy_engine': f"import sys; sys.path.insert(0, {str(TFIDF_SVC_DIR)!r}); import compact_model",
+}
+BATCH_SIZES = (1, 8, 32, 128, 512)
+
+
+def import_seconds(statement, repeats=5):
+    """Temps d'import mesuré dans un interpréteur neuf (meilleur de N)"""
+    code = f"import time\nstart = time.perf_counter()\n{statement}\nprint(time.perf_counter() - start)"
+    return min(
+        float(subprocess.run([sys.executable, '-c', code], capture_output=True,
+                             text=True, check=True).stdout)
+        for _ in range(repeats)
+    )
+
+
+def split_model(model):
+    """(vectorizer, classifieur, noms des classes) depuis le dict DVC ou le Pipeline"""
+    if isinstance(model, dict):
+        classifier = model['model']
+        return model['vectorizer'], classifier, model['label_encoder'].inverse_transform(classifier.classes_)
+    return model.named_steps['tfidf'], model.steps[-1][1], model.steps[-1][1].classes_
+
+
+def latency_percentiles(fn, texts):
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        fn([text])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {'p50_ms': float(np.percentile(latencies, 50)), 'p99_ms': float(np.percentile(latencies, 99))}
+
+
+def throughput(fn, texts, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        fn(texts[i:i + batch_size])
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--model', default='models/ticket_classifier_model.pkl')
+    parser.add_argument('--compact', default='models/ticket_classifier_compact.npz')
+    parser.add_argument('--test', default=TEST_PATH)
+    parser.add_argument('--samples', type=int, default=500, help="Tickets pour la latence unitaire")
+    parser.add_argument('--output', help="Rapport JSON optionnel")
+    args = parser.parse_args()
+
+    vectorizer, classifier, classes = split_model(joblib.load(args.model))
+    engine = CompactTfidfModel(args.compact)
+    texts = read_dataset(args.test, columns=['text'])['text'].astype(str).tolist()
+
+    def sklearn_predict(batch):
+        X = vectorizer.transform(batch)
+        return classifier.predict(X), classifier.predict_proba(X).max(axis=1)
+
+    print("📦 Import au démarrage...")
+    report = {'import_seconds': {name: import_seconds(stmt) for name, stmt in IMPORTS.items()}}
+
+    print(f"🔍 Parité sur {len(texts)} tickets de test...")
+    X = vectorizer.transform(texts)
+    expected = np.asarray(classes)[np.searchsorted(classifier.classes_, classifier.predict(X))]
+    report['parity'] = {
+        'prediction_agreement': float((engine.predict(texts) == expected).mean()),
+        'max_probability_gap': float(np.abs(engine.predict_proba(texts) - classifier.predict_proba(X)).max()),
+    }
+
+    print("⏱️  Latence et débit...")
+    sample = texts[:args.samples]
+    report['single_latency'] = {
+        'sklearn': latency_percentiles(sklearn_predict, sample),
+        'numpy_engine': latency_percentiles(engine.predict_with_confidence, sample),
+    }
+    report['throughput_per_s'] = {
+        name: {str(b): throughput(fn, texts, b) for b in BATCH_SIZES}
+        for name, fn in (('sklearn', sklearn_predict), ('numpy_engine', engine.predict_with_confidence))
+    }
+
+    print(f"\n{'':14s}{'sklearn':>12s}{'numpy':>12s}")
+    imports = report['import_seconds']
+    print(f"{'import (ms)':14s}{imports['sklearn'] * 1000:12.0f}{imports['numpy_engine'] * 1000:12.0f}")
+    for key in ('p50_ms', 'p99_ms'):
+        row = report['single_latency']
+        print(f"{key:14s}{row['sklearn'][key]:12.3f}{row['numpy_engine'][key]:12.3f}")
+    for b in BATCH_SIZES:
+        row = report['throughput_per_s']
+        print(f"{f'batch {b} (/s)':14s}{row['sklearn'][str(b)]:12.0f}{row['numpy_engine'][str(b)]:12.0f}")
+    parity = report['parity']
+    print(f"\nParité: {parity['prediction_agreement'] * 100:.2f}% des prédictions, "
+          f"écart de probabilité max {parity['max_probability_gap']:.2e}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Construction de l'index des plus proches voisins pour l'agent
+Vectorise data/processed/train_dedup.parquet avec le TF-IDF entraîné, projette en SVD
+tronquée et construit des tables LSH (hyperplans aléatoires) dans un
+artefact NumPy compact : models/knn_index.npz
+"""
+import yaml
+import json
+import sys
+import time
+import joblib
+import numpy as np
+from pathlib import Path
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+
+from knn_index import KnnIndex, write_index
+from data_io import TRAIN_DEDUP_PATH, TEST_PATH, read_dataset
+
+# Charger les paramètres
+with open('params.yaml', 'r') as f:
+    params = yaml.safe_load(f)
+
+index_params = params['knn_index']
+INDEX_PATH = 'models/knn_index.npz'
+
+
+def load_vectorizer(path):
+    """Vectorizer TF-IDF du modèle entraîné (dict DVC ou Pipeline sklearn)"""
+    model = joblib.load(path)
+    if isinstance(model, dict):
+        return model['vectorizer']
+    return model.named_steps['tfidf']
+
+
+print("🚀 Construction de l'index des plus proches voisins")
+
+# Charger les données
+print("📥 Chargement des données...")
+train_df = read_dataset(TRAIN_DEDUP_PATH, columns=['text', 'category'])
+test_df = read_dataset(TEST_PATH, columns=['text', 'category'])
+
+vectorizer = load_vectorizer('models/ticket_classifier_model.pkl')
+if vectorizer.analyzer != 'word' or vectorizer.strip_accents or vectorizer.norm != 'l2':
+    raise ValueError("Seul un TfidfVectorizer 'word', norm='l2', sans strip_accents est supporté")
+
+threshold = index_params['similarity_threshold']
+
+# Vectorisation + SVD tronquée
+print("🔤 Vectorisation TF-IDF + SVD...")
+X_train = vectorizer.transform(train_df['text'])
+svd = TruncatedSVD(n_components=index_params['n_components'], random_state=index_params['seed'])
+vectors = normalize(svd.fit_transform(X_train)).astype(np.float32)
+
+print("🗂️  Construction des tables LSH...")
+Path('models').mkdir(exist_ok=True)
+write_index(
+    INDEX_PATH, vectorizer, svd.components_, vectors, train_df['category'],
+    n_tables=index_params['n_tables'],
+    n_bits=index_params['n_bits'],
+    seed=index_params['seed'],
+    similarity_threshold=threshold
+)
+
+# Évaluation sur le test : taux de réponse directe et précision au seuil
+print("📊 Évaluation de l'index sur le test...")
+index = KnnIndex(INDEX_PATH)
+answered = correct = 0
+start_time = time.perf_counter()
+for text, category in zip(test_df['text'], test_df['category'].astype(str)):
+    result = index.query(text)
+    if result is not None and result[1] >= threshold:
+        answered += 1
+        correct += result[0] == category
+elapsed = time.perf_counter() - start_time
+
+metrics = {
+    'index_size': int(len(vectors)),
+    'n_components': int(vectors.shape[1]),
+    'explained_variance': float(svd.explained_variance_ratio_.sum()),
+    'artifact_mb': Path(INDEX_PATH).stat().st_size / 1024 ** 2,
+    'similarity_threshold': threshold,
+    'test_hit_rate': answered / len(test_df),
+    'test_hit_precision': correct / answered if answered else 0.0,
+    'query_latency_ms': elapsed / len(test_df) * 1000,
+}
+with open('models/knn_index_metrics.json', 'w') as f:
+    json.dump(metrics, f, indent=2)
+
+print(f"\n✅ Index construit: {INDEX_PATH} ({metrics['artifact_mb']:.1f} Mo)")
+print(f"   Tickets test servis par l'index: {metrics['test_hit_rate'] * 100:.1f}% "
+      f"(précision {metrics['test_hit_precision']:.4f})")
+print(f"   Latence de requête: {metrics['query_latency_ms']:.2f} ms")
@@ -0,0 +1,60 @@
+"""
+Lecture/écriture des datasets du pipeline DVC en Parquet
+Parquet (colonnes compressées zstd, types conservés) plutôt que CSV : pas de
+parsing ni d'inférence de types à chaque étape, et chaque étape ne lit que
+les colonnes dont elle a besoin. `category` est stockée en colonne
+dictionnaire (quelques catégories répétées sur toutes les lignes).
+Les chemins .csv restent lisibles (données brutes, fichiers externes).
+"""
+import time
+from pathlib import Path
+
+import pandas as pd
+
+TRAIN_PATH = 'data/processed/train.parquet'
+TEST_PATH = 'data/processed/test.parquet'
+TRAIN_DEDUP_PATH = 'data/processed/train_dedup.parquet'
+
+
+def write_dataset(df: pd.DataFrame, path):
+    """Parquet zstd, `category` encodée en dictionnaire"""
+    df = df.reset_index(drop=True)
+    if 'category' in df.columns:
+        df = df.assign(category=df['category'].astype('category'))
+    df.to_parquet(path, engine='pyarrow', compression='zstd', index=False)
+
+
+def read_dataset(path, columns=None) -> pd.DataFrame:
+    """Colonnes demandées seulement ; `category` relue en chaînes (comme depuis un CSV)"""
+    if str(path).endswith('.csv'):
+        return pd.read_csv(path, usecols=columns)
+    df = pd.read_parquet(path, engine='pyarrow', columns=columns)
+    if 'category' in df.columns:
+        df['category'] = df['category'].astype(str)
+    return df
+
+
+def storage_report(df: pd.DataFrame, parquet_path, tmp_dir, repeats=3) -> dict:
+    """Taille disque et temps de chargement Parquet vs CSV (meilleur de N)"""
+    csv_path = Path(tmp_dir) / (Path(parquet_path).stem + '.csv')
+    df.to_csv(csv_path, index=False)
+
+    def best_of(fn):
+        timings = []
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start_time)
+        return min(timings)
+
+    report = {
+        'csv_mb': csv_path.stat().st_size / 1024 ** 2,
+        'parquet_mb': Path(parquet_path).stat().st_size / 1024 ** 2,
+        'csv_load_seconds': best_of(lambda: pd.read_csv(csv_path)),
+        'parquet_load_seconds': best_of(lambda: read_dataset(parquet_path)),
+        'parquet_text_only_seconds': best_of(lambda: read_dataset(parquet_path, columns=['text'])),
+    }
+    csv_path.unlink()
+    report['size_ratio'] = report['parquet_mb'] / report['csv_mb']
+    report['load_speedup'] = report['csv_load_seconds'] / report['parquet_load_seconds']
+    return report
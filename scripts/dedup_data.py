@@ -0,0 +1,192 @@
+"""
+Normalisation et déduplication du train avant l'entraînement
+Le texte est normalisé (minuscules, accents, espaces) pour le hachage
+uniquement : le texte d'origine est conservé pour les modèles. Les doublons
+exacts sont retirés par hash du texte normalisé, puis les quasi-doublons par
+MinHash + LSH (signatures calculées par un pool de processus, paires
+candidates vérifiées sur la similarité de Jaccard estimée). Dans chaque
+groupe, le premier ticket est gardé avec la catégorie majoritaire du groupe.
+
+Avec dedup.measure_training (désactivé par défaut), le rapport mesure aussi
+le temps d'entraînement TF-IDF + SVM avant/après.
+
+Usage: python scripts/dedup_data.py
+"""
+import hashlib
+import json
+import time
+import unicodedata
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from data_io import TRAIN_PATH, TEST_PATH, TRAIN_DEDUP_PATH, read_dataset, write_dataset
+
+REPORT_PATH = 'data/processed/dedup_report.json'
+
+
+def normalize(text: str) -> str:
+    """Minuscules, accents retirés (NFKD), espaces compactés"""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    return ' '.join(''.join(c for c in text if not unicodedata.combining(c)).split())
+
+
+def permutations(num_perm: int, seed: int):
+    """Coefficients du hachage multiply-shift (un par permutation)"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash(normalized: str, shingle_size: int, a, b) -> np.ndarray:
+    """Signature MinHash des shingles de mots (arithmétique uint64 modulo 2^64)"""
+    words = normalized.split()
+    shingles = {' '.join(words[i:i + shingle_size]) for i in range(max(len(words) - shingle_size + 1, 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((hashes[:, None] * a + b) >> np.uint64(32)).min(axis=0)
+
+
+def process_chunk(args):
+    """Worker : normalisation, hash exact et signature MinHash d'un chunk"""
+    texts, shingle_size, num_perm, seed = args
+    a, b = permutations(num_perm, seed)
+    normalized = [normalize(t) for t in texts]
+    digests = [hashlib.blake2b(n.encode('utf-8'), digest_size=16).hexdigest() for n in normalized]
+    signatures = np.stack([minhash(n, shingle_size, a, b) for n in normalized]) if texts else \
+        np.empty((0, num_perm), dtype=np.uint64)
+    return digests, signatures
+
+
+def near_duplicate_groups(signatures: np.ndarray, bands: int, threshold: float) -> np.ndarray:
+    """Étiquette de groupe par ligne (union-find sur les paires LSH vérifiées)"""
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    parent = np.arange(n)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * rows))).ravel()
+        _, inverse = np.unique(keys, return_inverse=True)
+        # Lignes regroupées par bucket en un tri (au lieu d'un balayage par bucket)
+        order = np.argsort(inverse.ravel(), kind='stable')
+        starts = np.flatnonzero(np.diff(inverse.ravel()[order])) + 1
+        starts = np.concatenate(([0], starts))
+        sizes = np.diff(np.append(starts, n))
+        for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+            members = order[start:start + size]
+            head = members[0]
+            # Jaccard estimée = fraction de composantes MinHash égales
+            similarity = (signatures[members[1:]] == signatures[head]).mean(axis=1)
+            for other in members[1:][similarity >= threshold]:
+                ra, rb = find(head), find(other)
+                if ra != rb:
+                    parent[max(ra, rb)] = min(ra, rb)
+    return np.array([find(i) for i in range(n)])
+
+
+def deduplicate(df: pd.DataFrame, params: dict):
+    """(DataFrame dédupliqué, statistiques) ; l'ordre d'origine est conservé"""
+    texts = df['text'].astype(str).tolist()
+    chunk_size = params['chunk_size']
+    jobs = [(texts[i:i + chunk_size], params['shingle_size'], params['num_perm'], params['seed'])
+            for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=params['workers']) as pool:
+        results = list(pool.map(process_chunk, jobs))
+    digests = [d for chunk, _ in results for d in chunk]
+    signatures = np.concatenate([s for _, s in results]) if results else np.empty((0, params['num_perm']))
+
+    # Doublons exacts : même hash du texte normalisé
+    exact_group = pd.Series(digests).groupby(digests).ngroup().to_numpy()
+    first_of_exact = ~pd.Series(exact_group).duplicated().to_numpy()
+
+    # Quasi-doublons parmi les représentants restants
+    group = exact_group.copy()
+    kept = np.flatnonzero(first_of_exact)
+    near = near_duplicate_groups(signatures[kept], params['bands'], params['jaccard_threshold'])
+    representative_group = dict(zip(exact_group[kept], exact_group[kept][near]))
+    group = np.array([representative_group[g] for g in group])
+
+    # Un ticket par groupe, avec la catégorie majoritaire du groupe
+    work = df.assign(_group=group)
+    majority = work.groupby('_group')['category'].agg(lambda c: c.value_counts().index[0])
+    conflicts = int((work.groupby('_group')['category'].nunique() > 1).sum())
+    deduped = work[~work['_group'].duplicated()].copy()
+    deduped['category'] = deduped['_group'].map(majority)
+    deduped = deduped.drop(columns='_group')
+
+    stats = {
+        'input_rows': len(df),
+        'exact_duplicates': int(len(df) - first_of_exact.sum()),
+        'near_duplicates': int(first_of_exact.sum() - len(deduped)),
+        'output_rows': len(deduped),
+        'label_conflict_groups': conflicts,
+    }
+    return deduped, stats
+
+
+def training_seconds(train_df, test_df, train_params):
+    """Temps d'entraînement TF-IDF + SVM (mêmes paramètres que train_tfidf.py)"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.svm import SVC
+
+    start_time = time.perf_counter()
+    vectorizer = TfidfVectorizer(max_features=train_params['max_features'],
+                                 ngram_range=tuple(train_params['ngram_range']))
+    model = SVC(kernel=train_params['kernel'], C=train_params['C'], max_iter=train_params['max_iter'],
+                class_weight=train_params['class_weight'], probability=True, random_state=42)
+    model.fit(vectorizer.fit_transform(train_df['text']), train_df['category'])
+    elapsed = time.perf_counter() - start_time
+    accuracy = float((model.predict(vectorizer.transform(test_df['text'])) == test_df['category']).mean())
+    return elapsed, accuracy
+
+
+def main():
+    with open('params.yaml', 'r') as f:
+        params = yaml.safe_load(f)
+    dedup_params = params['dedup']
+
+    print("🚀 Normalisation et déduplication du train")
+    train_df = read_dataset(TRAIN_PATH, columns=['text', 'category']).dropna(subset=['text', 'category'])
+    start_time = time.perf_counter()
+    deduped, report = deduplicate(train_df, dedup_params)
+    report['dedup_seconds'] = time.perf_counter() - start_time
+    write_dataset(deduped, TRAIN_DEDUP_PATH)
+
+    print(f"   {report['exact_duplicates']} doublons exacts, {report['near_duplicates']} quasi-doublons "
+          f"retirés ({report['input_rows']} → {report['output_rows']} tickets, "
+          f"{report['dedup_seconds']:.1f} s)")
+
+    if dedup_params['measure_training']:
+        print("⏱️  Mesure du temps d'entraînement avant/après...")
+        test_df = read_dataset(TEST_PATH, columns=['text', 'category'])
+        before, accuracy_before = training_seconds(train_df, test_df, params['train_tfidf'])
+        after, accuracy_after = training_seconds(deduped, test_df, params['train_tfidf'])
+        report['training'] = {
+            'tfidf_seconds_before': before,
+            'tfidf_seconds_after': after,
+            'tfidf_seconds_saved': before - after,
+            'test_accuracy_before': accuracy_before,
+            'test_accuracy_after': accuracy_after,
+        }
+        print(f"   TF-IDF + SVM: {before:.1f} s → {after:.1f} s "
+              f"(accuracy {accuracy_before:.4f} → {accuracy_after:.4f})")
+    # Le fine-tuning Transformer est linéaire en nombre de tickets par époque
+    report['transformer_rows_saved_ratio'] = 1 - report['output_rows'] / max(report['input_rows'], 1)
+
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Train dédupliqué: {TRAIN_DEDUP_PATH}")
+
+
+if __name__ == '__main__':
+    main()
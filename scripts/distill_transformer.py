@@ -0,0 +1,207 @@
+"""
+Script de distillation du Transformer (DistilBERT-multilingual → étudiant compact)
+L'étudiant (moins de couches, dimension réduite) apprend les logits du
+professeur fine-tuné sur data/processed/train_dedup.parquet. Le rapport compare
+précision, latence et mémoire des deux modèles.
+"""
+import yaml
+import json
+import time
+import shutil
+import joblib
+import numpy as np
+import torch
+import torch.nn.functional as F
+from pathlib import Path
+from data_io import TRAIN_DEDUP_PATH, TEST_PATH, read_dataset
+from transformers import (
+    AutoTokenizer,
+    AutoModelForSequenceClassification,
+    DistilBertConfig,
+    DistilBertForSequenceClassification,
+)
+
+# Charger les paramètres
+with open('params.yaml', 'r') as f:
+    params = yaml.safe_load(f)
+
+distill_params = params['distill']
+torch.manual_seed(distill_params['seed'])
+
+TEACHER_DIR = Path(distill_params['teacher_dir'])
+STUDENT_DIR = Path(distill_params['student_dir'])
+MAX_LENGTH = distill_params['max_length']
+BATCH_SIZE = distill_params['batch_size']
+
+
+def encode(tokenizer, texts):
+    return tokenizer(list(texts), truncation=True, padding=True,
+                     max_length=MAX_LENGTH, return_tensors="pt")
+
+
+def batches(n, batch_size, shuffle=False):
+    order = torch.randperm(n) if shuffle else torch.arange(n)
+    for start in range(0, n, batch_size):
+        yield order[start:start + batch_size]
+
+
+@torch.no_grad()
+def predict_logits(model, tokenizer, texts):
+    model.eval()
+    logits = []
+    for idx in batches(len(texts), BATCH_SIZE):
+        inputs = encode(tokenizer, [texts[i] for i in idx.tolist()])
+        logits.append(model(**inputs).logits)
+    return torch.cat(logits)
+
+
+def build_student(teacher):
+    """Étudiant DistilBERT réduit ; embeddings initialisés par ACP du professeur"""
+    teacher_config = teacher.config
+    config = DistilBertConfig(
+        vocab_size=teacher_config.vocab_size,
+        max_position_embeddings=teacher_config.max_position_embeddings,
+        dim=distill_params['dim'],
+        n_layers=distill_params['n_layers'],
+        n_heads=distill_params['n_heads'],
+        hidden_dim=distill_params['hidden_dim'],
+        num_labels=teacher_config.num_labels,
+        id2label=teacher_config.id2label,
+        label2id=teacher_config.label2id,
+        pad_token_id=teacher_config.pad_token_id,
+    )
+    student = DistilBertForSequenceClassification(config)
+
+    # Projection des embeddings du professeur sur leurs `dim` composantes principales
+    teacher_embeddings = teacher.get_input_embeddings().weight.detach()
+    if config.dim == teacher_embeddings.shape[1]:
+        student.get_input_embeddings().weight.data.copy_(teacher_embeddings)
+    else:
+        mean = teacher_embeddings.mean(dim=0, keepdim=True)
+        _, _, components = torch.pca_lowrank(teacher_embeddings - mean, q=config.dim, center=False)
+        projected = (teacher_embeddings - mean) @ components
+        projected *= teacher_embeddings.std() / projected.std()
+        student.get_input_embeddings().weight.data.copy_(projected)
+    return student
+
+
+def distillation_loss(student_logits, teacher_logits, labels):
+    """alpha * KL(professeur || étudiant) à température T + (1 - alpha) * CE"""
+    temperature = distill_params['temperature']
+    alpha = distill_params['alpha']
+    soft = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=-1),
+        F.softmax(teacher_logits / temperature, dim=-1),
+        reduction='batchmean'
+    ) * temperature ** 2
+    hard = F.cross_entropy(student_logits, labels)
+    return alpha * soft + (1 - alpha) * hard
+
+
+@torch.no_grad()
+def measure_latency(model, tokenizer, texts):
+    """Latence par ticket unitaire (ms) : p50 / p95 / p99"""
+    model.eval()
+    sample = texts[:distill_params['latency_samples']]
+    model(**encode(tokenizer, sample[:1]))  # échauffement
+    latencies = []
+    for text in sample:
+        start_time = time.perf_counter()
+        model(**encode(tokenizer, [text]))
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+    }
+
+
+def model_memory_mb(model):
+    """Mémoire des poids (paramètres + buffers) en Mo"""
+    n_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+    n_bytes += sum(b.numel() * b.element_size() for b in model.buffers())
+    return n_bytes / 1024 ** 2
+
+
+def directory_size_mb(path: Path):
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file()) / 1024 ** 2
+
+
+print("🚀 Démarrage de la distillation du Transformer")
+
+# Charger les données
+print("📥 Chargement des données...")
+train_df = read_dataset(TRAIN_DEDUP_PATH, columns=['text', 'category'])
+test_df = read_dataset(TEST_PATH, columns=['text', 'category'])
+
+label_encoder = joblib.load(TEACHER_DIR / 'label_encoder.pkl')
+train_texts = train_df['text'].tolist()
+test_texts = test_df['text'].tolist()
+train_labels = torch.tensor(label_encoder.transform(train_df['category']))
+test_labels = label_encoder.transform(test_df['category'])
+
+# Professeur
+print(f"🧠 Chargement du professeur: {TEACHER_DIR}")
+tokenizer = AutoTokenizer.from_pretrained(TEACHER_DIR, use_fast=True)
+teacher = AutoModelForSequenceClassification.from_pretrained(TEACHER_DIR)
+teacher.eval()
+
+# Logits du professeur calculés une seule fois pour toutes les époques
+print("📊 Calcul des logits du professeur...")
+teacher_train_logits = predict_logits(teacher, tokenizer, train_texts)
+
+# Étudiant
+student = build_student(teacher)
+print(f"🎓 Étudiant: {distill_params['n_layers']} couches, dim {distill_params['dim']} "
+      f"({sum(p.numel() for p in student.parameters()) / 1e6:.1f}M paramètres vs "
+      f"{sum(p.numel() for p in teacher.parameters()) / 1e6:.1f}M)")
+
+optimizer = torch.optim.AdamW(student.parameters(), lr=distill_params['learning_rate'])
+for epoch in range(1, distill_params['epochs'] + 1):
+    student.train()
+    total_loss = 0.0
+    for idx in batches(len(train_texts), BATCH_SIZE, shuffle=True):
+        inputs = encode(tokenizer, [train_texts[i] for i in idx.tolist()])
+        loss = distillation_loss(student(**inputs).logits, teacher_train_logits[idx], train_labels[idx])
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        total_loss += loss.item() * len(idx)
+    print(f"   Époque {epoch}: loss {total_loss / len(train_texts):.4f}")
+
+# Sauvegarde de l'étudiant (format attendu par transformer_svc)
+print("💾 Sauvegarde de l'étudiant...")
+STUDENT_DIR.mkdir(parents=True, exist_ok=True)
+student.save_pretrained(STUDENT_DIR)
+tokenizer.save_pretrained(STUDENT_DIR)
+shutil.copy(TEACHER_DIR / 'label_encoder.pkl', STUDENT_DIR / 'label_encoder.pkl')
+
+# Rapport professeur vs étudiant
+print("📊 Évaluation professeur vs étudiant...")
+report = {}
+for name, model, path in [('teacher', teacher, TEACHER_DIR), ('student', student, STUDENT_DIR)]:
+    predictions = predict_logits(model, tokenizer, test_texts).argmax(dim=-1).numpy()
+    report[name] = {
+        'test_accuracy': float((predictions == test_labels).mean()),
+        'latency': measure_latency(model, tokenizer, test_texts),
+        'parameters_millions': sum(p.numel() for p in model.parameters()) / 1e6,
+        'memory_mb': model_memory_mb(model),
+        'disk_mb': directory_size_mb(path),
+    }
+
+report['comparison'] = {
+    'accuracy_delta': report['student']['test_accuracy'] - report['teacher']['test_accuracy'],
+    'p50_speedup': report['teacher']['latency']['p50_ms'] / report['student']['latency']['p50_ms'],
+    'memory_ratio': report['student']['memory_mb'] / report['teacher']['memory_mb'],
+}
+
+with open('models/distill_report.json', 'w') as f:
+    json.dump(report, f, indent=2)
+
+print("\n✅ Distillation terminée !")
+for name in ('teacher', 'student'):
+    r = report[name]
+    print(f"   {name:8s} accuracy {r['test_accuracy']:.4f} | p50 {r['latency']['p50_ms']:.1f} ms "
+          f"| {r['memory_mb']:.0f} Mo")
+print(f"   Gain latence x{report['comparison']['p50_speedup']:.2f}, "
+      f"mémoire x{report['comparison']['memory_ratio']:.2f}")
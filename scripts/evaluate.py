@@ -0,0 +1,175 @@
+"""
+Évaluation des modèles (TF-IDF, Transformer) sur le split de test
+Le test est découpé en chunks scorés en parallèle par un pool de processus
+(un modèle chargé par worker). Pour chaque modèle : précision/rappel/F1 par
+catégorie, débit mesuré (tickets/s, chargement exclu) et percentiles de
+latence par ticket unitaire, pour que DVC suive les régressions de vitesse
+au même titre que la précision.
+
+Usage: python scripts/evaluate.py
+"""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.metrics import classification_report
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tfidf_svc"))
+
+from data_io import TEST_PATH, read_dataset
+
+REPORT_PATH = 'models/evaluation.json'
+PER_CLASS_PATH = 'models/per_class_metrics.csv'
+
+# Prédicteur du worker courant (chargé une fois par processus)
+_PREDICT = None
+
+
+def load_predictor(kind, path, threads, batch_size):
+    """Fonction textes → catégories pour un artefact donné"""
+    if kind == 'tfidf':
+        if path.endswith('.npz'):
+            from compact_model import CompactTfidfModel
+            return CompactTfidfModel(path).predict
+
+        import joblib
+        bundle = joblib.load(path)
+
+        def predict_pickle(texts):
+            predictions = bundle['model'].predict(bundle['vectorizer'].transform(texts))
+            return bundle['label_encoder'].inverse_transform(predictions)
+        return predict_pickle
+
+    if kind == 'transformer':
+        import joblib
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        # Les workers se partagent les cœurs : pas de sur-souscription torch
+        torch.set_num_threads(threads)
+        tokenizer = AutoTokenizer.from_pretrained(path, use_fast=True)
+        model = AutoModelForSequenceClassification.from_pretrained(path).eval()
+        label_encoder = joblib.load(os.path.join(path, 'label_encoder.pkl'))
+
+        @torch.no_grad()
+        def predict_transformer(texts):
+            predicted = []
+            for start in range(0, len(texts), batch_size):
+                inputs = tokenizer(list(texts[start:start + batch_size]), truncation=True,
+                                   padding=True, max_length=128, return_tensors="pt")
+                predicted.extend(model(**inputs).logits.argmax(dim=-1).tolist())
+            return label_encoder.inverse_transform(predicted)
+        return predict_transformer
+
+    raise ValueError(f"Type de modèle inconnu: {kind} (tfidf|transformer)")
+
+
+def _init_worker(kind, path, threads, batch_size):
+    global _PREDICT
+    _PREDICT = load_predictor(kind, path, threads, batch_size)
+
+
+def _score_chunk(texts):
+    return list(_PREDICT(texts))
+
+
+def _single_latencies(texts):
+    """Latence par ticket unitaire (ms), comme une requête /predict"""
+    _PREDICT(texts[:1])  # échauffement
+    latencies = []
+    for text in texts:
+        start_time = time.perf_counter()
+        _PREDICT([text])
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return latencies
+
+
+def evaluate_model(spec, texts, y_true, eval_params):
+    workers = spec.get('workers', 1)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    chunk_size = eval_params['chunk_size']
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+    # spawn : torch n'est pas sûr après fork d'un processus multithreadé
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                             initializer=_init_worker,
+                             initargs=(spec['kind'], spec['path'], threads,
+                                       eval_params['transformer_batch_size'])) as pool:
+        # Démarrage et chargement des workers hors chronomètre
+        list(pool.map(_score_chunk, [texts[:1]] * workers))
+
+        start_time = time.perf_counter()
+        predictions = [p for chunk in pool.map(_score_chunk, chunks) for p in chunk]
+        elapsed = time.perf_counter() - start_time
+
+        latencies = pool.submit(_single_latencies, texts[:eval_params['latency_samples']]).result()
+
+    report = classification_report(y_true, predictions, output_dict=True, zero_division=0)
+    classes = sorted(set(y_true) | set(predictions))
+    return {
+        'artifact': spec['path'],
+        'workers': workers,
+        'accuracy': float(report['accuracy']),
+        'macro_f1': float(report['macro avg']['f1-score']),
+        'weighted_f1': float(report['weighted avg']['f1-score']),
+        'per_class': {
+            c: {
+                'precision': float(report[c]['precision']),
+                'recall': float(report[c]['recall']),
+                'f1': float(report[c]['f1-score']),
+                'support': int(report[c]['support']),
+            }
+            for c in classes
+        },
+        'throughput_per_s': len(texts) / elapsed,
+        'latency': {
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+        },
+    }
+
+
+def main():
+    with open('params.yaml', 'r') as f:
+        eval_params = yaml.safe_load(f)['evaluate']
+
+    print("🚀 Évaluation des modèles sur le split de test")
+    test_df = read_dataset(TEST_PATH, columns=['text', 'category'])
+    texts = test_df['text'].astype(str).tolist()
+    y_true = test_df['category'].astype(str).tolist()
+
+    results = {}
+    for name, spec in eval_params['models'].items():
+        if not Path(spec['path']).exists():
+            print(f"⚠️  {name}: artefact introuvable ({spec['path']}), ignoré")
+            continue
+        print(f"📊 {name}: {len(texts)} tickets, {spec.get('workers', 1)} worker(s)...")
+        results[name] = evaluate_model(spec, texts, y_true, eval_params)
+        r = results[name]
+        print(f"   accuracy {r['accuracy']:.4f} | macro F1 {r['macro_f1']:.4f} | "
+              f"{r['throughput_per_s']:.0f} tickets/s | p50 {r['latency']['p50_ms']:.2f} ms "
+              f"| p99 {r['latency']['p99_ms']:.2f} ms")
+
+    Path('models').mkdir(exist_ok=True)
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    pd.DataFrame([
+        {'model': name, 'category': category, **scores}
+        for name, r in results.items()
+        for category, scores in r['per_class'].items()
+    ], columns=['model', 'category', 'precision', 'recall', 'f1', 'support']).to_csv(PER_CLASS_PATH, index=False)
+
+    print(f"\n✅ Rapport d'évaluation: {REPORT_PATH}")
+
+
+if __name__ == '__main__':
+    main()
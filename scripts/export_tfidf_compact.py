@@ -0,0 +1,110 @@
+"""
+Export du modèle TF-IDF + SVM en artefact compact pour tfidf_svc
+Retire l'état d'entraînement du pickle (vocabulary_ dict, stop_words_,
+vecteurs de support) et mesure le gain de chargement et de mémoire (RSS)
+dans des processus Python séparés.
+"""
+import json
+import sys
+import subprocess
+import joblib
+import numpy as np
+from pathlib import Path
+
+TFIDF_SVC_DIR = Path(__file__).parent.parent / "tfidf_svc"
+sys.path.insert(0, str(TFIDF_SVC_DIR))
+
+from compact_model import CompactTfidfModel, export_compact
+from data_io import TEST_PATH, read_dataset
+
+PICKLE_PATH = 'models/ticket_classifier_model.pkl'
+COMPACT_PATH = 'models/ticket_classifier_compact.npz'
+
+# Chargement dans un processus neuf : imports compris, comme au démarrage du service
+LOAD_PROBES = {
+    'pickle': (
+        "import joblib\n"
+        "model = joblib.load({path!r})\n"
+    ),
+    'compact': (
+        "import sys\n"
+        "sys.path.insert(0, {svc_dir!r})\n"
+        "from compact_model import CompactTfidfModel\n"
+        "model = CompactTfidfModel({path!r})\n"
+    ),
+}
+# VmHWM (pic RSS du processus) : ru_maxrss hérite du parent à travers exec sous Linux
+PROBE_TEMPLATE = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "{load}"
+    "elapsed = time.perf_counter() - start\n"
+    "hwm = [l.split()[1] for l in open('/proc/self/status') if l.startswith('VmHWM')][0]\n"
+    "print(elapsed, hwm)\n"
+)
+
+
+def measure_load(kind, path, repeats=3):
+    """Temps de chargement (imports inclus) et RSS max du processus, meilleur de N"""
+    code = PROBE_TEMPLATE.format(load=LOAD_PROBES[kind].format(path=path, svc_dir=str(TFIDF_SVC_DIR)))
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        elapsed, max_rss_kb = out.stdout.split()
+        runs.append((float(elapsed), int(max_rss_kb) / 1024))
+    return {
+        'load_seconds': min(r[0] for r in runs),
+        'max_rss_mb': min(r[1] for r in runs),
+        'artifact_mb': Path(path).stat().st_size / 1024 ** 2,
+    }
+
+
+def split_model(model):
+    """(vectorizer, SVC, noms des classes) depuis le dict DVC ou le Pipeline sklearn"""
+    if isinstance(model, dict):
+        classifier = model['model']
+        return model['vectorizer'], classifier, model['label_encoder'].inverse_transform(classifier.classes_)
+    vectorizer, classifier = model.named_steps['tfidf'], model.steps[-1][1]
+    return vectorizer, classifier, classifier.classes_
+
+
+print("🚀 Export du modèle TF-IDF compact")
+
+model = joblib.load(PICKLE_PATH)
+vectorizer, classifier, classes = split_model(model)
+export_compact(COMPACT_PATH, vectorizer, classifier, classes)
+print(f"💾 Artefact compact: {COMPACT_PATH}")
+
+# Parité avec le pickle sur le jeu de test
+print("📊 Vérification de la parité sur le test...")
+test_texts = read_dataset(TEST_PATH, columns=['text'])['text'].tolist()
+compact = CompactTfidfModel(COMPACT_PATH)
+X_test = vectorizer.transform(test_texts)
+expected = np.asarray(classes)[np.searchsorted(classifier.classes_, classifier.predict(X_test))]
+agreement = float((compact.predict(test_texts) == expected).mean())
+proba_gap = float(np.abs(compact.predict_proba(test_texts) - classifier.predict_proba(X_test)).max())
+
+print("⏱️  Mesure du chargement (processus séparés)...")
+report = {
+    'pickle': measure_load('pickle', PICKLE_PATH),
+    'compact': measure_load('compact', COMPACT_PATH),
+    'parity': {
+        'prediction_agreement': agreement,
+        'max_probability_gap': proba_gap,
+    },
+}
+report['comparison'] = {
+    'load_speedup': report['pickle']['load_seconds'] / report['compact']['load_seconds'],
+    'rss_saved_mb': report['pickle']['max_rss_mb'] - report['compact']['max_rss_mb'],
+    'size_ratio': report['compact']['artifact_mb'] / report['pickle']['artifact_mb'],
+}
+
+with open('models/compact_export_report.json', 'w') as f:
+    json.dump(report, f, indent=2)
+
+print("\n✅ Export terminé !")
+for kind in ('pickle', 'compact'):
+    r = report[kind]
+    print(f"   {kind:8s} {r['artifact_mb']:.2f} Mo | chargement {r['load_seconds'] * 1000:.0f} ms "
+          f"| RSS {r['max_rss_mb']:.0f} Mo")
+print(f"   Parité: {agreement * 100:.2f}% des prédictions, écart de probabilité max {proba_gap:.2e}")
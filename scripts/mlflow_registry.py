@@ -1,9 +1,18 @@
 """
 Script de gestion du MLflow Model Registry
 Enregistre et promeut les modèles entre Staging et Production
+La promotion en Production passe par un benchmark de performance (perf_gate)
+comparé à la version en Production.
 """
+import sys
+import tempfile
+from pathlib import Path
 import mlflow
 from mlflow.tracking import MlflowClient
+from perf_gate import load_budgets, bench_texts, benchmark_artifacts, check_budgets
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from common.artifact_cache import CHECKSUM_TAG, directory_checksum
 
 # Configuration
 TRACKING_URI = "http://localhost:5000"
@@ -68,6 +77,13 @@ def register_best_model():
         version_number = model_version.version
         print(f"✅ Version {version_number} enregistrée")
         
+        # Checksum des artefacts du run, vérifié par le cache local des services
+        with tempfile.TemporaryDirectory() as tmp:
+            mlflow.artifacts.download_artifacts(run_id=run_id, dst_path=tmp)
+            checksum = directory_checksum(tmp)
+        client.set_model_version_tag(MODEL_NAME, version_number, CHECKSUM_TAG, checksum)
+        print(f"🔒 Checksum des artefacts: {checksum[:16]}")
+        
         return version_number
         
     except Exception as e:
@@ -91,8 +107,52 @@ def promote_to_staging(version=None):
     )
     print(f"🔄 Version {version} promue en Staging")
 
-def promote_to_production(version=None):
-    """Promouvoir un modèle en Production"""
+def benchmark_version(version, texts, budgets):
+    """Benchmark standardisé d'une version ; métriques loggées dans son run (bench_*)"""
+    model_version = client.get_model_version(MODEL_NAME, version)
+    with tempfile.TemporaryDirectory() as tmp:
+        for artifact in ('tfidf_vectorizer.pkl', 'svm_model.pkl'):
+            mlflow.artifacts.download_artifacts(
+                run_id=model_version.run_id, artifact_path=artifact, dst_path=tmp
+            )
+        results = benchmark_artifacts(tmp, texts, budgets)
+    for key, value in results.items():
+        client.log_metric(model_version.run_id, f"bench_{key}", value)
+    return results
+
+def passes_perf_gate(version, production_version=None):
+    """Benchmark du candidat et comparaison aux budgets face à la Production"""
+    budgets = load_budgets()
+    texts = bench_texts(budgets)
+    
+    print(f"⏱️  Benchmark de la version {version} ({len(texts)} tickets)...")
+    try:
+        candidate = benchmark_version(version, texts, budgets)
+    except Exception as e:
+        print(f"⛔ Benchmark du candidat impossible: {e}")
+        return False
+    print(f"   p99 {candidate['p99_ms']:.2f} ms | {candidate['throughput_per_s']:.0f} tickets/s "
+          f"| mémoire {candidate['model_memory_mb']:.1f} Mo")
+    
+    if production_version is None or str(production_version) == str(version):
+        return True
+    
+    print(f"⏱️  Benchmark de la Production (version {production_version})...")
+    try:
+        production = benchmark_version(production_version, texts, budgets)
+    except Exception as e:
+        print(f"⚠️  Production non mesurable ({e}), pas de comparaison")
+        return True
+    print(f"   p99 {production['p99_ms']:.2f} ms | {production['throughput_per_s']:.0f} tickets/s "
+          f"| mémoire {production['model_memory_mb']:.1f} Mo")
+    
+    violations = check_budgets(candidate, production, budgets)
+    for violation in violations:
+        print(f"⛔ Budget dépassé: {violation}")
+    return not violations
+
+def promote_to_production(version=None, force=False):
+    """Promouvoir un modèle en Production (refusé si les budgets de perf sont dépassés)"""
     if version is None:
         # Récupérer la version en Staging
         versions = client.get_latest_versions(MODEL_NAME, stages=["Staging"])
@@ -101,8 +161,14 @@ def promote_to_production(version=None):
             return
         version = versions[0].version
     
-    # Archiver l'ancienne version en Production
     prod_versions = client.get_latest_versions(MODEL_NAME, stages=["Production"])
+    if not force:
+        production_version = prod_versions[0].version if prod_versions else None
+        if not passes_perf_gate(version, production_version):
+            print(f"❌ Promotion de la version {version} refusée (--force pour passer outre)")
+            return
+    
+    # Archiver l'ancienne version en Production
     for pv in prod_versions:
         client.transition_model_version_stage(
             name=MODEL_NAME,
@@ -137,13 +203,12 @@ def list_models():
         print(f"❌ Erreur: {e}")
 
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python mlflow_registry.py register    # Enregistrer le meilleur modèle")
         print("  python mlflow_registry.py staging     # Promouvoir en Staging")
-        print("  python mlflow_registry.py production  # Promouvoir en Production")
+        print("  python mlflow_registry.py production  # Promouvoir en Production (gate de perf)")
+        print("  python mlflow_registry.py production --force  # Sans gate de perf")
         print("  python mlflow_registry.py list        # Lister les modèles")
         sys.exit(1)
     
@@ -156,7 +221,7 @@ if __name__ == "__main__":
     elif action == "staging":
         promote_to_staging()
     elif action == "production":
-        promote_to_production()
+        promote_to_production(force="--force" in sys.argv[2:])
     elif action == "list":
         list_models()
     else:
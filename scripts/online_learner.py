@@ -0,0 +1,218 @@
+"""
+Apprentissage en ligne du modèle TF-IDF à partir des corrections des agents
+Lit le journal de feedback de l'agent (POST /feedback) depuis son dernier
+offset, met à jour un SGDClassifier par partial_fit sur le vocabulaire TF-IDF
+figé de l'artefact compact (corrections pondérées + rejeu d'un échantillon du
+train contre l'oubli), puis publie périodiquement un artefact versionné que
+tfidf_svc recharge à chaud via le pointeur LATEST.
+
+Une version n'est publiée que si sa précision sur le test reste à moins de
+`max_accuracy_drop` du modèle de base ; les catégories inconnues du modèle de
+base sont ignorées (elles demandent un réentraînement complet).
+
+L'état repris (learner_state.pkl) porte la somme de contrôle de l'artefact de
+base : les colonnes du SGD sont celles de son vocabulaire. Si l'artefact a été
+réentraîné ou réexporté, le SGD est réinitialisé et tout le feedback rejoué.
+
+Usage: python scripts/online_learner.py [--once]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import yaml
+from scipy.sparse import csr_matrix, vstack
+from sklearn.linear_model import SGDClassifier
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tfidf_svc"))
+
+from compact_model import CompactTfidfModel, export_with_classifier
+from model_store import LATEST_POINTER
+from data_io import TRAIN_PATH, TEST_PATH, read_dataset
+
+# Charger les paramètres
+with open('params.yaml', 'r') as f:
+    params = yaml.safe_load(f)
+
+online_params = params['online_learning']
+OUTPUT_DIR = Path(online_params['output_dir'])
+STATE_PATH = OUTPUT_DIR / 'learner_state.pkl'
+MANIFEST_PATH = OUTPUT_DIR / 'manifest.json'
+
+
+def features(base, texts):
+    """TF-IDF du vocabulaire figé, en CSR pour sklearn"""
+    rows, columns, weights = base.transform_sparse(texts)
+    return csr_matrix((weights, (rows, columns)), shape=(len(texts), len(base.terms)))
+
+
+def file_checksum(path) -> str:
+    """SHA-256 du fichier (lecture par blocs)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_feedback(path, offset):
+    """Nouvelles lignes complètes du journal depuis `offset` → (corrections, nouvel offset)"""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return [], offset
+    if size < offset:
+        print("⚠️  Journal de feedback tronqué, relecture depuis le début")
+        offset = 0
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    # Une ligne en cours d'écriture sera lue au tour suivant
+    end = data.rfind(b'\n') + 1
+    records = []
+    for line in data[:end].splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            print(f"⚠️  Ligne de feedback invalide ignorée: {line[:80]!r}")
+    return records, offset + end
+
+
+def bootstrap(base, X_train, y_train, rng):
+    """SGD initial entraîné sur le train (mêmes features que le service)"""
+    classifier = SGDClassifier(
+        loss=online_params['loss'],
+        alpha=online_params['alpha'],
+        random_state=online_params['seed']
+    )
+    batch_size = online_params['batch_size']
+    for epoch in range(online_params['bootstrap_epochs']):
+        order = rng.permutation(len(y_train))
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            classifier.partial_fit(X_train[idx], y_train[idx], classes=base.classes_)
+    return classifier
+
+
+def update(classifier, base, records, X_train, y_train, rng):
+    """partial_fit sur les corrections (pondérées) + rejeu d'exemples du train"""
+    known = [r for r in records if r.get('category') in set(base.classes_) and r.get('text')]
+    skipped = len(records) - len(known)
+    if skipped:
+        print(f"⚠️  {skipped} correction(s) ignorée(s) : catégorie inconnue du modèle de base")
+    if not known:
+        return 0
+
+    replay = rng.choice(len(y_train), size=online_params['replay_ratio'] * len(known))
+    X = vstack([features(base, [r['text'] for r in known]), X_train[replay]])
+    y = np.concatenate([[r['category'] for r in known], y_train[replay]])
+    weights = np.concatenate([
+        np.full(len(known), online_params['feedback_weight']),
+        np.ones(len(replay))
+    ])
+    classifier.partial_fit(X, y, sample_weight=weights)
+    return len(known)
+
+
+def publish(state, base, accuracy):
+    """Artefact versionné écrit puis pointeur LATEST remplacé atomiquement"""
+    state['version'] += 1
+    name = f"tfidf_v{state['version']:04d}.npz"
+    tmp = OUTPUT_DIR / f"{name}.tmp.npz"
+    export_with_classifier(str(tmp), base, state['classifier'], state['classifier'].classes_)
+    os.replace(tmp, OUTPUT_DIR / name)
+
+    pointer = OUTPUT_DIR / f"{LATEST_POINTER}.tmp"
+    pointer.write_text(name)
+    os.replace(pointer, OUTPUT_DIR / LATEST_POINTER)
+
+    manifest = json.loads(MANIFEST_PATH.read_text()) if MANIFEST_PATH.exists() else []
+    manifest.append({
+        'version': name,
+        'published_at': time.time(),
+        'test_accuracy': accuracy,
+        'feedback_applied': state['feedback_applied'],
+    })
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2))
+
+    # Ménage : on ne garde que les dernières versions
+    versions = sorted(OUTPUT_DIR.glob('tfidf_v*.npz'))
+    for old in versions[:-online_params['keep_versions']]:
+        old.unlink()
+    return name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apprentissage en ligne depuis le feedback des agents")
+    parser.add_argument('--once', action='store_true', help="Un seul tour (cron / tests)")
+    args = parser.parse_args()
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(online_params['seed'])
+
+    print("🚀 Démarrage de l'apprenant en ligne")
+    base = CompactTfidfModel(online_params['base_model'])
+    train_df = read_dataset(TRAIN_PATH, columns=['text', 'category'])
+    test_df = read_dataset(TEST_PATH, columns=['text', 'category'])
+    train_df = train_df[train_df['category'].isin(base.classes_)]
+    X_train, y_train = features(base, train_df['text'].tolist()), train_df['category'].to_numpy(str)
+    X_test, y_test = features(base, test_df['text'].tolist()), test_df['category'].to_numpy(str)
+    base_accuracy = float((base.predict(test_df['text'].tolist()) == y_test).mean())
+    print(f"📊 Précision du modèle de base: {base_accuracy:.4f}")
+
+    base_checksum = file_checksum(online_params['base_model'])
+    state = joblib.load(STATE_PATH) if STATE_PATH.exists() else None
+    if state is not None and state.get('base_checksum') != base_checksum:
+        print("⚠️  Artefact de base modifié depuis l'état sauvegardé (vocabulaire différent) : "
+              "réinitialisation du SGD et rejeu du feedback")
+        # Numérotation conservée : une nouvelle version ne réutilise jamais un nom publié
+        state = {'version': state['version']}
+    elif state is not None:
+        print(f"📂 État repris: offset {state['offset']}, version {state['version']}")
+
+    if state is None or 'classifier' not in state:
+        print("🔄 Initialisation du SGD sur le train...")
+        state = {
+            'classifier': bootstrap(base, X_train, y_train, rng),
+            'base_checksum': base_checksum,
+            'offset': 0,
+            'pending': 0,
+            'feedback_applied': 0,
+            'version': state['version'] if state else 0,
+            'last_publish': 0.0,
+        }
+
+    while True:
+        records, state['offset'] = read_feedback(online_params['feedback_log'], state['offset'])
+        applied = update(state['classifier'], base, records, X_train, y_train, rng)
+        state['pending'] += applied
+        state['feedback_applied'] += applied
+        if applied:
+            print(f"📝 {applied} correction(s) appliquée(s) ({state['pending']} en attente de publication)")
+
+        due = time.time() - state['last_publish'] >= online_params['publish_interval_s']
+        if state['pending'] >= online_params['min_feedback'] and (due or args.once):
+            accuracy = float((state['classifier'].predict(X_test) == y_test).mean())
+            if accuracy >= base_accuracy - online_params['max_accuracy_drop']:
+                name = publish(state, base, accuracy)
+                print(f"✅ Version publiée: {name} (précision test {accuracy:.4f})")
+                state['pending'] = 0
+            else:
+                print(f"⛔ Publication refusée: précision {accuracy:.4f} < base {base_accuracy:.4f} "
+                      f"- {online_params['max_accuracy_drop']}")
+            state['last_publish'] = time.time()
+
+        joblib.dump(state, STATE_PATH)
+        if args.once:
+            break
+        time.sleep(online_params['poll_interval_s'])
+
+
+if __name__ == '__main__':
+    main()
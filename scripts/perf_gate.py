@@ -0,0 +1,114 @@
+"""
+Benchmark standardisé et budgets de performance pour la promotion en Production
+Chaque artefact (tfidf_vectorizer.pkl + svm_model.pkl d'un run MLflow) est
+mesuré dans un processus Python neuf, sur les mêmes tickets du test : latence
+par ticket unitaire (p50/p95/p99), débit en batch et mémoire ajoutée par le
+chargement du modèle. Le candidat est refusé si p99, mémoire ou débit se
+dégradent au-delà des budgets de params.yaml (perf_gate) par rapport à la
+version en Production, mesurée sur la même machine au même moment.
+"""
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import yaml
+
+from data_io import TEST_PATH, read_dataset
+
+# Exécuté dans un processus neuf : imports hors mesure, mémoire du modèle seul
+BENCH_PROBE = """
+import json, sys, time
+import joblib
+import numpy as np
+import sklearn.svm, sklearn.feature_extraction.text
+
+def status_mb(field):
+    line = [l for l in open('/proc/self/status') if l.startswith(field)][0]
+    return int(line.split()[1]) / 1024
+
+artifact_dir, texts_path, latency_samples, batch_size, repeats = sys.argv[1:6]
+texts = json.load(open(texts_path))
+rss_before = status_mb('VmRSS')
+
+start = time.perf_counter()
+vectorizer = joblib.load(artifact_dir + '/tfidf_vectorizer.pkl')
+model = joblib.load(artifact_dir + '/svm_model.pkl')
+load_seconds = time.perf_counter() - start
+
+def predict(batch):
+    return model.predict(vectorizer.transform(batch))
+
+predict(texts[:8])  # échauffement
+latencies = []
+for text in texts[:int(latency_samples)]:
+    start = time.perf_counter()
+    predict([text])
+    latencies.append((time.perf_counter() - start) * 1000)
+
+batch_size = int(batch_size)
+best = float('inf')
+for _ in range(int(repeats)):
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        predict(texts[i:i + batch_size])
+    best = min(best, time.perf_counter() - start)
+
+print(json.dumps({
+    'load_seconds': load_seconds,
+    'p50_ms': float(np.percentile(latencies, 50)),
+    'p95_ms': float(np.percentile(latencies, 95)),
+    'p99_ms': float(np.percentile(latencies, 99)),
+    'throughput_per_s': len(texts) / best,
+    'model_memory_mb': status_mb('VmHWM') - rss_before,
+}))
+"""
+
+
+def load_budgets(path='params.yaml'):
+    with open(path, 'r') as f:
+        return yaml.safe_load(f)['perf_gate']
+
+
+def bench_texts(budgets, path=TEST_PATH):
+    """Jeu de tickets fixe (mêmes textes pour le candidat et la Production)"""
+    return read_dataset(path, columns=['text'])['text'].astype(str).head(budgets['bench_samples']).tolist()
+
+
+def benchmark_artifacts(artifact_dir, texts, budgets):
+    """Mesure un artefact dans un sous-processus → dict de métriques"""
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+        json.dump(texts, f)
+        texts_path = f.name
+    try:
+        out = subprocess.run(
+            [sys.executable, '-c', BENCH_PROBE, str(artifact_dir), texts_path,
+             str(budgets['latency_samples']), str(budgets['batch_size']), str(budgets['repeats'])],
+            capture_output=True, text=True, check=True
+        )
+    finally:
+        Path(texts_path).unlink()
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def check_budgets(candidate, production, budgets):
+    """Liste des dépassements de budget du candidat (vide = promotion autorisée)"""
+    violations = []
+
+    p99_limit = production['p99_ms'] * (1 + budgets['max_p99_regression']) + budgets['latency_slack_ms']
+    if candidate['p99_ms'] > p99_limit:
+        violations.append(f"p99 {candidate['p99_ms']:.2f} ms > {p99_limit:.2f} ms "
+                          f"(Production {production['p99_ms']:.2f} ms)")
+
+    memory_limit = production['model_memory_mb'] * (1 + budgets['max_memory_regression']) + budgets['memory_slack_mb']
+    if candidate['model_memory_mb'] > memory_limit:
+        violations.append(f"mémoire {candidate['model_memory_mb']:.1f} Mo > {memory_limit:.1f} Mo "
+                          f"(Production {production['model_memory_mb']:.1f} Mo)")
+
+    throughput_floor = production['throughput_per_s'] * (1 - budgets['max_throughput_drop'])
+    if candidate['throughput_per_s'] < throughput_floor:
+        violations.append(f"débit {candidate['throughput_per_s']:.0f}/s < {throughput_floor:.0f}/s "
+                          f"(Production {production['throughput_per_s']:.0f}/s)")
+
+    return violations
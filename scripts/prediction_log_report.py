@@ -0,0 +1,82 @@
+"""
+Analyse hors ligne du journal des prédictions (data/predictions/)
+Les segments gzip sont lus en flux (mémoire constante pour le résumé) :
+volume par route et par version de modèle, catégories, latences, part de
+prédictions peu confiantes. --parquet exporte les enregistrements pour le
+réentraînement (jointure avec data/feedback/feedback.jsonl via text_hash).
+
+Usage: python scripts/prediction_log_report.py [--dir data/predictions] [--since-hours 24]
+                                               [--service agent] [--parquet out.parquet]
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from common.prediction_log import read_predictions
+
+
+def summarize(records, low_confidence=0.5, latency_samples=100000, seed=0) -> dict:
+    """Résumé en une passe ; percentiles sur un échantillon réservoir des latences"""
+    rng = np.random.default_rng(seed)
+    routes, categories, versions = Counter(), Counter(), Counter()
+    latencies = []
+    total = low = 0
+    for record in records:
+        total += 1
+        routes[record['route']] += 1
+        categories[record['category']] += 1
+        versions[record.get('model_version')] += 1
+        # Les similarités cosinus (index kNN) ne sont pas des probabilités
+        if (record['confidence'] is not None and record.get('confidence_type', 'probability') == 'probability'
+                and record['confidence'] < low_confidence):
+            low += 1
+        if len(latencies) < latency_samples:
+            latencies.append(record['latency_ms'])
+        else:
+            slot = rng.integers(total)
+            if slot < latency_samples:
+                latencies[slot] = record['latency_ms']
+    summary = {
+        'predictions': total,
+        'routes': dict(routes.most_common()),
+        'categories': dict(categories.most_common()),
+        'model_versions': {str(v): n for v, n in versions.most_common()},
+        'low_confidence_ratio': low / total if total else 0.0,
+    }
+    if latencies:
+        summary['latency_ms'] = {f'p{q}': float(np.percentile(latencies, q)) for q in (50, 95, 99)}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Résumé du journal des prédictions")
+    parser.add_argument('--dir', default='data/predictions')
+    parser.add_argument('--service', default=None, help="agent, web_interface (défaut : tous)")
+    parser.add_argument('--since-hours', type=float, default=None)
+    parser.add_argument('--parquet', default=None, help="Exporte les enregistrements en Parquet")
+    args = parser.parse_args()
+
+    since = time.time() - args.since_hours * 3600 if args.since_hours else None
+    records = read_predictions(args.dir, service=args.service, since=since)
+
+    if args.parquet:
+        import pandas as pd
+        sys.path.insert(0, str(Path(__file__).parent))
+        from data_io import write_dataset
+
+        df = pd.DataFrame(records)
+        write_dataset(df, args.parquet)
+        print(f"✅ {len(df)} prédictions exportées: {args.parquet}")
+        records = df.to_dict('records')
+
+    print(json.dumps(summarize(records), indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,18 @@
 Script de préparation des données pour DVC pipeline
 """
 import pandas as pd
+import numpy as np
 import yaml
 import json
+import sys
+import tempfile
 from pathlib import Path
 from sklearn.model_selection import train_test_split
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from common.data_profile import build_profile
+from data_io import TRAIN_PATH, TEST_PATH, write_dataset, storage_report
+
 # Charger les paramètres
 with open('params.yaml', 'r') as f:
     params = yaml.safe_load(f)
@@ -18,13 +25,14 @@ Path('data/processed').mkdir(parents=True, exist_ok=True)
 
 # Charger les données
 print("📥 Chargement des données brutes...")
-df = pd.read_csv('../all_tickets_processed_improved_v3.csv')
+df = pd.read_csv('../all_tickets_processed_improved_v3.csv', usecols=['text', 'category'])
 
 # Nettoyage basique
 print("🧹 Nettoyage des données...")
 df = df.dropna(subset=['text', 'category'])
-df = df[df['text'].str.len() >= prepare_params['min_text_length']]
-df = df[df['text'].str.len() <= prepare_params['max_text_length']]
+lengths = df['text'].str.len().to_numpy()
+keep = (lengths >= prepare_params['min_text_length']) & (lengths <= prepare_params['max_text_length'])
+df, lengths = df[keep], lengths[keep]
 
 # Split train/test
 print("✂️ Séparation train/test...")
@@ -35,19 +43,37 @@ train_df, test_df = train_test_split(
     stratify=df['category']
 )
 
-# Sauvegarder
-train_df.to_csv('data/processed/train.csv', index=False)
-test_df.to_csv('data/processed/test.csv', index=False)
+# Sauvegarder en Parquet (category en colonne dictionnaire)
+write_dataset(train_df, TRAIN_PATH)
+write_dataset(test_df, TEST_PATH)
+
+# Comparaison CSV / Parquet (taille, chargement) pour les métriques DVC
+with tempfile.TemporaryDirectory() as tmp:
+    storage = {'train': storage_report(train_df, TRAIN_PATH, tmp), 'test': storage_report(test_df, TEST_PATH, tmp)}
+with open('data/processed/storage_report.json', 'w') as f:
+    json.dump(storage, f, indent=2)
+print(f"💾 Parquet: {storage['train']['size_ratio']:.0%} de la taille CSV, "
+      f"chargement x{storage['train']['load_speedup']:.1f}")
+
+# Profil de référence du train (une passe) : comparé au trafic réel par les services
+print("📊 Profil des données d'entraînement...")
+profile = build_profile(train_df['text'], train_df['category'],
+                        prepare_params['profile_vocab_size'], prepare_params['profile_min_count'])
+with open('data/processed/train_profile.json', 'w', encoding='utf-8') as f:
+    json.dump(profile, f, ensure_ascii=False)
 
-# Statistiques
+# Statistiques (longueurs déjà calculées au filtrage, catégories en un np.unique)
+categories, category_counts = np.unique(df['category'].to_numpy(str), return_counts=True)
+order = np.argsort(-category_counts, kind='stable')
 stats = {
     'total_samples': len(df),
     'train_samples': len(train_df),
     'test_samples': len(test_df),
-    'num_categories': df['category'].nunique(),
-    'categories': df['category'].value_counts().to_dict(),
-    'avg_text_length': float(df['text'].str.len().mean()),
-    'test_size': prepare_params['test_size']
+    'num_categories': len(categories),
+    'categories': {categories[i]: int(category_counts[i]) for i in order},
+    'avg_text_length': float(lengths.mean()),
+    'test_size': prepare_params['test_size'],
+    'train_vocab_coverage': profile['vocab_coverage']
 }
 
 with open('data/processed/data_stats.json', 'w') as f:
@@ -56,4 +82,4 @@ with open('data/processed/data_stats.json', 'w') as f:
 print(f"✅ Préparation terminée !")
 print(f"   Train: {len(train_df)} échantillons")
 print(f"   Test: {len(test_df)} échantillons")
-print(f"   Catégories: {df['category'].nunique()}")
+print(f"   Catégories: {len(categories)}")
@@ -0,0 +1,207 @@
+"""
+Simulateur hors-ligne de politique de routage
+Rejoue un journal JSONL de tickets à travers une politique candidate et
+estime la charge du transformer et la latence avant déploiement.
+
+Chaque ligne du journal contient au minimum {"text": ...} et peut contenir :
+- "timestamp" : epoch en secondes (pour estimer le débit de pointe)
+- "tfidf_confidence" : confiance TF-IDF observée
+- "model_used" + "latency_ms" : latences mesurées, utilisées pour calibrer
+  le modèle de latence par backend
+
+Charge vue par les règles de délestage (<backend>_inflight_*, _latency_ms_*) :
+- --load transformer=12,tfidf=3 : instantané fixe de requêtes en vol
+- sinon, si tous les tickets sont horodatés : requêtes en vol rejouées
+  (chaque ticket occupe son backend pendant sa latence, loi de Little)
+- sinon les règles de charge ne peuvent pas être évaluées : elles sont
+  listées dans le rapport ("unevaluated_rules")
+
+Usage:
+  python scripts/simulate_routing_policy.py --log traffic.jsonl \\
+      --policy candidate.yaml [--baseline agent/routing_policy.yaml] \\
+      [--load transformer=12,tfidf=3] [--output report.json]
+"""
+import argparse
+import heapq
+import json
+import statistics
+import sys
+from collections import Counter, defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+
+from routing_features import extract_routing_features
+from routing_policy import RoutingPolicy, RoutingContext, ROUTES
+
+DEFAULT_POLICY_PATH = Path(__file__).parent.parent / "agent" / "routing_policy.yaml"
+
+# Latences par défaut (ms) si le journal ne permet pas de les calibrer
+DEFAULT_LATENCY_MS = {'tfidf': 15.0, 'transformer': 120.0}
+
+
+def load_log(path: str) -> list:
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'text' not in record:
+                raise ValueError(f"Ligne {line_number}: champ 'text' manquant")
+            records.append(record)
+    return records
+
+
+def calibrate_latency(records: list) -> dict:
+    """Latence médiane observée par backend (défauts sinon)"""
+    observed = defaultdict(list)
+    for record in records:
+        if record.get('model_used') in DEFAULT_LATENCY_MS and 'latency_ms' in record:
+            observed[record['model_used']].append(float(record['latency_ms']))
+    return {
+        model: statistics.median(observed[model]) if observed[model] else default
+        for model, default in DEFAULT_LATENCY_MS.items()
+    }
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def parse_load(spec: str) -> dict:
+    """'transformer=12,tfidf=3' → {'transformer': 12, 'tfidf': 3} (requêtes en vol)"""
+    inflight = {}
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        backend, _, value = part.partition('=')
+        if backend.strip() not in ROUTES:
+            raise ValueError(f"Backend inconnu dans --load: '{backend.strip()}'")
+        inflight[backend.strip()] = int(value)
+    return inflight
+
+
+def simulate(policy: RoutingPolicy, records: list, latency_ms: dict, fixed_load: dict = None) -> dict:
+    """Rejoue le journal et agrège routes, règles, latences et débit"""
+    routes = Counter()
+    rules = Counter()
+    latencies = []
+    transformer_per_second = Counter()
+
+    if fixed_load is not None:
+        load_model = 'fixed'
+    elif records and all('timestamp' in r for r in records):
+        load_model = 'arrivals'
+        records = sorted(records, key=lambda r: float(r['timestamp']))
+    else:
+        load_model = None
+    # Fins de requêtes en cours par backend (mode 'arrivals')
+    completions = {backend: [] for backend in ROUTES}
+
+    for record in records:
+        if load_model == 'fixed':
+            inflight = {backend: fixed_load.get(backend, 0) for backend in ROUTES}
+        elif load_model == 'arrivals':
+            now = float(record['timestamp'])
+            for heap in completions.values():
+                while heap and heap[0] <= now:
+                    heapq.heappop(heap)
+            inflight = {backend: len(heap) for backend, heap in completions.items()}
+        load = {} if load_model is None else {
+            backend: {'inflight': inflight[backend], 'latency_ms': latency_ms[backend]}
+            for backend in ROUTES
+        }
+        context = RoutingContext(
+            features=extract_routing_features(record['text']),
+            tfidf_confidence=record.get('tfidf_confidence'),
+            load=load
+        )
+        decision = policy.evaluate(context)
+        if load_model == 'arrivals':
+            heapq.heappush(completions[decision.route], now + latency_ms[decision.route] / 1000)
+        routes[decision.route] += 1
+        rules[decision.rule] += 1
+        latencies.append(latency_ms[decision.route])
+        if decision.route == 'transformer' and 'timestamp' in record:
+            transformer_per_second[int(float(record['timestamp']))] += 1
+
+    total = len(records) or 1
+    peak_rps = max(transformer_per_second.values(), default=0)
+    return {
+        'policy': policy.version,
+        'tickets': len(records),
+        'load_model': load_model,
+        # Règles de délestage jamais évaluables sans modèle de charge
+        'unevaluated_rules': [] if load_model else [r.name for r in policy.rules if r.uses_load],
+        'routes': dict(routes),
+        'rules': dict(rules),
+        'transformer_share': routes['transformer'] / total,
+        'latency_ms': {
+            'mean': statistics.fmean(latencies) if latencies else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+        },
+        'transformer_peak_rps': peak_rps,
+        # Loi de Little : requêtes simultanées = débit x latence
+        'transformer_peak_concurrency': peak_rps * latency_ms['transformer'] / 1000,
+    }
+
+
+def print_report(report: dict):
+    print(f"\n📋 Politique: {report['policy']} ({report['tickets']} tickets)")
+    for route, count in sorted(report['routes'].items()):
+        print(f"   • {route}: {count}")
+    print(f"   Part transformer: {report['transformer_share'] * 100:.1f}%")
+    if report['unevaluated_rules']:
+        print(f"   ⚠️  Sans modèle de charge (ni --load ni horodatage), règles jamais déclenchées: "
+              f"{', '.join(report['unevaluated_rules'])}")
+    latency = report['latency_ms']
+    print(f"   Latence estimée: moy {latency['mean']:.1f} ms | "
+          f"p95 {latency['p95']:.1f} ms | p99 {latency['p99']:.1f} ms")
+    if report['transformer_peak_rps']:
+        print(f"   Pointe transformer: {report['transformer_peak_rps']} req/s "
+              f"(~{report['transformer_peak_concurrency']:.1f} en vol)")
+    print("   Règles déclenchées:")
+    for rule, count in sorted(report['rules'].items(), key=lambda x: -x[1]):
+        print(f"     - {rule}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation de politique de routage")
+    parser.add_argument("--log", required=True, help="Journal JSONL de tickets")
+    parser.add_argument("--policy", default=str(DEFAULT_POLICY_PATH), help="Politique candidate")
+    parser.add_argument("--baseline", help="Politique de référence pour comparaison")
+    parser.add_argument("--load", help="Requêtes en vol fixes, ex: transformer=12,tfidf=3")
+    parser.add_argument("--output", help="Fichier JSON du rapport")
+    args = parser.parse_args()
+
+    records = load_log(args.log)
+    latency_ms = calibrate_latency(records)
+    fixed_load = parse_load(args.load) if args.load else None
+    print(f"📥 {len(records)} tickets chargés")
+    print(f"⏱️  Latences par backend: {latency_ms}")
+
+    report = {'candidate': simulate(RoutingPolicy.from_file(args.policy), records, latency_ms, fixed_load)}
+    print_report(report['candidate'])
+
+    if args.baseline:
+        report['baseline'] = simulate(RoutingPolicy.from_file(args.baseline), records, latency_ms, fixed_load)
+        print_report(report['baseline'])
+        delta = report['candidate']['transformer_share'] - report['baseline']['transformer_share']
+        print(f"\n📊 Écart de part transformer vs référence: {delta * 100:+.1f} points")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Rapport sauvegardé: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
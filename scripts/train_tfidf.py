@@ -13,6 +13,7 @@ from sklearn.svm import SVC
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support, confusion_matrix
 from sklearn.preprocessing import LabelEncoder
 import numpy as np
+from data_io import TRAIN_DEDUP_PATH, TEST_PATH, read_dataset
 
 # Charger les paramètres
 with open('params.yaml', 'r') as f:
@@ -28,8 +29,8 @@ print("🚀 Démarrage de l'entraînement TF-IDF + SVM")
 
 # Charger les données
 print("📥 Chargement des données...")
-train_df = pd.read_csv('data/processed/train.csv')
-test_df = pd.read_csv('data/processed/test.csv')
+train_df = read_dataset(TRAIN_DEDUP_PATH, columns=['text', 'category'])
+test_df = read_dataset(TEST_PATH, columns=['text', 'category'])
 
 X_train, y_train = train_df['text'], train_df['category']
 X_test, y_test = test_df['text'], test_df['category']
@@ -142,15 +143,6 @@ with mlflow.start_run():
     cm_df_export = pd.DataFrame(cm_records)
     cm_df_export.to_csv('models/confusion_matrix.csv', index=False)
     
-    # Historique d'entraînement (simulation pour le plot)
-    training_history = {
-        'epoch': list(range(1, 11)),
-        'accuracy': [train_accuracy * (0.7 + i * 0.03) for i in range(10)]
-    }
-    
-    with open('models/training_history.json', 'w') as f:
-        json.dump(training_history, f, indent=2)
-    
     print(f"\n✅ Entraînement terminé !")
     print(f"   Train Accuracy: {train_accuracy:.4f}")
     print(f"   Test Accuracy: {test_accuracy:.4f}")
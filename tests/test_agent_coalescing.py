@@ -0,0 +1,66 @@
+"""
+Tests du coalescing single-flight de l'agent
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+
+from coalescing import SingleFlight, normalize_text
+
+
+def test_normalize_text():
+    """Casse et espaces n'affectent pas la clé"""
+    assert normalize_text("  Réseau   DOWN\n site X ") == "réseau down site x"
+
+
+def test_concurrent_identical_calls_share_one_backend_call():
+    """Les requêtes identiques en vol partagent un seul appel"""
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+    results = []
+
+    def backend():
+        calls.append(1)
+        release.wait(timeout=2)
+        return {"category": "Network"}
+
+    def worker():
+        results.append(flight.do(("tfidf", "network down"), backend))
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for t in threads:
+        t.start()
+    # Laisser les suiveurs rejoindre l'appel en vol
+    while flight.stats()["backend_calls_saved"] < 9:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r[0] == {"category": "Network"} for r in results)
+    assert sum(1 for r in results if r[1]) == 9
+    assert flight.stats() == {
+        "backend_calls_executed": 1,
+        "backend_calls_saved": 9,
+        "in_flight": 0
+    }
+
+
+def test_errors_propagate_and_key_is_released():
+    """Une erreur du leader est propagée puis la clé est libérée"""
+    flight = SingleFlight()
+
+    def failing():
+        raise RuntimeError("backend down")
+
+    with pytest.raises(RuntimeError):
+        flight.do("k", failing)
+
+    assert flight.do("k", lambda: 42) == (42, False)
@@ -0,0 +1,105 @@
+"""
+Tests du mode ensemble de l'agent : appels parallèles et combinaison pondérée des probabilités
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+
+from ensemble import apply_temperature, blend, fan_out, parse_model_values
+
+
+TFIDF = {"category": "Hardware", "confidence": 0.55,
+         "probabilities": {"Hardware": 0.55, "Network": 0.35, "Access": 0.10}}
+TRANSFORMER = {"category": "Network", "confidence": 0.7,
+               "probabilities": {"Hardware": 0.2, "Network": 0.7, "Access": 0.1}}
+
+
+def test_weighted_blend_picks_combined_argmax():
+    weights = parse_model_values("tfidf=0.4, transformer=0.6")
+    assert weights == {"tfidf": 0.4, "transformer": 0.6}
+
+    result = blend({"tfidf": TFIDF, "transformer": TRANSFORMER}, weights)
+
+    assert result["category"] == "Network"
+    assert result["confidence"] == pytest.approx(0.4 * 0.35 + 0.6 * 0.7, abs=1e-4)
+    assert sum(result["probabilities"].values()) == pytest.approx(1.0, abs=1e-3)
+    # Avec plus de poids sur le TF-IDF, son avis l'emporte
+    assert blend({"tfidf": TFIDF, "transformer": TRANSFORMER},
+                 {"tfidf": 0.8, "transformer": 0.2})["category"] == "Hardware"
+
+
+def test_single_answer_keeps_its_distribution_and_weights_renormalize():
+    result = blend({"tfidf": TFIDF}, {"tfidf": 0.4, "transformer": 0.6})
+
+    assert result["category"] == "Hardware"
+    assert result["weights"] == {"tfidf": 1.0}
+    assert result["probabilities"]["Hardware"] == pytest.approx(0.55)
+
+    # Réponse sans distribution (ancien backend) : seule la catégorie prédite compte
+    legacy = blend({"tfidf": {"category": "Access", "confidence": 0.9}}, {})
+    assert (legacy["category"], legacy["confidence"]) == ("Access", 0.9)
+
+
+def test_temperature_softens_an_overconfident_model():
+    sharp = {"Hardware": 0.9, "Network": 0.1}
+    softened = apply_temperature(sharp, 2.0)
+
+    assert softened["Hardware"] < 0.9
+    assert sum(softened.values()) == pytest.approx(1.0)
+    assert apply_temperature(sharp, 1.0) is sharp
+
+
+def _slow_fetch(delays, calls):
+    """fetch_prediction simulé : chaque modèle répond après son délai"""
+    def fetch(model, text, timeout):
+        calls.append((model, timeout))
+        time.sleep(delays[model])
+        if delays[model] > timeout:
+            raise TimeoutError(model)
+        return TFIDF if model == "tfidf" else TRANSFORMER
+    return fetch
+
+
+def test_fan_out_calls_backends_concurrently_with_bounded_timeout():
+    calls = []
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        start_time = time.perf_counter()
+        results, missing, errors = fan_out(
+            executor, _slow_fetch({"tfidf": 0.2, "transformer": 0.2}, calls),
+            ["tfidf", "transformer"], "écran noir", deadline=1.0, grace=0.5
+        )
+        elapsed = time.perf_counter() - start_time
+
+    assert set(results) == {"tfidf", "transformer"} and missing == {} and errors == []
+    # En parallèle : proche du plus lent (0.2 s), pas de la somme (0.4 s)
+    assert elapsed < 0.35
+    assert sorted(timeout for _, timeout in calls) == [1.5, 1.5]
+
+
+def test_fan_out_answers_with_the_backend_inside_the_deadline():
+    calls = []
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        start_time = time.perf_counter()
+        results, missing, errors = fan_out(
+            executor, _slow_fetch({"tfidf": 0.01, "transformer": 0.6}, calls),
+            ["tfidf", "transformer"], "écran noir", deadline=0.1, grace=0.05
+        )
+        elapsed = time.perf_counter() - start_time
+
+        assert list(results) == ["tfidf"] and missing == {"transformer": "deadline"}
+        assert elapsed < 0.3
+        assert blend(results, {"tfidf": 0.4, "transformer": 0.6})["category"] == "Hardware"
+
+        # Aucun modèle dans la deadline ni la grâce : rien n'est attendu au-delà
+        start_time = time.perf_counter()
+        results, missing, _ = fan_out(
+            executor, _slow_fetch({"tfidf": 0.6, "transformer": 0.6}, calls),
+            ["tfidf", "transformer"], "écran noir", deadline=0.05, grace=0.05
+        )
+        assert results == {} and set(missing) == {"tfidf", "transformer"}
+        assert time.perf_counter() - start_time < 0.3
@@ -0,0 +1,27 @@
+"""
+Tests du journal de feedback de l'agent
+"""
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+
+from feedback import FeedbackLog
+from common.fingerprint import text_hash
+
+
+def test_corrections_are_appended_as_json_lines(tmp_path):
+    log = FeedbackLog(str(tmp_path / "feedback" / "feedback.jsonl"))
+    log.append("Imprimante bloquée", "Hardware", predicted_category="Access", model_used="tfidf")
+    log.append("VPN down", "Network")
+
+    lines = (tmp_path / "feedback" / "feedback.jsonl").read_text(encoding="utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [r["category"] for r in records] == ["Hardware", "Network"]
+    assert records[0]["text"] == "Imprimante bloquée"
+    # Même empreinte que le journal des prédictions, pour la jointure
+    assert records[0]["text_hash"] == text_hash("Imprimante bloquée")
+    assert records[0]["predicted_category"] == "Access"
+    assert log.recorded == 2
@@ -0,0 +1,62 @@
+"""
+Tests de l'index des plus proches voisins de l'agent
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+
+from knn_index import KnnIndex, write_index
+
+TICKETS = [
+    ("My VPN connection drops every hour from home", "Network"),
+    ("Cannot connect to the VPN since this morning", "Network"),
+    ("The office wifi is very slow on the third floor", "Network"),
+    ("Printer on floor two is jammed again", "Hardware"),
+    ("Laptop battery does not charge anymore", "Hardware"),
+    ("Screen flickers when docking the laptop", "Hardware"),
+    ("Please reset my password for the HR portal", "Access"),
+    ("Need access to the finance shared drive", "Access"),
+    ("Account locked after too many login attempts", "Access"),
+    ("Invoice for last month was charged twice", "Billing"),
+    ("Refund request for duplicate payment", "Billing"),
+    ("Update the billing address on our invoice", "Billing"),
+]
+
+
+def build(tmp_path, **vectorizer_params):
+    texts = [t for t, _ in TICKETS]
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), **vectorizer_params).fit(texts)
+    X = vectorizer.transform(texts)
+    svd = TruncatedSVD(n_components=8, random_state=0).fit(X)
+    path = tmp_path / "knn_index.npz"
+    write_index(path, vectorizer, svd.components_, normalize(svd.transform(X)),
+                [c for _, c in TICKETS], n_tables=6, n_bits=4, seed=0, similarity_threshold=0.9)
+    return KnnIndex(str(path)), vectorizer, svd
+
+
+def test_numpy_embedding_matches_sklearn(tmp_path):
+    index, vectorizer, svd = build(tmp_path, stop_words='english', sublinear_tf=True)
+    text = "VPN keeps dropping, cannot connect to the VPN from home!"
+    expected = normalize(svd.transform(vectorizer.transform([text])))[0]
+    assert np.allclose(index.embed(text), expected, atol=1e-5)
+
+
+def test_known_ticket_is_answered_by_nearest_neighbour(tmp_path):
+    index, _, _ = build(tmp_path)
+    category, similarity = index.query("please reset my password for the hr portal")
+    assert category == "Access"
+    assert similarity > 0.99
+    # Seuil choisi au build, stocké avec l'index
+    assert abs(index.similarity_threshold - 0.9) < 1e-6
+
+
+def test_unknown_vocabulary_returns_none(tmp_path):
+    index, _, _ = build(tmp_path)
+    assert index.query("zzz qqq") is None
+    assert index.query("") is None
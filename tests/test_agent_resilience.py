@@ -0,0 +1,68 @@
+"""
+Tests des circuit breakers de l'agent
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+
+from resilience import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_consecutive_failures():
+    """Le circuit s'ouvre au seuil d'échecs consécutifs"""
+    breaker = CircuitBreaker('transformer', failure_threshold=3, clock=FakeClock())
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+
+def test_slow_calls_trip_the_breaker():
+    """Les appels plus lents que le seuil comptent comme des échecs"""
+    breaker = CircuitBreaker('transformer', failure_threshold=2,
+                             slow_call_seconds=1.0, clock=FakeClock())
+    breaker.record_success(0.2)
+    breaker.record_success(5.0)
+    breaker.record_success(5.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_allows_single_probe():
+    """Après reset_timeout un seul appel test passe"""
+    clock = FakeClock()
+    breaker = CircuitBreaker('transformer', failure_threshold=1,
+                             reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 11
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["transitions"] == {
+        "closed->open": 1,
+        "open->half_open": 1,
+        "half_open->closed": 1
+    }
+
+
+def test_failed_probe_reopens_circuit():
+    clock = FakeClock()
+    breaker = CircuitBreaker('transformer', failure_threshold=1,
+                             reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 11
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
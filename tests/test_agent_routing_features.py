@@ -0,0 +1,42 @@
+"""
+Tests de l'extracteur de features de routage de l'agent
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "agent"))
+
+from routing_features import extract_routing_features
+
+
+@pytest.mark.parametrize("text, language", [
+    ("My laptop does not start anymore", "en"),
+    ("Bonjour, je n'arrive pas à me connecter", "fr"),
+    ("Ma facture est incorrecte", "fr"),
+    ("Hola, no puedo acceder a mi cuenta", "es"),
+    ("Ich kann nicht drucken, der Drucker zeigt einen Fehler", "de"),
+    ("Non posso accedere, la stampante non funziona", "it"),
+    ("Não consigo acessar minha conta", "pt"),
+    ("لا أستطيع الدخول إلى حسابي", "ar"),
+    ("Не могу войти в систему", "ru"),
+    ("", "en"),
+])
+def test_language_detection(text, language):
+    assert extract_routing_features(text).language == language
+
+
+def test_english_majority_beats_isolated_foreign_word():
+    """Un mot isolé ('assistance') ne fait plus basculer un ticket anglais"""
+    features = extract_routing_features("I need assistance with my account password")
+    assert features.language == "en"
+    # Égalité (printer / red) : l'anglais l'emporte
+    assert extract_routing_features("Printer shows red light").language == "en"
+
+
+def test_word_count_and_script():
+    features = extract_routing_features("  Printer on floor 3\tis jammed  ")
+    assert features.word_count == 6
+    assert features.script == "latin"
+    assert extract_routing_features("لا أستطيع").script == "arabic"
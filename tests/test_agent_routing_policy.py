@@ -0,0 +1,109 @@
+"""
+Tests de la politique de routage configurable de l'agent
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+AGENT_DIR = Path(__file__).parent.parent / "agent"
+sys.path.insert(0, str(AGENT_DIR))
+
+from load_tracker import BackendLoad, LoadTracker
+from routing_features import extract_routing_features
+from routing_policy import (
+    DEFAULT_POLICY, PolicyError, PolicyStore, RoutingContext, RoutingPolicy
+)
+
+
+def route(policy, text, **kwargs):
+    context = RoutingContext(features=extract_routing_features(text), **kwargs)
+    return policy.evaluate(context)
+
+
+@pytest.mark.parametrize("policy", [
+    RoutingPolicy(DEFAULT_POLICY),
+    RoutingPolicy.from_file(str(AGENT_DIR / "routing_policy.yaml")),
+])
+def test_shipped_policy_matches_historical_rules(policy):
+    """La politique livrée reproduit les seuils historiques (10 et 25 mots)"""
+    assert route(policy, "printer is jammed").route == "tfidf"
+    assert route(policy, "Bonjour, je n'arrive pas à me connecter à mon compte").rule == "multilingual"
+    assert route(policy, " ".join(["word"] * 26)).route == "transformer"
+    decision = route(policy, " ".join(["word"] * 25))
+    assert decision.rule == "default"
+    assert decision.reason == "Texte standard (25 mots) → TF-IDF efficace"
+
+
+def test_confidence_and_load_conditions():
+    policy = RoutingPolicy({
+        'rules': [
+            {'name': 'busy', 'when': {'transformer_inflight_above': 8}, 'route': 'tfidf'},
+            {'name': 'unsure', 'when': {'tfidf_confidence_below': 0.6}, 'route': 'transformer'},
+        ],
+        'default': {'route': 'tfidf'}
+    })
+    text = "cannot reach the vpn from home"
+    assert route(policy, text).rule == "default"
+    assert route(policy, text, tfidf_confidence=0.4).rule == "unsure"
+    assert route(policy, text, tfidf_confidence=0.4,
+                 load={'transformer': {'inflight': 12}}).rule == "busy"
+
+
+def test_invalid_policies_are_rejected():
+    with pytest.raises(PolicyError):
+        RoutingPolicy({'rules': [{'when': {'unknown_condition': 1}, 'route': 'tfidf'}]})
+    with pytest.raises(PolicyError):
+        RoutingPolicy({'rules': [{'route': 'gpt'}]})
+    with pytest.raises(PolicyError):
+        RoutingPolicy({'rules': [{'route': 'tfidf', 'reason': "Texte {lang}"}]})
+    with pytest.raises(PolicyError):
+        RoutingPolicy({'rules': [{'route': 'tfidf', 'reason': "{tfidf_confidence:.2f}"}]})
+    with pytest.raises(PolicyError):
+        RoutingPolicy({'rules': [], 'default': {'route': 'tfidf', 'when': {'max_words': 3}}})
+    # Confiance garantie par la condition : le gabarit numérique est admis
+    policy = RoutingPolicy({'rules': [{'route': 'transformer', 'when': {'tfidf_confidence_below': 0.6},
+                                       'reason': "Confiance {tfidf_confidence:.2f}"}]})
+    assert route(policy, "vpn down", tfidf_confidence=0.42).reason == "Confiance 0.42"
+
+
+def test_store_hot_reloads_and_keeps_last_valid_policy(tmp_path):
+    path = tmp_path / "policy.yaml"
+    path.write_text("rules: []\ndefault: {route: tfidf}\n")
+    store = PolicyStore(str(path), check_interval=0)
+    assert route(store.current(), " ".join(["mot"] * 40)).route == "tfidf"
+
+    path.write_text("rules: []\ndefault: {route: transformer}\n")
+    os.utime(path, (1, 1))
+    assert route(store.current(), "hello").route == "transformer"
+
+    path.write_text("rules: [{route: nope}]\n")
+    os.utime(path, (2, 2))
+    assert route(store.current(), "hello").route == "transformer"
+    assert store.last_error is not None
+
+
+def test_shipped_policy_sheds_borderline_tickets_under_load():
+    """Un ticket long mais limite part sur TF-IDF quand le transformer sature"""
+    policy = RoutingPolicy.from_file(str(AGENT_DIR / "routing_policy.yaml"))
+    tracker = LoadTracker(['tfidf', 'transformer'])
+    text = " ".join(["word"] * 30)
+    assert route(policy, text, load=tracker.snapshot()).rule == "long_text"
+
+    tracker.backends['transformer'].inflight = 9
+    decision = route(policy, text, load=tracker.snapshot())
+    assert decision.route == "tfidf"
+    assert decision.reason == "Transformer saturé (9 en vol) → TF-IDF"
+    # Les tickets très longs restent sur le transformer
+    assert route(policy, " ".join(["word"] * 60), load=tracker.snapshot()).route == "transformer"
+
+
+def test_load_tracker_ewma_and_inflight():
+    load = BackendLoad('transformer', alpha=0.5)
+    with load.track():
+        assert load.snapshot()['inflight'] == 1
+    assert load.snapshot()['inflight'] == 0
+    load.latency_ms = 100.0
+    load.observe(200.0)
+    assert load.snapshot()['latency_ms'] == 150.0
@@ -0,0 +1,69 @@
+"""
+Tests du cache local d'artefacts du registry MLflow
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.artifact_cache import ArtifactCache, directory_checksum
+
+
+def make_download(payload, calls):
+    def download(destination):
+        calls.append(destination)
+        Path(destination, "model.bin").write_bytes(payload)
+    return download
+
+
+def test_fetch_downloads_once_and_verifies_checksum(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    calls = []
+    path = cache.fetch("clf", 3, None, make_download(b"weights", calls))
+    checksum = directory_checksum(path)
+    assert cache.fetch("clf", 3, checksum, make_download(b"weights", calls)) == path
+    assert len(calls) == 1
+
+    with pytest.raises(ValueError):
+        cache.fetch("clf", 4, checksum, make_download(b"corrupted", calls))
+    assert cache.get("clf", 4) is None
+    assert not [e for e in os.listdir(tmp_path / "cache" / "clf") if e.startswith(".tmp-")]
+
+
+def test_resolve_stage_serves_pointer_and_works_offline(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    calls = []
+    lookups = []
+
+    def lookup(name, stage):
+        lookups.append(stage)
+        return 7, None, make_download(b"v7", calls)
+
+    path = cache.resolve_stage("clf", "Production", lookup, prepare=lambda d: Path(d, "derived").touch())
+    assert Path(path, "derived").exists()
+    assert cache.resolve_stage("clf", "Production", lookup) == path
+    assert lookups == ["Production"]
+
+    def offline(name, stage):
+        raise ConnectionError("registry down")
+
+    assert cache.resolve_stage("clf", "Production", offline, max_age=0) == path
+    with pytest.raises(ConnectionError):
+        cache.resolve_stage("clf", "Staging", offline)
+
+
+def test_evicts_least_recently_used_but_keeps_stage_versions(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=2500)
+    calls = []
+    production = cache.resolve_stage("clf", "Production", lambda n, s: (1, None, make_download(b"a" * 1000, calls)))
+    old = cache.fetch("clf", 2, None, make_download(b"b" * 1000, calls))
+    time.sleep(0.01)
+    cache.get("clf", 1)
+    newest = cache.fetch("clf", 3, None, make_download(b"c" * 1000, calls))
+
+    assert not os.path.exists(old)
+    assert os.path.exists(production) and os.path.exists(newest)
@@ -0,0 +1,51 @@
+"""
+Tests du profil de référence et des sketches de dérive
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.data_profile import TrafficSketch, build_profile, psi
+
+TRAIN = [f"printer {i} is not printing on floor {i % 5}" for i in range(200)] + \
+        [f"cannot reset my password for account {i} since {['monday', 'friday'][i % 2]}" for i in range(200)]
+CATEGORIES = ["Hardware"] * 200 + ["Access"] * 200
+
+
+def test_profile_counts_lengths_tokens_and_priors():
+    profile = build_profile(TRAIN, CATEGORIES, vocab_size=10)
+    assert profile['n_texts'] == 400
+    assert sum(profile['length_hist']) == 400
+    assert sum(profile['token_hist']) == profile['n_tokens']
+    assert profile['category_priors'] == {"Access": 0.5, "Hardware": 0.5}
+    assert "printer" in profile['vocabulary'] and len(profile['vocabulary']) == 10
+    assert profile['token_hist'][-1] > 0  # identifiants rares hors vocabulaire
+    assert 0 < profile['vocab_coverage'] <= 1
+
+
+def test_same_distribution_is_stable_and_shifted_traffic_drifts():
+    profile = build_profile(TRAIN, CATEGORIES)
+
+    stable = TrafficSketch(profile)
+    for text, category in zip(TRAIN[::3], CATEGORIES[::3]):
+        stable.observe([text], [category])
+    report = stable.drift()
+    assert not report['drifted']
+    assert report['token_psi'] < 0.1 and report['category_psi'] < 0.1
+    assert abs(report['vocab_coverage'] - report['reference_vocab_coverage']) < 0.02
+
+    shifted = TrafficSketch(profile)
+    shifted.observe(["facture impayée, remboursement demandé au service comptabilité " * 6] * 50,
+                    ["Purchase"] * 50)
+    report = shifted.drift()
+    assert report['drifted']
+    assert report['length_psi'] > 0.2 and report['token_psi'] > 0.2 and report['category_psi'] > 0.2
+    assert report['vocab_coverage'] == 0.0
+
+    shifted.reset()
+    assert shifted.drift()['observed_texts'] == 0
+
+
+def test_psi_of_identical_histograms_is_zero():
+    assert psi([10, 20, 30], [1, 2, 3]) == 0.0
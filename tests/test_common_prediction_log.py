@@ -0,0 +1,100 @@
+"""
+Tests du journal persistant des prédictions (écritures par lots, relecture en flux)
+"""
+import gzip
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common import prediction_log
+from common.prediction_log import PredictionLog, list_segments, read_predictions, text_hash
+
+
+def test_batched_segments_round_trip_without_storing_text(tmp_path):
+    log = PredictionLog(str(tmp_path), "agent", batch_size=16, flush_interval=0.05, segment_records=40)
+    for i in range(100):
+        log.record(f"imprimante en panne {i}", "tfidf", "Hardware", 0.91234, 3.5, "compact/v3")
+    log.close()
+
+    records = list(read_predictions(str(tmp_path), service="agent"))
+    assert len(records) == 100
+    assert records[0]["text_hash"] == text_hash("imprimante en panne 0")
+    assert records[0]["confidence"] == 0.9123 and records[0]["model_version"] == "compact/v3"
+    assert all("imprimante" not in str(r) for r in records)
+    # Segments fermés à 40 enregistrements (+ le dernier à la fermeture), plusieurs lots par segment
+    assert len(list_segments(str(tmp_path))) >= 3
+    assert log.stats()["written"] == 100 and log.stats()["pending"] == 0
+    assert list(read_predictions(str(tmp_path), service="web_interface")) == []
+    # Reprise incrémentale : seuls les segments postérieurs au dernier lu
+    segments = list_segments(str(tmp_path))
+    assert list_segments(str(tmp_path), after=segments[-2]) == segments[-1:]
+
+
+def test_record_never_blocks_when_writer_is_stalled(tmp_path):
+    log = PredictionLog(str(tmp_path), "agent", max_pending=10, flush_interval=0.01)
+    stalled = threading.Event()
+    release = threading.Event()
+    original_write = log._write
+
+    def slow_write(batch):
+        stalled.set()
+        release.wait(5)
+        original_write(batch)
+
+    log._write = slow_write
+    log.record("premier", "tfidf", "Access", 0.8, 1.0)
+    stalled.wait(5)
+
+    start_time = time.perf_counter()
+    accepted = [log.record(f"ticket {i}", "tfidf", "Access", 0.8, 1.0) for i in range(50)]
+    elapsed = time.perf_counter() - start_time
+    release.set()
+    log.close()
+
+    assert elapsed < 0.5
+    assert accepted.count(True) == 10 and log.stats()["dropped"] == 40
+    assert len(list(read_predictions(str(tmp_path)))) == 11
+
+
+def test_orphan_segment_of_dead_process_is_recovered_up_to_truncation(tmp_path):
+    complete = b'{"timestamp": 1.0, "route": "tfidf", "category": "Network"}\n'
+    # Même PID que le processus courant (PID 1 en conteneur) : seul le verrou compte
+    orphan = tmp_path / f"agent-{time.time_ns()}-{os.getpid()}-000001.jsonl.gz.open"
+    orphan.write_bytes(gzip.compress(complete) + gzip.compress(complete * 3)[:20])
+
+    PredictionLog(str(tmp_path), "agent").close()
+
+    assert not orphan.exists()
+    assert [r["category"] for r in read_predictions(str(tmp_path))] == ["Network"]
+
+
+def test_segment_locked_by_a_live_writer_is_left_open(tmp_path):
+    writer = PredictionLog(str(tmp_path), "agent", flush_interval=0.01)
+    writer.record("écran noir", "tfidf", "Hardware", 0.9, 1.0)
+    while writer.stats()["written"] == 0:
+        time.sleep(0.01)
+    open_segments = list(tmp_path.glob("*.open"))
+
+    PredictionLog(str(tmp_path), "agent", flush_interval=0.01).close()
+
+    assert len(open_segments) == 1 and open_segments[0].exists()
+    writer.close()
+    assert not open_segments[0].exists()
+    assert len(list(read_predictions(str(tmp_path)))) == 1
+
+
+def test_without_flock_segments_are_written_and_orphans_left_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(prediction_log, "fcntl", None)
+    orphan = tmp_path / f"agent-{time.time_ns()}-{os.getpid()}-000001.jsonl.gz.open"
+    orphan.write_bytes(b"")
+
+    log = PredictionLog(str(tmp_path), "agent", flush_interval=0.01)
+    log.record("écran noir", "tfidf", "Hardware", 0.9, 1.0)
+    log.close()
+
+    assert orphan.exists()
+    assert len(list(read_predictions(str(tmp_path)))) == 1
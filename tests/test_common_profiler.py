@@ -0,0 +1,69 @@
+"""
+Tests du profileur par échantillonnage à la demande
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.profiler import ProfilerBusyError, SamplingProfiler, collapsed, install_fastapi_profiler
+
+
+def busy_loop_for_profiler(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_profile_captures_busy_thread_as_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop_for_profiler, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        stacks = SamplingProfiler().profile(0.3, interval=0.002)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = {stack: count for stack, count in stacks.items() if "busy_loop_for_profiler" in stack}
+    assert busy and sum(busy.values()) > 10
+    assert all(stack.startswith("busy-worker;") for stack in busy)
+    line = collapsed(stacks).splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit()
+
+
+def test_only_one_capture_at_a_time():
+    profiler = SamplingProfiler()
+    thread = threading.Thread(target=profiler.profile, args=(0.3,))
+    thread.start()
+    time.sleep(0.05)
+    try:
+        profiler.profile(0.01)
+        raised = False
+    except ProfilerBusyError:
+        raised = True
+    thread.join()
+    assert raised
+
+
+def test_endpoint_is_disabled_without_token_and_guarded_with_it(monkeypatch):
+    app = FastAPI()
+    install_fastapi_profiler(app, max_seconds=1)
+    client = TestClient(app)
+
+    monkeypatch.delenv("DEBUG_TOKEN", raising=False)
+    assert client.get("/debug/profile?seconds=0.1").status_code == 404
+
+    monkeypatch.setenv("DEBUG_TOKEN", "s3cret")
+    assert client.get("/debug/profile?seconds=0.1").status_code == 403
+    headers = {"X-Debug-Token": "s3cret"}
+    assert client.get("/debug/profile?seconds=5", headers=headers).status_code == 422
+
+    response = client.get("/debug/profile?seconds=0.1&idle=true", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["X-Profile-Samples"]) > 0
@@ -0,0 +1,152 @@
+"""
+Tests du cœur de service partagé (cache, micro-batching, admission)
+"""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.serving import AdmissionController, MicroBatcher, ModelServer, Overloaded, Predictor
+
+
+class EchoPredictor(Predictor):
+    name = "echo"
+
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+        self.loaded = True
+
+    def predict_batch(self, texts):
+        self.calls.append(list(texts))
+        if self.gate is not None:
+            self.gate.wait(5)
+        return [{"category": text.split()[0], "confidence": 0.9, "model": self.name} for text in texts]
+
+    def ready(self):
+        return self.loaded
+
+
+def make_server(predictor, **options):
+    return ModelServer(predictor, service="test_svc", title="Test", message="test",
+                       metric_prefix="test", registry=CollectorRegistry(), **options)
+
+
+def test_result_cache_serves_repeats_and_metrics_are_real():
+    predictor = EchoPredictor()
+    client = TestClient(make_server(predictor, cache_size=100).app)
+
+    for _ in range(3):
+        assert client.post("/predict", json={"text": "network down"}).json()["category"] == "network"
+    batch = client.post("/predict_batch", json={"texts": ["network down", "access denied"]}).json()
+
+    assert [p["category"] for p in batch["predictions"]] == ["network", "access"]
+    assert predictor.calls == [["network down"], ["access denied"]]
+    metrics = client.get("/metrics").json()
+    assert metrics["test_requests_total"] == 4
+    assert metrics["test_predictions"] == {"network": 4, "access": 1}
+    assert metrics["test_result_cache"]["hits"] == 3
+    assert "test_requests_total" in client.get("/metrics/prometheus").text
+
+
+def test_micro_batcher_merges_concurrent_requests():
+    gate = threading.Event()
+    predictor = EchoPredictor(gate)
+    batcher = MicroBatcher(predictor.predict_batch, max_batch_size=8, max_wait_ms=50)
+    try:
+        first = batcher.submit("hardware screen")
+        while not predictor.calls:
+            time.sleep(0.001)
+        # Pendant le premier appel, les suivants s'accumulent dans la file
+        futures = [batcher.submit(f"access request {i}") for i in range(5)]
+        gate.set()
+        assert first.result(5)["category"] == "hardware"
+        assert [f.result(5)["category"] for f in futures] == ["access"] * 5
+    finally:
+        batcher.close()
+    assert [len(call) for call in predictor.calls] == [1, 5]
+    assert batcher.stats()["batches"] == 2
+
+
+def test_short_batch_fails_every_future_and_deadline_bounds_the_wait():
+    batcher = MicroBatcher(lambda texts: [{"category": "network"}], max_batch_size=8, max_wait_ms=50)
+    try:
+        futures = [batcher.submit(f"vpn {i}") for i in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="1 résultat"):
+                future.result(5)
+    finally:
+        batcher.close()
+
+    gate = threading.Event()
+    client = TestClient(make_server(EchoPredictor(gate), max_wait_ms=1).app)
+    try:
+        start_time = time.perf_counter()
+        response = client.post("/predict", json={"text": "network down"},
+                               headers={"X-Request-Timeout-Ms": "100"})
+        # Le client est libéré à sa deadline, le slot d'admission avec lui
+        assert response.status_code == 503 and time.perf_counter() - start_time < 1
+        assert client.get("/metrics").json()["test_admission"]["inflight"] == 0
+    finally:
+        gate.set()
+
+
+def test_admission_queues_then_sheds_with_retry_after():
+    gate = threading.Event()
+    predictor = EchoPredictor(gate)
+    server = make_server(predictor, cache_size=0, max_inflight=1, max_queue=1, max_queue_wait_ms=5000)
+    client = TestClient(server.app)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        running = pool.submit(client.post, "/predict", json={"text": "software crash"})
+        while server.admission.inflight == 0:
+            time.sleep(0.001)
+        queued = pool.submit(client.post, "/predict", json={"text": "software freeze"})
+        while server.admission.stats()["queued"] == 0:
+            time.sleep(0.001)
+        shed = client.post("/predict", json={"text": "software bug"})
+        expired = client.post("/predict", json={"text": "software bug"}, headers={"X-Request-Timeout-Ms": "0"})
+        gate.set()
+        assert running.result().status_code == 200
+        assert queued.result().status_code == 200
+
+    assert shed.status_code == 429 and int(shed.headers["Retry-After"]) >= 1
+    assert expired.status_code == 503
+    assert server.admission.stats()["rejected"] == {"queue_full": 1, "deadline": 1}
+    wait_count = server.registry.get_sample_value("test_queue_wait_seconds_count")
+    assert wait_count == 2
+
+    predictor.loaded = False
+    assert client.get("/health").status_code == 503
+    assert client.post("/predict", json={"text": "x"}).status_code == 503
+
+
+def test_admission_rejects_requests_that_cannot_meet_their_deadline():
+    admission = AdmissionController(max_inflight=1, max_queue=4, max_queue_wait_s=0.05)
+    with admission.admit():
+        time.sleep(0.02)  # temps de service moyen ≈ 20 ms
+
+    with admission.admit():
+        with pytest.raises(Overloaded) as rejected:
+            with admission.admit(deadline_s=0.01):
+                pass
+        assert (rejected.value.reason, rejected.value.status_code) == ("deadline", 503)
+
+        start_time = time.monotonic()
+        with pytest.raises(Overloaded) as rejected:
+            with admission.admit():
+                pass
+        assert rejected.value.reason == "queue_timeout"
+        assert time.monotonic() - start_time < 1
+
+    assert admission.stats()["inflight"] == 0 and admission.stats()["queued"] == 0
+    unlimited = AdmissionController(max_inflight=0)
+    with unlimited.admit(), unlimited.admit():
+        assert unlimited.inflight == 2
@@ -0,0 +1,77 @@
+"""
+Tests des traces de requêtes partagées par les services
+"""
+import sys
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.tracing import (
+    Trace, TraceBuffer, activate, deactivate, install_fastapi_tracing,
+    outgoing_headers, parse_server_timing, record_remote_timing, span
+)
+
+
+def test_server_timing_round_trip():
+    trace = Trace("tfidf_svc", "POST /predict")
+    trace.add_span("tokenize", 3.25)
+    trace.add_span("forward", 40.0)
+    trace.finish()
+    metrics = dict(parse_server_timing(trace.server_timing()))
+    assert metrics["tokenize"] == 3.25
+    assert metrics["forward"] == 40.0
+    assert metrics["total"] == round(trace.duration_ms, 3)
+
+
+def test_remote_stages_and_network_time_join_the_caller_trace():
+    trace = Trace("agent", "POST /predict", trace_id="abcdef123456")
+    token = activate(trace)
+    try:
+        assert outgoing_headers() == {"X-Trace-Id": "abcdef123456"}
+        record_remote_timing("transformer", 50.0, "tokenize;dur=5, forward;dur=30, total;dur=38")
+    finally:
+        deactivate(token)
+
+    spans = {s["name"]: s["duration_ms"] for s in trace.to_dict()["spans"]}
+    assert spans == {"transformer.tokenize": 5.0, "transformer.forward": 30.0, "transformer.network": 12.0}
+    assert outgoing_headers() == {}
+
+
+def test_invalid_incoming_trace_id_is_replaced():
+    assert Trace("agent", "x", trace_id="bad id\r\n").trace_id != "bad id\r\n"
+
+
+def test_buffer_returns_slowest_first():
+    buffer = TraceBuffer(maxsize=2)
+    for name, duration in (("a", 5.0), ("b", 50.0), ("c", 20.0)):
+        trace = Trace("agent", name)
+        trace.finish()
+        trace.duration_ms = duration
+        buffer.record(trace)
+    assert [t["name"] for t in buffer.slowest()] == ["b", "c"]
+    assert [t["name"] for t in buffer.slowest(min_ms=30)] == ["b"]
+
+
+def test_fastapi_middleware_traces_sync_endpoints():
+    app = FastAPI()
+    buffer = TraceBuffer()
+    install_fastapi_tracing(app, "tfidf_svc", buffer)
+
+    @app.post("/predict")
+    def predict():
+        with span("predict"):
+            time.sleep(0.001)
+        return {"ok": True}
+
+    client = TestClient(app)
+    response = client.post("/predict", headers={"X-Trace-Id": "trace-0001"})
+    assert response.headers["X-Trace-Id"] == "trace-0001"
+    assert "predict;dur=" in response.headers["Server-Timing"]
+
+    traces = client.get("/debug/traces").json()["traces"]
+    assert traces[0]["trace_id"] == "trace-0001"
+    assert traces[0]["spans"][0]["name"] == "predict"
@@ -0,0 +1,32 @@
+"""
+Tests du stockage Parquet des datasets du pipeline
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from data_io import read_dataset, storage_report, write_dataset
+
+
+def test_parquet_round_trip_with_dictionary_category(tmp_path):
+    df = pd.DataFrame({
+        'text': [f"ticket {i}" for i in range(30)],
+        'category': ["Hardware", "Access", "Network"] * 10,
+    })
+    path = tmp_path / "train.parquet"
+    write_dataset(df, path)
+
+    assert pa.types.is_dictionary(pq.read_schema(path).field('category').type)
+    loaded = read_dataset(path)
+    assert loaded['text'].tolist() == df['text'].tolist()
+    assert loaded['category'].tolist() == df['category'].tolist()
+    assert list(read_dataset(path, columns=['text']).columns) == ['text']
+
+    report = storage_report(df, path, tmp_path)
+    assert report['parquet_mb'] > 0 and report['csv_mb'] > 0
+    assert not list(tmp_path.glob('*.csv'))
@@ -0,0 +1,50 @@
+"""
+Tests de la normalisation et de la déduplication du train
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from dedup_data import deduplicate, normalize
+
+PARAMS = {
+    'workers': 2,
+    'chunk_size': 3,
+    'shingle_size': 3,
+    'num_perm': 128,
+    'bands': 16,
+    'jaccard_threshold': 0.85,
+    'seed': 42,
+}
+
+
+def test_normalize_case_accents_and_whitespace():
+    assert normalize("  Imprimante   BLOQUÉE\tau 3ème étage ") == "imprimante bloquee au 3eme etage"
+
+
+def test_exact_and_near_duplicates_are_removed_keeping_original_text():
+    base = ("my laptop screen stays black after the latest windows update and the docking "
+            "station does not detect any external monitor in the meeting room")
+    df = pd.DataFrame({
+        'text': [
+            base,
+            base.upper().replace(" ", "  "),                # doublon exact après normalisation
+            base + " today",                               # quasi-doublon
+            "Cannot reset my VPN password, the portal returns an error",
+            "Please order two new ergonomic chairs for the finance team",
+            base,
+        ],
+        'category': ['Hardware', 'Hardware', 'Access', 'Access', 'Purchase', 'Hardware'],
+    })
+
+    deduped, stats = deduplicate(df, PARAMS)
+
+    assert stats['exact_duplicates'] == 2
+    assert stats['near_duplicates'] == 1
+    assert stats['label_conflict_groups'] == 1
+    assert deduped['text'].tolist() == [base, df['text'][3], df['text'][4]]
+    # Catégorie majoritaire du groupe
+    assert deduped['category'].tolist() == ['Hardware', 'Access', 'Purchase']
@@ -0,0 +1,36 @@
+"""
+Tests du dimensionnement des workers du superviseur
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from launch_background import SUPERVISED_SERVICES, plan_workers
+
+SPECS = [(directory, memory_mb, threads, max_workers)
+         for _, directory, _, memory_mb, threads, max_workers in SUPERVISED_SERVICES]
+
+
+def threads_used(workers):
+    return sum(workers[directory] * threads for directory, _, threads, _ in SPECS)
+
+
+def test_cores_are_shared_between_services_not_granted_to_each():
+    workers = plan_workers(SPECS, cpu_count=8, memory_mb=64000)
+
+    assert threads_used(workers) <= 8
+    assert workers == {"tfidf_svc": 3, "transformer_svc": 2, "agent": 1}
+
+
+def test_memory_budget_is_shared_and_every_service_keeps_one_worker():
+    # 0.7 × 3000 Mo : de quoi charger un modèle de chaque, pas un de plus
+    assert plan_workers(SPECS, cpu_count=32, memory_mb=3000) == {"tfidf_svc": 1, "transformer_svc": 1, "agent": 1}
+    assert plan_workers(SPECS, cpu_count=1, memory_mb=64000) == {"tfidf_svc": 1, "transformer_svc": 1, "agent": 1}
+
+
+def test_forced_workers_are_reserved_before_sharing_the_rest():
+    workers = plan_workers(SPECS, {"transformer_svc": 3}, cpu_count=8, memory_mb=64000)
+
+    assert workers["transformer_svc"] == 3
+    assert workers["tfidf_svc"] == 1 and threads_used(workers) == 8
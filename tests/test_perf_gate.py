@@ -0,0 +1,56 @@
+"""
+Tests du benchmark et des budgets de performance de la promotion
+"""
+import sys
+from pathlib import Path
+
+import joblib
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.svm import LinearSVC
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from perf_gate import benchmark_artifacts, check_budgets
+
+BUDGETS = {
+    'bench_samples': 50,
+    'latency_samples': 20,
+    'batch_size': 16,
+    'repeats': 1,
+    'max_p99_regression': 0.20,
+    'max_memory_regression': 0.10,
+    'max_throughput_drop': 0.20,
+    'latency_slack_ms': 0.5,
+    'memory_slack_mb': 5,
+}
+PRODUCTION = {'p99_ms': 4.0, 'model_memory_mb': 50.0, 'throughput_per_s': 1000.0}
+
+
+def test_candidate_within_budgets_is_accepted():
+    candidate = {'p99_ms': 5.0, 'model_memory_mb': 58.0, 'throughput_per_s': 850.0}
+    assert check_budgets(candidate, PRODUCTION, BUDGETS) == []
+
+
+@pytest.mark.parametrize("field,value", [
+    ('p99_ms', 12.0),               # 3x plus lent
+    ('model_memory_mb', 80.0),
+    ('throughput_per_s', 300.0),
+])
+def test_each_regression_beyond_budget_is_refused(field, value):
+    candidate = dict(PRODUCTION, **{field: value})
+    assert len(check_budgets(candidate, PRODUCTION, BUDGETS)) == 1
+
+
+def test_benchmark_runs_artifacts_in_fresh_process(tmp_path):
+    texts = [f"printer {i} offline" if i % 2 else f"password reset {i}" for i in range(40)]
+    labels = ["Hardware" if i % 2 else "Access" for i in range(40)]
+    vectorizer = TfidfVectorizer()
+    model = LinearSVC().fit(vectorizer.fit_transform(texts), labels)
+    joblib.dump(vectorizer, tmp_path / "tfidf_vectorizer.pkl")
+    joblib.dump(model, tmp_path / "svm_model.pkl")
+
+    results = benchmark_artifacts(tmp_path, texts, BUDGETS)
+    assert set(results) == {'load_seconds', 'p50_ms', 'p95_ms', 'p99_ms', 'throughput_per_s', 'model_memory_mb'}
+    assert 0 < results['p50_ms'] <= results['p99_ms']
+    assert results['throughput_per_s'] > 0
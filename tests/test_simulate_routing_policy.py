@@ -0,0 +1,40 @@
+"""
+Tests du simulateur hors-ligne de politique de routage (modèle de charge)
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from simulate_routing_policy import DEFAULT_POLICY_PATH, parse_load, simulate
+from routing_policy import RoutingPolicy
+
+POLICY = RoutingPolicy.from_file(str(DEFAULT_POLICY_PATH))
+LATENCY_MS = {"tfidf": 15.0, "transformer": 1000.0}
+# 30 mots : long mais limite (règles long_text_shed puis long_text)
+BORDERLINE = " ".join(["the vpn client disconnects every few minutes"] * 5)[:400]
+
+
+def test_without_load_model_shedding_rules_are_reported():
+    report = simulate(POLICY, [{"text": BORDERLINE}] * 5, LATENCY_MS)
+
+    assert report["load_model"] is None
+    assert report["unevaluated_rules"] == ["long_text_shed"]
+    assert report["routes"] == {"transformer": 5}
+
+
+def test_fixed_load_snapshot_triggers_shedding():
+    report = simulate(POLICY, [{"text": BORDERLINE}] * 5, LATENCY_MS, parse_load("transformer=12,tfidf=3"))
+
+    assert report["unevaluated_rules"] == []
+    assert report["rules"] == {"long_text_shed": 5}
+
+
+def test_inflight_is_replayed_from_arrivals():
+    # 20 tickets dans la même seconde, 1 s de latence transformer : au-delà
+    # de 8 en vol, les suivants sont délestés vers le TF-IDF
+    records = [{"text": BORDERLINE, "timestamp": 1000 + i * 0.01} for i in range(20)]
+    report = simulate(POLICY, records, LATENCY_MS)
+
+    assert report["load_model"] == "arrivals"
+    assert report["routes"] == {"transformer": 9, "tfidf": 11}
@@ -0,0 +1,116 @@
+"""
+Tests de l'artefact TF-IDF compact (parité avec le pipeline sklearn)
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.svm import SVC
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tfidf_svc"))
+
+from compact_model import CompactTfidfModel, export_compact, export_with_classifier
+
+# SVC(probability=True) est déprécié dans les sklearn récents, mais c'est le modèle entraîné
+pytestmark = pytest.mark.filterwarnings("ignore::FutureWarning")
+
+WORDS = {
+    "Network": "vpn wifi connection router network dns proxy slow drops",
+    "Hardware": "printer laptop screen battery keyboard mouse jammed broken dock",
+    "Access": "password account locked login access permission reset portal drive",
+    "Billing": "invoice refund payment charged billing address duplicate month",
+}
+
+
+def make_tickets(categories, n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = rng.choice(categories, n)
+    texts = [" ".join(rng.choice(WORDS[c].split() + ["the", "my", "is"], 7)) for c in labels]
+    return texts, labels
+
+
+@pytest.mark.parametrize("categories", [["Network", "Hardware"], list(WORDS)])
+def test_compact_model_matches_sklearn(tmp_path, categories):
+    texts, labels = make_tickets(categories)
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), stop_words='english', sublinear_tf=True)
+    X = vectorizer.fit_transform(texts)
+    classifier = SVC(kernel='linear', probability=True, random_state=0).fit(X, labels)
+    path = tmp_path / "compact.npz"
+    export_compact(path, vectorizer, classifier, classifier.classes_)
+
+    model = CompactTfidfModel(str(path))
+    assert np.allclose(model.transform(texts), X.toarray(), atol=1e-6)
+    assert (model.predict(texts) == classifier.predict(X)).all()
+    assert np.allclose(model.predict_proba(texts), classifier.predict_proba(X), atol=1e-5)
+
+
+def test_unknown_text_gets_a_prediction(tmp_path):
+    texts, labels = make_tickets(list(WORDS))
+    vectorizer = TfidfVectorizer()
+    classifier = SVC(kernel='linear', probability=True, random_state=0).fit(
+        vectorizer.fit_transform(texts), labels)
+    path = tmp_path / "compact.npz"
+    export_compact(path, vectorizer, classifier, classifier.classes_)
+
+    model = CompactTfidfModel(str(path))
+    proba = model.predict_proba(["zzz", ""])
+    assert model.predict(["zzz"])[0] in WORDS
+    assert np.allclose(proba.sum(axis=1), 1.0)
+
+
+@pytest.mark.parametrize("categories", [["Access", "Billing"], list(WORDS)])
+def test_softmax_scheme_matches_logistic_regression(tmp_path, categories):
+    texts, labels = make_tickets(categories, seed=1)
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    X = vectorizer.fit_transform(texts)
+    classifier = LogisticRegression(max_iter=500).fit(X, labels)
+    path = tmp_path / "compact.npz"
+    export_compact(path, vectorizer, classifier, classifier.classes_)
+
+    model = CompactTfidfModel(str(path))
+    assert model.scheme == 'ovr_softmax'
+    assert (model.predict(texts) == classifier.predict(X)).all()
+    assert np.allclose(model.predict_proba(texts), classifier.predict_proba(X), atol=1e-5)
+
+
+def test_batch_matches_one_by_one(tmp_path):
+    texts, labels = make_tickets(list(WORDS), seed=2)
+    vectorizer = TfidfVectorizer()
+    classifier = LogisticRegression(max_iter=500).fit(vectorizer.fit_transform(texts), labels)
+    path = tmp_path / "compact.npz"
+    export_compact(path, vectorizer, classifier, classifier.classes_)
+
+    model = CompactTfidfModel(str(path))
+    batch = [texts[0], "", "zzz", texts[1], texts[0]]
+    categories, confidences = model.predict_with_confidence(batch)
+    for text, category, confidence in zip(batch, categories, confidences):
+        single_category, single_confidence = model.predict_with_confidence([text])
+        assert category == single_category[0]
+        assert confidence == pytest.approx(single_confidence[0], abs=1e-6)
+
+    _, probabilities = model.predict_with_proba(batch)
+    np.testing.assert_allclose(probabilities, model.predict_proba(batch))
+    np.testing.assert_allclose(probabilities.max(axis=1), confidences)
+
+
+def test_classifier_retrained_on_frozen_vocabulary(tmp_path):
+    texts, labels = make_tickets(list(WORDS), seed=3)
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    X = vectorizer.fit_transform(texts)
+    base_path = tmp_path / "base.npz"
+    export_compact(base_path, vectorizer, SGDClassifier(random_state=0).fit(X, labels), sorted(WORDS))
+    base = CompactTfidfModel(str(base_path))
+
+    # Nouveau classifieur entraîné sur les features du moteur (ordre du vocabulaire trié)
+    X_base = base.transform(texts)
+    online = SGDClassifier(loss='log_loss', random_state=0).fit(X_base, labels)
+    path = tmp_path / "online.npz"
+    export_with_classifier(str(path), base, online, online.classes_)
+
+    model = CompactTfidfModel(str(path))
+    assert model.scheme == 'ovr_softmax'
+    assert (model.terms == base.terms).all()
+    assert (model.predict(texts) == online.predict(X_base)).all()
@@ -0,0 +1,51 @@
+"""
+Tests du rechargement à chaud des versions publiées par l'apprenant en ligne
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tfidf_svc"))
+
+from model_store import LatestModelStore, LATEST_POINTER
+
+
+def load_text(path):
+    text = Path(path).read_text()
+    if text == "corrupt":
+        raise ValueError("artefact illisible")
+    return text
+
+
+def publish(directory, name, content):
+    (directory / name).write_text(content)
+    (directory / LATEST_POINTER).write_text(name)
+
+
+def test_store_serves_fallback_until_a_version_is_published(tmp_path):
+    store = LatestModelStore(str(tmp_path), load_text, fallback="base", check_interval=0)
+    assert store.current() == "base"
+    assert store.version is None
+
+    publish(tmp_path, "tfidf_v0001.npz", "model-1")
+    assert store.current() == "model-1"
+    publish(tmp_path, "tfidf_v0002.npz", "model-2")
+    assert store.current() == "model-2"
+    assert store.version == "tfidf_v0002.npz"
+
+
+def test_unreadable_version_keeps_previous_model(tmp_path):
+    publish(tmp_path, "tfidf_v0001.npz", "model-1")
+    store = LatestModelStore(str(tmp_path), load_text, check_interval=0)
+
+    publish(tmp_path, "tfidf_v0002.npz", "corrupt")
+    assert store.current() == "model-1"
+    assert "tfidf_v0002.npz" in store.last_error
+    # La version annoncée reste celle réellement servie
+    assert store.version == "tfidf_v0001.npz" and store.failed_version == "tfidf_v0002.npz"
+
+
+def test_pointer_is_rechecked_only_after_interval(tmp_path):
+    store = LatestModelStore(str(tmp_path), load_text, fallback="base", check_interval=3600)
+    store.current()
+    publish(tmp_path, "tfidf_v0001.npz", "model-1")
+    assert store.current() == "base"
@@ -0,0 +1,26 @@
+"""
+Tests de la configuration des threads du service Transformer
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "transformer_svc"))
+
+import threading_config
+from threading_config import parse_cpu_list, resolve_affinity
+
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-3,6") == [0, 1, 2, 3, 6]
+    assert parse_cpu_list(" 2, 1,1 ") == [1, 2]
+    assert parse_cpu_list("") == []
+
+
+def test_auto_affinity_gives_each_worker_its_own_slice(monkeypatch):
+    monkeypatch.setattr(threading_config, "_available_cpus", lambda: list(range(8)))
+    assert resolve_affinity("auto", worker_index=0, threads=2) == [0, 1]
+    assert resolve_affinity("auto", worker_index=3, threads=2) == [6, 7]
+    # Plus de workers que de cœurs : on reboucle
+    assert resolve_affinity("auto", worker_index=4, threads=2) == [0, 1]
+    assert resolve_affinity("", worker_index=0, threads=2) == []
+    assert resolve_affinity("6-9", worker_index=0, threads=2) == [6, 7]
@@ -0,0 +1,54 @@
+"""
+Tests du cache de tokens du service Transformer
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "transformer_svc"))
+
+from token_cache import TokenCache, encode_batch
+
+
+class CountingTokenizer:
+    """Tokenizer minimal : un id par mot, compte les textes encodés"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def __call__(self, texts, truncation, max_length):
+        self.encoded.extend(texts)
+        return {'input_ids': [[101] + [len(w) for w in t.split()][:max_length - 2] + [102]
+                              for t in texts]}
+
+    def pad(self, features, padding, return_tensors):
+        ids = features['input_ids']
+        width = max(len(x) for x in ids)
+        return {
+            'input_ids': [x + [0] * (width - len(x)) for x in ids],
+            'attention_mask': [[1] * len(x) + [0] * (width - len(x)) for x in ids]
+        }
+
+
+def test_repeated_texts_are_tokenized_once():
+    tokenizer = CountingTokenizer()
+    cache = TokenCache(maxsize=10)
+
+    inputs, hits = encode_batch(tokenizer, cache, ["vpn down", "printer jammed again"], 128)
+    assert hits == 0
+    assert inputs['input_ids'] == [[101, 3, 4, 102, 0], [101, 7, 6, 5, 102]]
+
+    inputs, hits = encode_batch(tokenizer, cache, ["vpn down", "new ticket"], 128)
+    assert hits == 1
+    assert tokenizer.encoded == ["vpn down", "printer jammed again", "new ticket"]
+    assert inputs['attention_mask'][0] == [1, 1, 1, 1]
+    assert cache.stats()['hit_rate'] == 0.25
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TokenCache(maxsize=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    cache.get("a")
+    cache.put("c", [3])
+    assert cache.get("b") is None
+    assert cache.get("a") == (1,)
@@ -0,0 +1,278 @@
+# compact_model.py - Artefact TF-IDF compact et moteur d'inférence NumPy
+"""
+Le pickle joblib du modèle embarque tout l'état d'entraînement : le dict
+vocabulary_, l'ensemble stop_words_ (termes élagués par max_features,
+souvent bien plus gros que le vocabulaire), les vecteurs de support du SVC...
+L'artefact compact ne garde que ce qui sert à l'inférence, dans un .npz :
+- vocabulaire trié (UTF-8, largeur fixe) → recherche binaire, sans dict
+- IDF et coefficients en float32 contigus, alignés sur le vocabulaire trié
+- intercepts, probA/probB (calibration de Platt, SVC) et classes
+
+Schémas de classifieur :
+- 'ovo_libsvm' : SVC linéaire un-contre-un. Vote des paires pour la classe
+  prédite et couplage par paires de libsvm pour les probabilités, identiques
+  à SVC.predict / SVC.predict_proba.
+- 'ovr_softmax' : modèle linéaire une ligne par classe (LogisticRegression,
+  SGDClassifier, LinearSVC) : argmax des scores et softmax.
+
+L'inférence est entièrement en NumPy (ni sklearn, ni scipy, ni joblib) et
+vectorisée sur le batch : une seule recherche binaire pour tous les n-grammes
+du batch, TF-IDF en triplets creux (ligne, colonne, poids), scores par
+sommes segmentées.
+"""
+import re
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def _classifier_arrays(classifier) -> dict:
+    """Schéma et tableaux du classifieur linéaire (colonnes dans l'ordre du vectorizer)"""
+    coef = classifier.coef_
+    coef = coef.toarray() if hasattr(coef, 'toarray') else np.asarray(coef)
+    intercept = np.asarray(classifier.intercept_, dtype=np.float64)
+    if hasattr(classifier, 'kernel'):
+        if classifier.kernel != 'linear' or not hasattr(classifier, 'probA_'):
+            raise ValueError("Seul un SVC(kernel='linear', probability=True) est exportable")
+        return {
+            'scheme': 'ovo_libsvm',
+            'coef': coef,
+            'intercept': intercept,
+            'prob_a': np.asarray(classifier.probA_, dtype=np.float64),
+            'prob_b': np.asarray(classifier.probB_, dtype=np.float64),
+        }
+    if coef.shape[0] == 1:
+        # Binaire : softmax([0, s]) = [1 - sigmoid(s), sigmoid(s)]
+        coef = np.vstack([np.zeros_like(coef), coef])
+        intercept = np.concatenate([[0.0], intercept])
+    return {'scheme': 'ovr_softmax', 'coef': coef, 'intercept': intercept}
+
+
+def _save(path, vocabulary: dict, head: dict, classes):
+    np.savez(
+        path,
+        format_version=np.array(FORMAT_VERSION),
+        scheme=np.array(head.pop('scheme')),
+        coef=np.ascontiguousarray(head.pop('coef'), dtype=np.float32),
+        classes=np.asarray(classes).astype(str),
+        **vocabulary,
+        **head
+    )
+
+
+def export_compact(path, vectorizer, classifier, classes):
+    """
+    Écrit l'artefact compact depuis un TfidfVectorizer et un classifieur
+    linéaire entraînés (SVC linéaire ou modèle à coef_ par classe).
+    `classes` : noms des catégories dans l'ordre de classifier.classes_.
+    """
+    if (vectorizer.analyzer != 'word' or vectorizer.strip_accents
+            or vectorizer.preprocessor or vectorizer.tokenizer or vectorizer.binary):
+        raise ValueError("Seul un TfidfVectorizer 'word' standard est exportable")
+    if vectorizer.norm not in ('l2', None):
+        raise ValueError(f"Normalisation non supportée: {vectorizer.norm}")
+
+    vocabulary = vectorizer.vocabulary_
+    terms = np.array([t.encode('utf-8') for t in vocabulary], dtype=bytes)
+    columns = np.array(list(vocabulary.values()))
+    order = np.argsort(terms, kind='stable')
+    terms, columns = terms[order], columns[order]
+
+    idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(vocabulary))
+    head = _classifier_arrays(classifier)
+    head['coef'] = head['coef'][:, columns]
+
+    _save(path, {
+        'terms': terms,
+        'idf': np.asarray(idf, dtype=np.float32)[columns],
+        'stop_words': np.array(sorted(vectorizer.get_stop_words() or []), dtype=str),
+        'token_pattern': np.array(vectorizer.token_pattern),
+        'ngram_range': np.array(vectorizer.ngram_range),
+        'lowercase': np.array(vectorizer.lowercase),
+        'sublinear_tf': np.array(vectorizer.sublinear_tf),
+        'l2_norm': np.array(vectorizer.norm == 'l2'),
+    }, head, classes)
+
+
+def export_with_classifier(path, base, classifier, classes):
+    """
+    Écrit un artefact qui réutilise le vocabulaire figé de `base`
+    (CompactTfidfModel) avec un nouveau classifieur linéaire entraîné sur
+    base.transform_sparse (colonnes déjà dans l'ordre du vocabulaire trié).
+    """
+    _save(path, {
+        'terms': base.terms,
+        'idf': base.idf,
+        'stop_words': np.array(sorted(base.stop_words), dtype=str),
+        'token_pattern': np.array(base.token_pattern.pattern),
+        'ngram_range': np.array(base.ngram_range),
+        'lowercase': np.array(base.lowercase),
+        'sublinear_tf': np.array(base.sublinear_tf),
+        'l2_norm': np.array(base.l2_norm),
+    }, _classifier_arrays(classifier), classes)
+
+
+def pairwise_coupling(r):
+    """
+    Couplage par paires de libsvm (multiclass_probability), vectorisé sur le batch.
+    r: (n, k, k) avec r[:, i, j] = P(i | i ou j). Returns: (n, k)
+    """
+    n, k, _ = r.shape
+    Q = -r.transpose(0, 2, 1) * r
+    diagonal = np.arange(k)
+    Q[:, diagonal, diagonal] = np.einsum('nji,nji->ni', r, r)
+    p = np.full((n, k), 1.0 / k)
+    eps = 0.005 / k
+    active = np.ones(n, dtype=bool)
+
+    for _ in range(max(100, k)):
+        Qp = np.einsum('ntj,nj->nt', Q, p)
+        pQp = (p * Qp).sum(axis=1)
+        # Chaque ticket s'arrête à sa propre convergence, comme dans libsvm
+        active &= np.abs(Qp - pQp[:, None]).max(axis=1) >= eps
+        if not active.any():
+            break
+        P, QP, PQP, QA = p[active], Qp[active], pQp[active], Q[active]
+        for t in range(k):
+            diff = (PQP - QP[:, t]) / QA[:, t, t]
+            P[:, t] += diff
+            PQP = (PQP + diff * (diff * QA[:, t, t] + 2 * QP[:, t])) / (1 + diff) / (1 + diff)
+            QP = (QP + diff[:, None] * QA[:, t, :]) / (1 + diff[:, None])
+            P /= (1 + diff[:, None])
+        p[active] = P
+    return p
+
+
+def softmax(scores):
+    exp = np.exp(scores - scores.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class CompactTfidfModel:
+    """Moteur d'inférence NumPy : même interface predict / predict_proba que le pickle"""
+
+    def __init__(self, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != FORMAT_VERSION:
+                raise ValueError(f"Version d'artefact non supportée: {int(data['format_version'])}")
+            self.scheme = str(data['scheme'])
+            if self.scheme not in ('ovo_libsvm', 'ovr_softmax'):
+                raise ValueError(f"Schéma de classifieur inconnu: {self.scheme}")
+            self.terms = data['terms']
+            self.idf = data['idf']
+            # (n_features, n_scores) : une ligne contiguë lue par colonne TF-IDF
+            self.coef_t = np.ascontiguousarray(data['coef'].T)
+            self.intercept = data['intercept']
+            if self.scheme == 'ovo_libsvm':
+                self.prob_a = data['prob_a']
+                self.prob_b = data['prob_b']
+            self.classes_ = data['classes']
+            self.stop_words = frozenset(data['stop_words'].tolist())
+            self.token_pattern = re.compile(str(data['token_pattern']))
+            self.ngram_range = tuple(int(n) for n in data['ngram_range'])
+            self.lowercase = bool(data['lowercase'])
+            self.sublinear_tf = bool(data['sublinear_tf'])
+            self.l2_norm = bool(data['l2_norm'])
+        self._pairs = np.triu_indices(len(self.classes_), 1)
+
+    def _ngrams(self, text: str) -> list:
+        if self.lowercase:
+            text = text.lower()
+        tokens = [t for t in self.token_pattern.findall(text) if t not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        grams = []
+        for n in range(min_n, max_n + 1):
+            grams.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def transform_sparse(self, texts):
+        """
+        TF-IDF du batch en triplets creux triés par ligne.
+        Returns: (lignes, colonnes, poids float32)
+        """
+        rows, grams = [], []
+        for row, text in enumerate(texts):
+            text_grams = self._ngrams(text)
+            grams.extend(text_grams)
+            rows.extend([row] * len(text_grams))
+        if not grams:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0, dtype=np.float32)
+
+        # Une seule recherche binaire pour tous les n-grammes du batch
+        encoded = np.char.encode(np.array(grams), 'utf-8')
+        positions = np.minimum(np.searchsorted(self.terms, encoded), len(self.terms) - 1)
+        known = self.terms[positions] == encoded
+        n_features = len(self.terms)
+        keys = np.asarray(rows, dtype=np.int64)[known] * n_features + positions[known]
+        keys, counts = np.unique(keys, return_counts=True)
+        rows, columns = np.divmod(keys, n_features)
+
+        weights = counts.astype(np.float32)
+        if self.sublinear_tf:
+            weights = np.log(weights) + 1
+        weights *= self.idf[columns]
+        if self.l2_norm:
+            norms = np.sqrt(np.bincount(rows, weights * weights, minlength=len(texts)))
+            weights /= norms[rows].astype(np.float32)
+        return rows, columns, weights
+
+    def transform(self, texts) -> np.ndarray:
+        """Textes → matrice TF-IDF dense (n, n_features) en float32"""
+        rows, columns, weights = self.transform_sparse(texts)
+        X = np.zeros((len(texts), len(self.terms)), dtype=np.float32)
+        X[rows, columns] = weights
+        return X
+
+    def decision_function(self, texts) -> np.ndarray:
+        """Scores linéaires du batch (paires i < j pour 'ovo_libsvm', classes sinon)"""
+        rows, columns, weights = self.transform_sparse(texts)
+        scores = np.zeros((len(texts), self.coef_t.shape[1]), dtype=np.float32)
+        if len(rows):
+            # Somme segmentée des lignes de coefficients, une par ticket non vide
+            present, starts = np.unique(rows, return_index=True)
+            scores[present] = np.add.reduceat(weights[:, None] * self.coef_t[columns], starts, axis=0)
+        dec = scores + self.intercept
+        # En binaire, sklearn expose coef_/intercept_ du SVC avec le signe inversé
+        if self.scheme == 'ovo_libsvm' and len(self.classes_) == 2:
+            return -dec
+        return dec
+
+    def _predict_from_decision(self, dec) -> np.ndarray:
+        if self.scheme == 'ovr_softmax':
+            return self.classes_[dec.argmax(axis=1)]
+        first, second = self._pairs
+        winners = np.where(dec > 0, first, second)
+        votes = np.zeros((len(dec), len(self.classes_)), dtype=np.int64)
+        np.add.at(votes, (np.arange(len(dec))[:, None], winners), 1)
+        return self.classes_[votes.argmax(axis=1)]
+
+    def _proba_from_decision(self, dec) -> np.ndarray:
+        if self.scheme == 'ovr_softmax':
+            return softmax(dec)
+        first, second = self._pairs
+        f = dec * self.prob_a + self.prob_b
+        # Sigmoïde de Platt stable numériquement (sigmoid_predict de libsvm)
+        e = np.exp(-np.abs(f))
+        pairwise = np.where(f >= 0, e / (1 + e), 1 / (1 + e))
+        pairwise = np.clip(pairwise, 1e-7, 1 - 1e-7)
+        r = np.zeros((len(dec), len(self.classes_), len(self.classes_)))
+        r[:, first, second] = pairwise
+        r[:, second, first] = 1 - pairwise
+        return pairwise_coupling(r)
+
+    def predict(self, texts) -> np.ndarray:
+        return self._predict_from_decision(self.decision_function(texts))
+
+    def predict_proba(self, texts) -> np.ndarray:
+        return self._proba_from_decision(self.decision_function(texts))
+
+    def predict_with_proba(self, texts):
+        """Catégories et probabilités (colonnes dans l'ordre de classes_) en un seul passage"""
+        dec = self.decision_function(texts)
+        return self._predict_from_decision(dec), self._proba_from_decision(dec)
+
+    def predict_with_confidence(self, texts):
+        """Catégories et probabilité max en un seul passage TF-IDF + scores"""
+        categories, probabilities = self.predict_with_proba(texts)
+        return categories, probabilities.max(axis=1)
@@ -1,112 +1,182 @@
 # main.py - Service TF-IDF + SVM
-from fastapi import FastAPI, HTTPException, Response
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import joblib
+from fastapi import HTTPException
 import os
-import numpy as np
+import sys
 import time
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
-
-app = FastAPI(title="TF-IDF + SVM Service")
-
-# Configuration CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=False,  # Doit être False si allow_origins=["*"]
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["*"]
-)
+from prometheus_client import Histogram
+from compact_model import CompactTfidfModel, export_compact
+from model_store import LatestModelStore
+
+# Modules partagés (common/) à la racine du projet
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.tracing import span
+from common.serving import ModelServer, Predictor, options_from_env
+from common.artifact_cache import ArtifactCache, mlflow_stage_lookup
+from common.data_profile import TrafficSketch, load_profile
 
-# Métriques Prometheus
-REQUEST_COUNT = Counter('tfidf_requests_total', 'Nombre total de requêtes', ['method', 'endpoint'])
-REQUEST_LATENCY = Histogram('tfidf_request_duration_seconds', 'Durée des requêtes')
-PREDICTION_COUNT = Counter('tfidf_predictions_total', 'Prédictions par catégorie', ['category'])
 MODEL_LOAD_TIME = Histogram('tfidf_model_load_seconds', 'Temps de chargement du modèle')
 
 # Chemin du modèle (ajustement pour local vs Docker)
 MODEL_PATH = os.getenv("MODEL_PATH", "../models/ticket_classifier_model.pkl")
+# Artefact compact (scripts/export_tfidf_compact.py), préféré au pickle s'il existe
+COMPACT_MODEL_PATH = os.getenv("COMPACT_MODEL_PATH", "../models/ticket_classifier_compact.npz")
+# Versions publiées par scripts/online_learner.py (pointeur LATEST), rechargées à chaud
+ONLINE_MODEL_DIR = os.getenv("ONLINE_MODEL_DIR", "../models/online")
+ONLINE_MODEL_CHECK_S = float(os.getenv("ONLINE_MODEL_CHECK_S", "10"))
+# Démarrage depuis un stage du MLflow Model Registry (ex. Production), via le cache local
+MODEL_STAGE = os.getenv("MODEL_STAGE", "")
+REGISTRY_MODEL_NAME = os.getenv("REGISTRY_MODEL_NAME", "callcenterai-tfidf-classifier")
+MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
+ARTIFACT_CACHE = ArtifactCache(
+    os.getenv("ARTIFACT_CACHE_DIR", "../models/.artifact_cache"),
+    max_bytes=int(float(os.getenv("ARTIFACT_CACHE_MAX_MB", "2048")) * 1024 ** 2)
+)
+ARTIFACT_CACHE_MAX_AGE_S = float(os.getenv("ARTIFACT_CACHE_MAX_AGE_S", "300"))
+REGISTRY_COMPACT_NAME = "ticket_classifier_compact.npz"
+
+def require_sklearn(purpose: str):
+    """
+    joblib pour les pickles sklearn : absent de l'image du service (NumPy seul,
+    tfidf_svc/requirements.txt), installé avec requirements.txt (entraînement/export)
+    """
+    try:
+        import joblib
+        import sklearn  # noqa: F401 - nécessaire au dépickling
+    except ImportError as e:
+        raise RuntimeError(
+            f"{purpose} : scikit-learn/joblib non installés (le service ne sert que l'artefact "
+            f"compact NumPy). Générer {COMPACT_MODEL_PATH} avec python scripts/export_tfidf_compact.py"
+        ) from e
+    return joblib
+
+def compact_from_run_artifacts(directory: str):
+    """Artefacts du run MLflow (vectorizer + SVM) → artefact compact dans le cache"""
+    if os.path.exists(os.path.join(directory, REGISTRY_COMPACT_NAME)):
+        return  # Run publié avec son artefact compact : rien à convertir
+    joblib = require_sklearn("Conversion des pickles du registry en artefact compact")
+    vectorizer = joblib.load(os.path.join(directory, "tfidf_vectorizer.pkl"))
+    classifier = joblib.load(os.path.join(directory, "svm_model.pkl"))
+    label_encoder = joblib.load(os.path.join(directory, "label_encoder.pkl"))
+    export_compact(os.path.join(directory, REGISTRY_COMPACT_NAME), vectorizer, classifier,
+                   label_encoder.inverse_transform(classifier.classes_))
 
 # Chargement du modèle au démarrage
 print("🔄 Chargement du modèle TF-IDF + SVM...")
 start_time = time.time()
+model_format = None
 try:
-    model = joblib.load(MODEL_PATH)
+    if MODEL_STAGE:
+        registry_path = ARTIFACT_CACHE.resolve_stage(
+            REGISTRY_MODEL_NAME, MODEL_STAGE, mlflow_stage_lookup(MLFLOW_TRACKING_URI),
+            max_age=ARTIFACT_CACHE_MAX_AGE_S, prepare=compact_from_run_artifacts
+        )
+        model = CompactTfidfModel(os.path.join(registry_path, REGISTRY_COMPACT_NAME))
+        model_format = f"registry:{MODEL_STAGE}/{os.path.basename(registry_path)}"
+    elif os.path.exists(COMPACT_MODEL_PATH):
+        model = CompactTfidfModel(COMPACT_MODEL_PATH)
+        model_format = "compact"
+    else:
+        # Repli sur le pickle : sklearn/scipy/joblib importés seulement dans ce cas
+        joblib = require_sklearn(f"Artefact compact absent ({COMPACT_MODEL_PATH}), repli pickle impossible")
+        model = joblib.load(MODEL_PATH)
+        model_format = "pickle"
     load_time = time.time() - start_time
     MODEL_LOAD_TIME.observe(load_time)
-    print("✅ Modèle TF-IDF chargé avec succès!")
+    print(f"✅ Modèle TF-IDF chargé avec succès! ({model_format}, {load_time * 1000:.0f} ms)")
 except Exception as e:
     print(f"❌ Erreur lors du chargement du modèle: {e}")
     model = None
 
-# Modèle de requête
-class Ticket(BaseModel):
-    text: str
-
-# Endpoint de prédiction
-@app.post("/predict")
-def predict(ticket: Ticket):
-    REQUEST_COUNT.labels(method='POST', endpoint='/predict').inc()
-    start_time = time.time()
-    
-    if model is None:
-        raise HTTPException(status_code=503, detail="Modèle non disponible")
-    
-    try:
-        # Prédiction
-        prediction = model.predict([ticket.text])[0]
-        
-        # Probabilités
-        probabilities = model.predict_proba([ticket.text])[0]
-        confidence = float(np.max(probabilities))
-        
-        # Métriques
-        PREDICTION_COUNT.labels(category=prediction).inc()
-        REQUEST_LATENCY.observe(time.time() - start_time)
-        
+MODEL_STORE = LatestModelStore(
+    ONLINE_MODEL_DIR,
+    loader=CompactTfidfModel,
+    fallback=model,
+    check_interval=ONLINE_MODEL_CHECK_S
+)
+
+# Dérive du trafic par rapport au profil du train (sketches, aucun texte conservé)
+DRIFT_PROFILE_PATH = os.getenv("DRIFT_PROFILE_PATH", "../data/processed/train_profile.json")
+try:
+    DRIFT_SKETCH = TrafficSketch(
+        load_profile(DRIFT_PROFILE_PATH),
+        sample_rate=float(os.getenv("DRIFT_SAMPLE_RATE", "1.0")),
+        psi_threshold=float(os.getenv("DRIFT_PSI_THRESHOLD", "0.2"))
+    )
+    print(f"✅ Profil de référence chargé pour la dérive: {DRIFT_PROFILE_PATH}")
+except Exception as e:
+    DRIFT_SKETCH = None
+    print(f"⚠️  Suivi de dérive désactivé ({DRIFT_PROFILE_PATH}): {e}")
+
+class TfidfPredictor(Predictor):
+    """Modèle courant du MODEL_STORE (compact ou pickle, rechargé à chaud)"""
+    name = "TF-IDF + SVM"
+
+    def predict_batch(self, texts: list) -> list:
+        """Classe un groupe de tickets en un seul passage TF-IDF + scores"""
+        current = MODEL_STORE.current()
+        with span("predict", batch_size=len(texts)):
+            if isinstance(current, CompactTfidfModel):
+                categories, probabilities = current.predict_with_proba(texts)
+            else:
+                categories = current.predict(texts)
+                probabilities = current.predict_proba(texts)
+        # Probabilités calibrées (Platt) par catégorie : utilisées par l'ensemble de l'agent
+        classes = [str(c) for c in current.classes_]
+        return [
+            {
+                "category": str(category),
+                "confidence": round(float(row.max()), 4),
+                "model": self.name,
+                "probabilities": {c: round(float(p), 4) for c, p in zip(classes, row)}
+            }
+            for category, row in zip(categories, probabilities)
+        ]
+
+    def ready(self) -> bool:
+        return MODEL_STORE.current() is not None
+
+    @property
+    def version(self):
+        return model_format, MODEL_STORE.version
+
+    def info(self) -> dict:
         return {
-            "category": prediction,
-            "confidence": round(confidence, 4),
-            "model": "TF-IDF + SVM"
+            "model": "TF-IDF + LinearSVC",
+            "model_format": model_format,
+            "online_version": MODEL_STORE.version
         }
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur de prédiction: {str(e)}")
-
-@app.options("/predict")
-def predict_options():
-    """Handler OPTIONS pour CORS preflight"""
-    return {}
-
-# Endpoint de test
-@app.get("/")
-def root():
-    status = "ready" if model is not None else "not loaded"
-    return {
-        "message": "TF-IDF + SVM service 🚀",
-        "status": status,
-        "model": "TF-IDF + LinearSVC"
-    }
-
-@app.get("/health")
-def health():
-    REQUEST_COUNT.labels(method='GET', endpoint='/health').inc()
-    if model is None:
-        raise HTTPException(status_code=503, detail="Modèle non chargé")
-    return {"status": "healthy"}
-
-# Endpoint pour les métriques Prometheus (version simple)
-@app.get("/metrics")
-def metrics():
-    return {
-        "tfidf_requests_total": 42,
-        "tfidf_predictions_hardware": 15,
-        "tfidf_predictions_access": 8,
-        "tfidf_predictions_network": 3,
-        "tfidf_model_status": 1
-    }
+
+def observe_drift(texts: list, results: list):
+    if DRIFT_SKETCH is not None:
+        DRIFT_SKETCH.observe(texts, [r["category"] for r in results])
+
+# Le TF-IDF répond en moins d'une milliseconde : pas de micro-batching par défaut ;
+# calcul lié au GIL, peu de requêtes utiles en parallèle, file large mais courte
+SERVER = ModelServer(
+    TfidfPredictor(),
+    service="tfidf_svc",
+    title="TF-IDF + SVM Service",
+    message="TF-IDF + SVM service 🚀",
+    metric_prefix="tfidf",
+    observers=[observe_drift],
+    **options_from_env(max_wait_ms=0, max_inflight=16, max_queue=128, max_queue_wait_ms=500)
+)
+app = SERVER.app
+
+@app.get("/drift")
+def drift():
+    """Dérive du trafic observé vs le train (PSI longueurs, tokens, catégories)"""
+    if DRIFT_SKETCH is None:
+        raise HTTPException(status_code=503, detail="Profil de référence indisponible")
+    return DRIFT_SKETCH.drift()
+
+@app.post("/drift/reset")
+def drift_reset():
+    """Repart d'une fenêtre d'observation vide"""
+    if DRIFT_SKETCH is None:
+        raise HTTPException(status_code=503, detail="Profil de référence indisponible")
+    DRIFT_SKETCH.reset()
+    return {"status": "reset"}
 
 # Démarrage du serveur
 if __name__ == "__main__":
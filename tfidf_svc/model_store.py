@@ -0,0 +1,61 @@
+# model_store.py - Rechargement à chaud des artefacts publiés par l'apprenant en ligne
+"""
+scripts/online_learner.py publie des artefacts versionnés (tfidf_v0001.npz,
+tfidf_v0002.npz, ...) dans un répertoire, puis remplace atomiquement le
+fichier LATEST qui contient le nom de la version courante. Le service relit
+ce pointeur au plus toutes les `check_interval` secondes et bascule sur la
+nouvelle version sans redémarrage ; une version illisible est ignorée et
+l'ancienne reste servie.
+"""
+import os
+import threading
+import time
+
+LATEST_POINTER = "LATEST"
+
+
+class LatestModelStore:
+    """Modèle courant = version pointée par <directory>/LATEST"""
+
+    def __init__(self, directory: str, loader, fallback=None, check_interval: float = 10.0):
+        self.directory = directory
+        self.loader = loader
+        self.check_interval = check_interval
+        self.version = None  # version effectivement servie
+        self.failed_version = None
+        self.last_error = None
+        self._model = fallback
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._reload()
+
+    def _reload(self):
+        try:
+            with open(os.path.join(self.directory, LATEST_POINTER)) as f:
+                version = f.read().strip()
+        except OSError:
+            return
+        # Une version en erreur n'est retentée qu'à la publication suivante
+        if not version or version in (self.version, self.failed_version):
+            return
+        try:
+            model = self.loader(os.path.join(self.directory, version))
+        except Exception as e:
+            self.failed_version = version
+            self.last_error = f"Version {version} ignorée: {e}"
+            print(f"❌ {self.last_error}")
+            return
+        self._model = model
+        self.version = version
+        self.failed_version = None
+        self.last_error = None
+        print(f"🔁 Modèle en ligne chargé: {version}")
+
+    def current(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            with self._lock:
+                if now >= self._next_check:
+                    self._next_check = now + self.check_interval
+                    self._reload()
+        return self._model
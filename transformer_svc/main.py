@@ -1,33 +1,59 @@
 # main.py - Service Transformer avec DistilBERT
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import joblib
 import os
+import sys
+import time
+from prometheus_client import Counter, Histogram
+from threading_config import configure_torch_threads, autotune_threads
+from token_cache import TokenCache, encode_batch
 
-app = FastAPI(title="Transformer (DistilBERT) Service")
+# Modules partagés (common/) à la racine du projet
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.tracing import span
+from common.serving import ModelServer, Predictor, options_from_env
 
-# Configuration CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=False,  # Doit être False si allow_origins=["*"]
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["*"]
-)
+# Variante servie : 'teacher' (DistilBERT fine-tuné) ou 'student' (distillé)
+MODEL_VARIANT = os.getenv("MODEL_VARIANT", "teacher")
+MODEL_LABELS = {
+    'teacher': "DistilBERT-multilingual",
+    'student': "DistilBERT-student"
+}
+if MODEL_VARIANT not in MODEL_LABELS:
+    raise ValueError(f"MODEL_VARIANT inconnu: {MODEL_VARIANT} (teacher|student)")
+MODEL_LABEL = MODEL_LABELS[MODEL_VARIANT]
 
 # Chemins des modèles (support Docker et local)
-MODEL_DIR = os.getenv("MODEL_DIR", "../models/models/fine_tuned_model")
+if MODEL_VARIANT == 'student':
+    MODEL_DIR = os.getenv("STUDENT_MODEL_DIR", "../models/student_model")
+else:
+    MODEL_DIR = os.getenv("MODEL_DIR", "../models/models/fine_tuned_model")
 LABEL_ENCODER_PATH = os.path.join(MODEL_DIR, "label_encoder.pkl")
+MAX_LENGTH = 128
+
+# Métriques Prometheus propres au Transformer : tokenisation et forward séparés
+# (requêtes, batchs et prédictions : métriques communes de ModelServer)
+TOKENIZE_LATENCY = Histogram('transformer_tokenize_seconds', 'Durée de tokenisation par batch')
+FORWARD_LATENCY = Histogram('transformer_forward_seconds', 'Durée du forward pass par batch')
+TOKEN_CACHE_HITS = Counter('transformer_token_cache_hits_total', 'Textes servis par le cache de tokens')
+TOKEN_CACHE_MISSES = Counter('transformer_token_cache_misses_total', 'Textes tokenisés')
+
+# Cache LRU des input_ids (les textes du call center se répètent)
+TOKEN_CACHE = TokenCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "50000")))
+
+# Threads torch et affinité CPU du worker (avant tout calcul)
+THREADING = configure_torch_threads(torch)
+print(f"🧵 Threads torch: {THREADING}")
 
 # Chargement du modèle au démarrage
-print("🔄 Chargement du modèle Transformer...")
+print(f"🔄 Chargement du modèle Transformer ({MODEL_VARIANT})...")
 print(f"   📂 Chemin: {os.path.abspath(MODEL_DIR)}")
 try:
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_DIR)
+    # Tokenizer rapide (Rust) obligatoire : le tokenizer Python est ~10x plus lent
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_DIR, use_fast=True)
+    if not tokenizer.is_fast and os.getenv("TOKENIZER_ALLOW_SLOW", "0") != "1":
+        raise RuntimeError("Tokenizer rapide indisponible (TOKENIZER_ALLOW_SLOW=1 pour forcer)")
     model = AutoModelForSequenceClassification.from_pretrained(MODEL_DIR)
     label_encoder = joblib.load(LABEL_ENCODER_PATH)
     model.eval()
@@ -39,77 +65,88 @@ except Exception as e:
     model = None
     label_encoder = None
 
-# Modèle de requête
-class Ticket(BaseModel):
-    text: str
-
-# Endpoint de prédiction
-@app.options("/predict")
-def predict_options():
-    """Handler OPTIONS pour CORS preflight"""
-    return {}
-
-@app.post("/predict")
-def predict(ticket: Ticket):
-    if model is None or tokenizer is None:
-        raise HTTPException(status_code=503, detail="Modèle non disponible")
-    
-    try:
+# Auto-tuning des threads sur batchs synthétiques (optionnel)
+if model is not None and os.getenv("TORCH_AUTOTUNE", "0") == "1":
+    print("⏱️  Auto-tuning des threads torch...")
+    THREADING['autotune'] = autotune_threads(torch, model, tokenizer.vocab_size)
+    THREADING['intra_op_threads'] = torch.get_num_threads()
+    print(f"✅ Threads retenus: {THREADING['autotune']['selected_threads']} "
+          f"({THREADING['autotune']['candidates']})")
+
+class TransformerPredictor(Predictor):
+    """DistilBERT (teacher ou student) avec cache de tokens"""
+    name = MODEL_LABEL
+
+    def predict_batch(self, texts: list) -> list:
+        """Tokenise (via le cache) puis classe un groupe de textes en un forward"""
         # Tokenisation
-        inputs = tokenizer(
-            ticket.text,
-            return_tensors="pt",
-            truncation=True,
-            padding=True,
-            max_length=128
-        )
+        start_time = time.perf_counter()
+        with span("tokenize", batch_size=len(texts)):
+            inputs, cache_hits = encode_batch(tokenizer, TOKEN_CACHE, texts, MAX_LENGTH)
+        TOKENIZE_LATENCY.observe(time.perf_counter() - start_time)
+        TOKEN_CACHE_HITS.inc(cache_hits)
+        TOKEN_CACHE_MISSES.inc(len(texts) - cache_hits)
         
         # Prédiction
-        with torch.no_grad():
+        start_time = time.perf_counter()
+        with span("forward", batch_size=len(texts)), torch.no_grad():
             outputs = model(**inputs)
             probabilities = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            predicted_class = torch.argmax(probabilities, dim=-1).item()
-            confidence = probabilities[0][predicted_class].item()
-        
-        # Décodage de la catégorie
-        category = label_encoder.inverse_transform([predicted_class])[0]
+            confidences, predicted_classes = probabilities.max(dim=-1)
+        FORWARD_LATENCY.observe(time.perf_counter() - start_time)
         
-        return {
-            "category": category,
-            "confidence": round(confidence, 4),
-            "model": "DistilBERT-multilingual"
+        # Décodage des catégories
+        categories = label_encoder.inverse_transform(predicted_classes.tolist())
+        classes = [str(c) for c in label_encoder.classes_]
+        return [
+            {
+                "category": category,
+                "confidence": round(confidence, 4),
+                "model": self.name,
+                "probabilities": {c: round(p, 4) for c, p in zip(classes, row)}
+            }
+            for category, confidence, row in zip(categories, confidences.tolist(), probabilities.tolist())
+        ]
+
+    def ready(self) -> bool:
+        return model is not None and tokenizer is not None
+
+    @property
+    def version(self):
+        return MODEL_VARIANT, os.path.basename(os.path.normpath(MODEL_DIR))
+
+    def info(self) -> dict:
+        info = {
+            "model": MODEL_LABEL,
+            "variant": MODEL_VARIANT,
+            "model_dir": os.path.basename(os.path.normpath(MODEL_DIR)),
+            "threading": THREADING
         }
-    
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur de prédiction: {str(e)}")
-
-# Endpoint de santé
-@app.get("/")
-def root():
-    status = "ready" if model is not None else "not loaded"
-    return {
-        "message": "Transformer (DistilBERT) service 🤖",
-        "status": status,
-        "model": "distilbert-base-multilingual-cased"
-    }
-
-@app.get("/health")
-def health():
-    if model is None:
-        raise HTTPException(status_code=503, detail="Modèle non chargé")
-    return {"status": "healthy"}
-
-# Endpoint pour les métriques Prometheus (version simple)
-@app.get("/metrics")
-def metrics():
-    return {
-        "transformer_requests_total": 18,
-        "transformer_predictions_hardware": 8,
-        "transformer_predictions_access": 5,
-        "transformer_predictions_network": 3,
-        "transformer_predictions_software": 2,
-        "transformer_model_loaded": 1
-    }
+        if model is not None:
+            # Architecture effectivement chargée (l'étudiant distillé a moins de couches)
+            config = model.config
+            info["architecture"] = {
+                "type": config.model_type,
+                "layers": getattr(config, 'n_layers', getattr(config, 'num_hidden_layers', None)),
+                "dim": getattr(config, 'dim', getattr(config, 'hidden_size', None))
+            }
+        return info
+
+    def metrics(self) -> dict:
+        return {"transformer_token_cache": TOKEN_CACHE.stats()}
+
+# Requêtes unitaires concurrentes regroupées en un forward (5 ms d'attente max) ;
+# au plus un batch complet en cours, au-delà file bornée puis délestage 429/503
+SERVER = ModelServer(
+    TransformerPredictor(),
+    service="transformer_svc",
+    title="Transformer (DistilBERT) Service",
+    message="Transformer (DistilBERT) service 🤖",
+    metric_prefix="transformer",
+    **options_from_env(max_batch_size=32, max_wait_ms=5, max_inflight=32, max_queue=64,
+                       max_queue_wait_ms=2000)
+)
+app = SERVER.app
 
 # Démarrage du serveur
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+# threading_config.py - Threads torch et affinité CPU par worker
+"""
+Avec plusieurs workers par nœud, les threads intra-op de torch (un par
+cœur par défaut) se marchent dessus et la latence s'effondre. Ce module
+fixe explicitement les threads de chaque worker, peut épingler le worker
+sur un sous-ensemble de cœurs et propose un auto-tuning au démarrage.
+
+Variables d'environnement :
+- TORCH_NUM_THREADS : threads intra-op (défaut : WORKER_THREADS du superviseur)
+- TORCH_INTEROP_THREADS : threads inter-op (défaut : 1 si plusieurs workers)
+- TORCH_CPU_AFFINITY : "auto" (tranche de cœurs selon WORKER_INDEX) ou
+  liste explicite "0-3,6"
+- TORCH_AUTOTUNE=1 : mesure plusieurs réglages et garde le meilleur débit/cœur
+"""
+import os
+import time
+
+
+def parse_cpu_list(spec: str) -> list:
+    """'0-3,6' → [0, 1, 2, 3, 6]"""
+    cpus = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return sorted(set(cpus))
+
+
+def _available_cpus() -> list:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _int_env(name: str):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def resolve_affinity(spec: str, worker_index: int, threads: int) -> list:
+    """Cœurs attribués au worker, ou [] si aucune affinité demandée"""
+    if not spec:
+        return []
+    available = _available_cpus()
+    if spec == 'auto':
+        # Tranches contiguës de `threads` cœurs, en boucle si plus de workers que de cœurs
+        start = (worker_index * threads) % len(available)
+        return [available[(start + i) % len(available)] for i in range(min(threads, len(available)))]
+    return [cpu for cpu in parse_cpu_list(spec) if cpu in available]
+
+
+def configure_torch_threads(torch) -> dict:
+    """Applique threads et affinité ; à appeler avant le premier forward"""
+    worker_index = _int_env('WORKER_INDEX') or 0
+    worker_count = _int_env('WORKER_COUNT') or 1
+    threads = _int_env('TORCH_NUM_THREADS') or _int_env('WORKER_THREADS')
+    interop = _int_env('TORCH_INTEROP_THREADS')
+    if interop is None and worker_count > 1:
+        interop = 1
+
+    affinity = resolve_affinity(os.getenv('TORCH_CPU_AFFINITY', ''), worker_index, threads or 1)
+    if affinity and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, affinity)
+        if threads is None:
+            threads = len(affinity)
+
+    if threads:
+        torch.set_num_threads(threads)
+    if interop:
+        try:
+            torch.set_num_interop_threads(interop)
+        except RuntimeError as e:
+            # Déjà fixé (le pool inter-op a démarré) : on garde la valeur actuelle
+            print(f"⚠️  Threads inter-op non modifiés: {e}")
+
+    return {
+        'worker_index': worker_index,
+        'intra_op_threads': torch.get_num_threads(),
+        'inter_op_threads': torch.get_num_interop_threads(),
+        'cpu_affinity': affinity,
+    }
+
+
+def autotune_threads(torch, model, vocab_size: int, candidates=None,
+                     batch_size: int = 8, seq_length: int = 64, iterations: int = 3) -> dict:
+    """
+    Mesure le débit sur des batchs synthétiques pour plusieurs nombres de
+    threads et retient celui qui maximise le débit par cœur.
+    """
+    max_threads = torch.get_num_threads()
+    if candidates is None:
+        candidates = sorted({1, 2, 4, 8, max_threads})
+    candidates = [c for c in candidates if 1 <= c <= max_threads]
+
+    generator = torch.Generator().manual_seed(0)
+    input_ids = torch.randint(0, vocab_size, (batch_size, seq_length), generator=generator)
+    attention_mask = torch.ones_like(input_ids)
+
+    results = {}
+    with torch.no_grad():
+        for threads in candidates:
+            torch.set_num_threads(threads)
+            model(input_ids=input_ids, attention_mask=attention_mask)  # échauffement
+            start_time = time.perf_counter()
+            for _ in range(iterations):
+                model(input_ids=input_ids, attention_mask=attention_mask)
+            elapsed = time.perf_counter() - start_time
+            throughput = batch_size * iterations / elapsed
+            results[threads] = {
+                'throughput': round(throughput, 2),
+                'throughput_per_core': round(throughput / threads, 2),
+            }
+
+    best = max(results, key=lambda t: results[t]['throughput_per_core'])
+    torch.set_num_threads(best)
+    return {'selected_threads': best, 'candidates': results}
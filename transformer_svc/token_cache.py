@@ -0,0 +1,76 @@
+# token_cache.py - Cache LRU des input_ids par texte de ticket
+"""
+Les textes du call center se répètent beaucoup : les input_ids tokenisés
+sont gardés dans un cache LRU indexé par le texte. Les textes absents du
+cache sont encodés en un seul appel batch au tokenizer rapide (Rust), puis
+le batch complet est paddé en tenseurs.
+"""
+import threading
+from collections import OrderedDict
+
+
+class TokenCache:
+    """LRU borné texte → tuple d'input_ids (tokens spéciaux inclus)"""
+
+    def __init__(self, maxsize: int = 50000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str):
+        with self._lock:
+            ids = self._data.get(text)
+            if ids is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(text)
+            return ids
+
+    def put(self, text: str, ids):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[text] = tuple(ids)
+            self._data.move_to_end(text)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def encode_batch(tokenizer, cache: TokenCache, texts: list, max_length: int,
+                 return_tensors: str = "pt"):
+    """
+    Tokenise un groupe de textes en passant par le cache.
+    Returns: (entrées paddées pour le modèle, nombre de textes servis par le cache)
+    """
+    ids = [cache.get(text) for text in texts]
+    missing = [i for i, cached in enumerate(ids) if cached is None]
+
+    if missing:
+        encoded = tokenizer(
+            [texts[i] for i in missing],
+            truncation=True,
+            max_length=max_length
+        )['input_ids']
+        for i, input_ids in zip(missing, encoded):
+            cache.put(texts[i], input_ids)
+            ids[i] = input_ids
+
+    inputs = tokenizer.pad(
+        {'input_ids': [list(x) for x in ids]},
+        padding=True,
+        return_tensors=return_tensors
+    )
+    return inputs, len(texts) - len(missing)
@@ -1,6 +1,8 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, g
 from flask_cors import CORS
 import requests
+import atexit
+import json
 import os
 import sys
 import time
@@ -9,6 +11,12 @@ from datetime import datetime
 # Ajouter le répertoire parent au path pour importer les modules
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+from common.tracing import (
+    Trace, TraceBuffer, TRACE_HEADER, SERVER_TIMING_HEADER,
+    activate, deactivate, outgoing_headers, record_remote_timing, span
+)
+from common.prediction_log import PredictionLog, list_segments, read_segment
+
 app = Flask(__name__, 
            static_folder='.',
            static_url_path='')
@@ -21,6 +29,31 @@ SERVICES = {
     'agent': os.getenv('AGENT_SERVICE_URL', 'http://localhost:8003')
 }
 
+# Traces des appels /api/* (point d'entrée de la trace) : GET /debug/traces
+TRACES = TraceBuffer(maxsize=int(os.getenv('TRACE_BUFFER_SIZE', '1000')))
+
+@app.before_request
+def start_trace():
+    if request.path.startswith('/api/'):
+        g.trace = Trace('web_interface', f"{request.method} {request.path}", request.headers.get(TRACE_HEADER))
+        g.trace_token = activate(g.trace)
+
+@app.after_request
+def finish_trace(response):
+    trace = g.pop('trace', None)
+    if trace is not None:
+        trace.finish(status_code=response.status_code)
+        TRACES.record(trace)
+        response.headers[TRACE_HEADER] = trace.trace_id
+        response.headers[SERVER_TIMING_HEADER] = trace.server_timing()
+    return response
+
+@app.teardown_request
+def clear_trace(exc):
+    token = g.pop('trace_token', None)
+    if token is not None:
+        deactivate(token)
+
 # Statistiques globales
 stats = {
     'total_predictions': 0,
@@ -30,6 +63,56 @@ stats = {
     'start_time': datetime.now()
 }
 
+# Journal persistant des prédictions : les statistiques survivent aux redémarrages
+PREDICTION_LOG_DIR = os.getenv('PREDICTION_LOG_DIR', '../data/predictions')
+# Instantané des compteurs : au démarrage, seuls les segments plus récents sont relus
+STATS_SNAPSHOT_PATH = os.path.join(PREDICTION_LOG_DIR, 'web_interface-stats.json')
+SNAPSHOT_KEYS = ('total_predictions', 'total_latency', 'categories_count', 'service_usage')
+
+def close_prediction_log():
+    """Écrit les prédictions en attente puis l'instantané qui les inclut"""
+    PREDICTION_LOG.close()
+    save_stats_snapshot()
+
+try:
+    PREDICTION_LOG = PredictionLog(PREDICTION_LOG_DIR, 'web_interface')
+    atexit.register(close_prediction_log)
+except OSError as e:
+    PREDICTION_LOG = None
+    print(f"⚠️  Journal des prédictions désactivé ({PREDICTION_LOG_DIR}): {e}")
+
+def load_stats_from_log():
+    """Reprend l'instantané des compteurs puis relit en flux les segments écrits depuis"""
+    last_segment = None
+    try:
+        with open(STATS_SNAPSHOT_PATH, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        counters = {key: snapshot[key] for key in SNAPSHOT_KEYS}
+        last_segment = snapshot['last_segment']
+        stats.update(counters)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️  Instantané des statistiques illisible, recomptage complet: {e}")
+    
+    for path in list_segments(PREDICTION_LOG_DIR, 'web_interface', after=last_segment):
+        for record in read_segment(path):
+            count_prediction(record['category'] or 'unknown', record['route'], record['latency_ms'])
+    save_stats_snapshot()
+
+def save_stats_snapshot():
+    """Compteurs + dernier segment fermé qu'ils couvrent (écriture atomique)"""
+    segments = list_segments(PREDICTION_LOG_DIR, 'web_interface')
+    snapshot = {key: stats[key] for key in SNAPSHOT_KEYS}
+    snapshot['last_segment'] = os.path.basename(segments[-1]) if segments else None
+    try:
+        tmp_path = STATS_SNAPSHOT_PATH + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, STATS_SNAPSHOT_PATH)
+    except OSError as e:
+        print(f"⚠️  Instantané des statistiques non écrit: {e}")
+
 @app.route('/')
 def index():
     """Page d'accueil avec l'interface web"""
@@ -54,16 +137,19 @@ def predict():
         elif service == 'transformer':
             url = f"{SERVICES['transformer']}/predict"
         elif service == 'agent':
-            url = f"{SERVICES['agent']}/route"
+            url = f"{SERVICES['agent']}/route_agent"
         else:
             return jsonify({'error': 'Service non supporté'}), 400
         
-        # Faire la requête au service
-        response = requests.post(url, 
-                               json={'text': text},
-                               timeout=30)
+        # Faire la requête au service (identifiant de trace propagé)
+        with span(f"{service}.call"):
+            response = requests.post(url, 
+                                   json={'text': text},
+                                   headers=outgoing_headers(),
+                                   timeout=30)
         
         latency = (time.time() - start_time) * 1000  # en ms
+        record_remote_timing(service, latency, response.headers.get(SERVER_TIMING_HEADER))
         
         if response.status_code == 200:
             result = response.json()
@@ -71,8 +157,13 @@ def predict():
             # Extraire la prédiction (pour l'agent, c'est dans 'prediction')
             prediction = result.get('prediction', result)
             
-            # Mettre à jour les statistiques
+            # Mettre à jour les statistiques (et le journal persistant, sans attendre le disque)
             update_stats(prediction, service, latency)
+            if PREDICTION_LOG is not None:
+                PREDICTION_LOG.record(
+                    text, service, prediction.get('category'), prediction.get('confidence'), latency,
+                    prediction.get('model_version') or prediction.get('model_used') or prediction.get('model')
+                )
             
             return jsonify({
                 'prediction': prediction,
@@ -216,16 +307,32 @@ def demo_mode():
 
 def update_stats(prediction, service, latency):
     """Mettre à jour les statistiques globales"""
+    count_prediction(prediction.get('category', 'unknown'), service, latency)
+
+def count_prediction(category, service, latency):
     stats['total_predictions'] += 1
     stats['total_latency'] += latency
     
     # Compter les catégories
-    category = prediction.get('category', 'unknown')
     stats['categories_count'][category] = stats['categories_count'].get(category, 0) + 1
     
     # Compter l'usage des services
     stats['service_usage'][service] = stats['service_usage'].get(service, 0) + 1
 
+if PREDICTION_LOG is not None:
+    load_stats_from_log()
+
+@app.route('/debug/traces')
+def debug_traces():
+    """Requêtes récentes les plus lentes, étapes des services appelés incluses"""
+    limit = request.args.get('limit', 20, type=int)
+    min_ms = request.args.get('min_ms', 0.0, type=float)
+    return jsonify({
+        'service': 'web_interface',
+        'buffered': len(TRACES),
+        'traces': TRACES.slowest(limit, min_ms)
+    })
+
 if __name__ == '__main__':
     print("🌐 Démarrage de l'interface web CallCenterAI...")
     print("📍 Interface disponible sur: http://localhost:5001")